@@ -0,0 +1,28 @@
+import os
+
+
+class AtomicFile:
+    """
+    Opens a file next to `filename` for writing and renames it over `filename`
+    once written, so a power loss while writing keeps the old file.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.temporary_filename = filename + ".tmp"
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.temporary_filename, "wb")
+        return self.file
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.file.close()
+        if exc_type is None:
+            os.rename(self.temporary_filename, self.filename)
+            return
+
+        try:
+            os.remove(self.temporary_filename)
+        except OSError:
+            pass
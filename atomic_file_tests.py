@@ -0,0 +1,37 @@
+import os
+import tempfile
+import unittest
+from atomic_file import AtomicFile
+
+
+class TestAtomicFile(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "table.bin")
+        with open(self.filename, "wb") as file:
+            file.write(b"old")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_the_written_file_replaces_the_old_one(self):
+        with AtomicFile(self.filename) as file:
+            file.write(b"new")
+
+        with open(self.filename, "rb") as file:
+            assert file.read() == b"new"
+        assert os.listdir(self.directory.name) == ["table.bin"]
+
+    def test_a_failed_write_keeps_the_old_file(self):
+        with self.assertRaises(ValueError):
+            with AtomicFile(self.filename) as file:
+                file.write(b"half")
+                raise ValueError("cannot encode")
+
+        with open(self.filename, "rb") as file:
+            assert file.read() == b"old"
+        assert os.listdir(self.directory.name) == ["table.bin"]
+
+
+if __name__ == "__main__":
+    unittest.main()
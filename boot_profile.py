@@ -0,0 +1,32 @@
+class BootProfile:
+    """
+    Time and heap use at each stage of booting. Times are `ticks_ms()` values,
+    which count from power-up, so the first mark shows how long the firmware
+    took before the application started.
+    """
+
+    def __init__(self):
+        # (stage, at_ms, heap_bytes)
+        self.marks = []
+        self.peak_heap = 0
+
+    def mark(self, stage, at_ms, heap_bytes):
+        self.marks.append((stage, at_ms, heap_bytes))
+        self.peak_heap = max(self.peak_heap, heap_bytes)
+
+    def at_ms(self, stage):
+        for mark_stage, at_ms, _ in self.marks:
+            if mark_stage == stage:
+                return at_ms
+        return None
+
+    def report(self):
+        lines = []
+        previous_ms = 0
+        for stage, at_ms, heap_bytes in self.marks:
+            lines.append(
+                f"{stage}: {at_ms} ms (+{at_ms - previous_ms} ms), heap {heap_bytes}"
+            )
+            previous_ms = at_ms
+        lines.append(f"peak heap: {self.peak_heap}")
+        return lines
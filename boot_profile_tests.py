@@ -0,0 +1,29 @@
+import unittest
+from boot_profile import BootProfile
+
+
+class TestBootProfile(unittest.TestCase):
+    def setUp(self):
+        self.profile = BootProfile()
+        self.profile.mark("firmware start", 600, 2000)
+        self.profile.mark("splash shown", 750, 9000)
+        self.profile.mark("config loaded", 790, 7000)
+
+    def test_at_ms(self):
+        assert self.profile.at_ms("splash shown") == 750
+        assert self.profile.at_ms("wifi up") is None
+
+    def test_peak_heap(self):
+        assert self.profile.peak_heap == 9000
+
+    def test_report(self):
+        assert self.profile.report() == [
+            "firmware start: 600 ms (+600 ms), heap 2000",
+            "splash shown: 750 ms (+150 ms), heap 9000",
+            "config loaded: 790 ms (+40 ms), heap 7000",
+            "peak heap: 9000",
+        ]
+
+
+if __name__ == "__main__":
+    unittest.main()
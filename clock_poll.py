@@ -0,0 +1,30 @@
+class PollInterval:
+    """
+    Time between two polls, starting at `min_ms` and doubling up to `max_ms`
+    while nothing changes. A change, local or seen in a poll, resets it.
+    """
+
+    def __init__(self, min_ms, max_ms):
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.current_ms = min_ms
+
+    def reset(self):
+        self.current_ms = self.min_ms
+
+    def next_ms(self):
+        interval_ms = self.current_ms
+        self.current_ms = min(interval_ms * 2, self.max_ms)
+        return interval_ms
+
+
+def running_key(running_entry):
+    # what tells running entries apart, None while the clock is stopped
+    if running_entry is None:
+        return None
+    return (
+        running_entry["id"],
+        running_entry["customers_id"],
+        running_entry["projects_id"],
+        running_entry["time_since"],
+    )
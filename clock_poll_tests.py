@@ -0,0 +1,37 @@
+import unittest
+from clock_poll import PollInterval, running_key
+
+RUNNING_ENTRY = {
+    "id": 7,
+    "customers_id": 2000,
+    "projects_id": 3001,
+    "time_since": "2026-10-17T08:00:00Z",
+}
+
+
+class TestPollInterval(unittest.TestCase):
+    def test_backs_off_up_to_the_maximum(self):
+        interval = PollInterval(10, 50)
+
+        assert [interval.next_ms() for _ in range(5)] == [10, 20, 40, 50, 50]
+
+    def test_a_reset_polls_soon_again(self):
+        interval = PollInterval(10, 50)
+        for _ in range(3):
+            interval.next_ms()
+
+        interval.reset()
+        assert interval.next_ms() == 10
+
+
+class TestRunningKey(unittest.TestCase):
+    def test_tells_edited_entries_apart(self):
+        edited = dict(RUNNING_ENTRY, time_since="2026-10-17T07:30:00Z")
+
+        assert running_key(RUNNING_ENTRY) == running_key(dict(RUNNING_ENTRY))
+        assert running_key(RUNNING_ENTRY) != running_key(edited)
+        assert running_key(None) is None
+
+
+if __name__ == "__main__":
+    unittest.main()
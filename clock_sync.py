@@ -0,0 +1,98 @@
+import struct
+from time import mktime
+
+MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun")
+MONTHS += ("Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+
+def parse_http_date(text):
+    # "Sun, 06 Nov 1994 08:49:37 GMT", the format HTTP/1.1 servers send
+    try:
+        _, day, month, year, clock, zone = text.split()
+        hour, minute, second = clock.split(":")
+        t = (
+            int(year),
+            MONTHS.index(month) + 1,
+            int(day),
+            int(hour),
+            int(minute),
+            int(second),
+            0,
+            0,
+            0,
+        )
+    except (AttributeError, ValueError):
+        return None
+
+    if zone != "GMT":
+        return None
+    return mktime(t)
+
+
+class ClockRecord:
+    """
+    The time of the last sync and the measured drift of the RTC, packed for
+    RTC memory, which survives resets and deep sleep.
+
+    The drift is taken off in whole seconds as it adds up between syncs. Each
+    sync measures how far the corrected clock was still off and adjusts the
+    drift by that, so the estimate keeps improving across syncs and reboots.
+    """
+
+    MAGIC = b"CLK1"
+    # magic, synced_at, corrected_at, drift in parts per million
+    FORMAT = "<4sIIi"
+    SIZE = struct.calcsize(FORMAT)
+    # over shorter intervals the one second resolution outweighs the drift
+    MIN_MEASURE_SECONDS = 600
+    MAX_DRIFT_PPM = 100000
+
+    def __init__(self, synced_at=None, corrected_at=None, drift_ppm=0):
+        self.synced_at = synced_at
+        self.corrected_at = corrected_at
+        self.drift_ppm = drift_ppm
+
+    def pack(self):
+        return struct.pack(
+            self.FORMAT,
+            self.MAGIC,
+            self.synced_at or 0,
+            self.corrected_at or 0,
+            self.drift_ppm,
+        )
+
+    @classmethod
+    def unpack(cls, data):
+        if len(data) != cls.SIZE:
+            return None
+
+        magic, synced_at, corrected_at, drift_ppm = struct.unpack(cls.FORMAT, data)
+        if magic != cls.MAGIC or not synced_at:
+            return None
+        return cls(synced_at, corrected_at or synced_at, drift_ppm)
+
+    def correct(self, now):
+        """The corrected time, from then on the correction counts as done."""
+        if self.corrected_at is None or now <= self.corrected_at:
+            return now
+
+        gained = int((now - self.corrected_at) * self.drift_ppm / 1000000)
+        if gained:
+            now -= gained
+            self.corrected_at = now
+        return now
+
+    def sync(self, local, reference, measure=True):
+        """Records that the clock showed `local` at the time `reference`."""
+        if measure and self.synced_at is not None:
+            elapsed = reference - self.synced_at
+            if elapsed >= self.MIN_MEASURE_SECONDS:
+                # what the clock gained on top of the corrections
+                residual_ppm = int((local - reference) * 1000000 / elapsed)
+                drift_ppm = self.drift_ppm + residual_ppm
+                self.drift_ppm = max(
+                    -self.MAX_DRIFT_PPM, min(drift_ppm, self.MAX_DRIFT_PPM)
+                )
+
+        self.synced_at = reference
+        self.corrected_at = reference
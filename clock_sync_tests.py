@@ -0,0 +1,62 @@
+import unittest
+from time import mktime
+from clock_sync import ClockRecord, parse_http_date
+
+
+class TestParseHttpDate(unittest.TestCase):
+    def test_reads_the_date_header(self):
+        result = parse_http_date("Fri, 16 Oct 2026 09:30:05 GMT")
+
+        assert result == mktime((2026, 10, 16, 9, 30, 5, 0, 0, 0))
+
+    def test_returns_none_for_other_text(self):
+        assert parse_http_date("Friday, 16-Oct-26 09:30:05 GMT") is None
+        assert parse_http_date("Fri, 16 Okt 2026 09:30:05 GMT") is None
+        assert parse_http_date("Fri, 16 Oct 2026 09:30:05 CET") is None
+        assert parse_http_date(None) is None
+
+
+class TestClockRecord(unittest.TestCase):
+    def test_unpack_restores_a_packed_record(self):
+        record = ClockRecord(1000, 1600, -25000)
+
+        unpacked = ClockRecord.unpack(record.pack())
+
+        assert (unpacked.synced_at, unpacked.corrected_at) == (1000, 1600)
+        assert unpacked.drift_ppm == -25000
+        assert ClockRecord.unpack(ClockRecord().pack()) is None
+        assert ClockRecord.unpack(b"") is None
+
+    def test_measures_the_drift_between_syncs(self):
+        record = ClockRecord()
+        record.sync(1000, 1000)
+
+        # 10 s fast over 1000 s
+        record.sync(2010, 2000)
+        assert record.drift_ppm == 10000
+
+        # corrected on the way, 1 s fast is left
+        assert record.correct(3000) == 2990
+        record.sync(3001, 3000)
+        assert record.drift_ppm == 11000
+
+    def test_short_or_coarse_syncs_only_set_the_time(self):
+        record = ClockRecord(1000, 1000, 5000)
+
+        record.sync(1110, 1100)
+        record.sync(3000, 2000, measure=False)
+
+        assert record.drift_ppm == 5000
+        assert (record.synced_at, record.corrected_at) == (2000, 2000)
+
+    def test_corrects_in_whole_seconds_once_they_add_up(self):
+        record = ClockRecord(1000, 1000, -4000)
+
+        assert record.correct(1100) == 1100
+        assert record.correct(1250) == 1251
+        assert record.correct(1260) == 1260
+        assert record.corrected_at == 1251
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+import hashlib
+import struct
+from atomic_file import AtomicFile
+from models import ClockodoTask
+
+# tags of the values in a snapshot
+NONE = 0
+FALSE = 1
+TRUE = 2
+INT = 3
+FLOAT = 4
+STRING = 5
+
+
+def encode_value(buffer, value):
+    if value is None:
+        buffer.append(NONE)
+    elif value is True:
+        buffer.append(TRUE)
+    elif value is False:
+        buffer.append(FALSE)
+    elif isinstance(value, int):
+        # struct.pack does not check the range on the device
+        if not -0x80000000 <= value <= 0x7FFFFFFF:
+            raise OverflowError(f"cannot cache {value}")
+        buffer.append(INT)
+        buffer.extend(struct.pack("<i", value))
+    elif isinstance(value, float):
+        buffer.append(FLOAT)
+        buffer.extend(struct.pack("<f", value))
+    elif isinstance(value, str):
+        encoded = value.encode()
+        buffer.append(STRING)
+        buffer.extend(struct.pack("<H", len(encoded)))
+        buffer.extend(encoded)
+    else:
+        raise TypeError(f"cannot cache {type(value).__name__} values")
+
+
+def decode_value(data, offset):
+    # returns the value at `offset` and the offset after it
+    tag = data[offset]
+    offset += 1
+    if tag == NONE:
+        return None, offset
+    elif tag == TRUE:
+        return True, offset
+    elif tag == FALSE:
+        return False, offset
+    elif tag == INT:
+        return struct.unpack_from("<i", data, offset)[0], offset + 4
+    elif tag == FLOAT:
+        return struct.unpack_from("<f", data, offset)[0], offset + 4
+    elif tag == STRING:
+        size = struct.unpack_from("<H", data, offset)[0]
+        offset += 2
+        return str(data[offset : offset + size], "utf-8"), offset + size
+    raise ValueError(f"unknown tag {tag}")
+
+
+class ConfigCache:
+    """
+    The settings and tasks of config.json after they were parsed and validated,
+    in a compact binary snapshot on flash. The snapshot is keyed by the SHA-256
+    of config.json and the names of the known settings, it is only loaded while
+    neither config.json nor the firmware's settings changed.
+
+    Settings are None, booleans, numbers or strings. They are followed by the
+    tasks as fixed records and their names, unpacked with one call per task.
+    """
+
+    # a smaller config.json is parsed with less heap than the snapshot loads
+    # with, it is not cached
+    MIN_SOURCE_BYTES = 4096
+    MAGIC = b"CFG1"
+    # magic, SHA-256 of config.json, size of the values
+    HEADER_FORMAT = "<4s32sI"
+    HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+    # customer_id or 0, project_id or 0, name size
+    TASK_FORMAT = "<IIH"
+    TASK_SIZE = struct.calcsize(TASK_FORMAT)
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    @staticmethod
+    def digest(source, names=()):
+        # a snapshot written by a firmware with other settings lacks some of
+        # them or has stale ones
+        digest = hashlib.sha256(source)
+        for name in sorted(names):
+            digest.update(b"\0" + name.encode())
+        return digest.digest()
+
+    def load(self, digest):
+        """Returns (settings, tasks) cached for `digest`, None without a snapshot."""
+        try:
+            with open(self.filename, "rb") as file:
+                data = file.read()
+        except OSError:
+            return None
+
+        if len(data) < self.HEADER_SIZE:
+            return None
+        magic, cached_digest, size = struct.unpack_from(self.HEADER_FORMAT, data)
+        if magic != self.MAGIC or cached_digest != digest:
+            return None
+        if len(data) != self.HEADER_SIZE + size:
+            return None
+
+        try:
+            return self.unpack(memoryview(data), self.HEADER_SIZE)
+        except (ValueError, IndexError):
+            return None
+
+    @staticmethod
+    def unpack(data, offset):
+        settings = {}
+        count, offset = decode_value(data, offset)
+        for _ in range(count):
+            name, offset = decode_value(data, offset)
+            settings[name], offset = decode_value(data, offset)
+
+        tasks = []
+        count, offset = decode_value(data, offset)
+        for _ in range(count):
+            customer_id, project_id, size = struct.unpack_from(
+                ConfigCache.TASK_FORMAT, data, offset
+            )
+            offset += ConfigCache.TASK_SIZE
+            name = str(data[offset : offset + size], "utf-8")
+            offset += size
+            tasks.append(ClockodoTask(name, project_id or None, customer_id or None))
+        return settings, tasks
+
+    def save(self, digest, settings, tasks):
+        """
+        Raises TypeError for settings of other types and OverflowError for
+        numbers or names too large for the snapshot, neither is cached.
+        """
+        values = bytearray()
+        encode_value(values, len(settings))
+        for name, value in settings.items():
+            encode_value(values, name)
+            encode_value(values, value)
+        encode_value(values, len(tasks))
+        for task in tasks:
+            name = task.name.encode()
+            customer_id = task.customer_id or 0
+            project_id = task.project_id or 0
+            try:
+                values.extend(
+                    struct.pack(self.TASK_FORMAT, customer_id, project_id, len(name))
+                )
+            except struct.error:
+                raise OverflowError(f"cannot cache task {task.name}")
+            values.extend(name)
+
+        with AtomicFile(self.filename) as file:
+            file.write(struct.pack(self.HEADER_FORMAT, self.MAGIC, digest, len(values)))
+            file.write(values)
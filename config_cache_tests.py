@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+from config_cache import ConfigCache
+from models import ClockodoTask
+
+SETTINGS = {
+    "api_key": "key",
+    "service_id": 1000,
+    "wifi_essid": "Café",
+    "wifi_password": None,
+    "sync_tasks": False,
+    "task_max_age_hours": 0.5,
+}
+
+
+class TestConfigCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ConfigCache(os.path.join(self.directory.name, "config.bin"))
+        self.digest = ConfigCache.digest(b'{"api_key": "key"}')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_loads_the_saved_settings_and_tasks(self):
+        tasks = [
+            ClockodoTask("Development", customer_id=2000, project_id=3000),
+            ClockodoTask("Support", customer_id=2001),
+        ]
+        self.cache.save(self.digest, SETTINGS, tasks)
+
+        settings, loaded = self.cache.load(self.digest)
+
+        assert settings == SETTINGS
+        assert [(t.name, t.customer_id, t.project_id) for t in loaded] == [
+            ("Development", 2000, 3000),
+            ("Support", 2001, None),
+        ]
+
+    def test_a_changed_config_json_is_not_loaded_from_the_cache(self):
+        self.cache.save(self.digest, SETTINGS, [])
+
+        assert self.cache.load(ConfigCache.digest(b"{}")) is None
+
+    def test_a_snapshot_of_other_settings_is_not_loaded(self):
+        source = b'{"api_key": "key"}'
+        digest = ConfigCache.digest(source, ["api_key", "service_id"])
+        self.cache.save(digest, SETTINGS, [])
+
+        assert self.cache.load(ConfigCache.digest(source, ["api_key"])) is None
+        assert self.cache.load(ConfigCache.digest(source, ["service_id", "api_key"]))
+
+    def test_a_missing_or_truncated_snapshot_is_not_loaded(self):
+        assert self.cache.load(self.digest) is None
+
+        self.cache.save(self.digest, SETTINGS, [])
+        with open(self.cache.filename, "r+b") as file:
+            file.truncate(os.path.getsize(self.cache.filename) - 1)
+        assert self.cache.load(self.digest) is None
+
+    def test_settings_of_other_types_are_not_cached(self):
+        with self.assertRaises(TypeError):
+            self.cache.save(self.digest, {"tasks": []}, [])
+
+    def test_numbers_out_of_range_are_not_cached(self):
+        with self.assertRaises(OverflowError):
+            self.cache.save(self.digest, {"service_id": 2**31}, [])
+        with self.assertRaises(OverflowError):
+            self.cache.save(self.digest, {}, [ClockodoTask("Support", None, -1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+class Debouncer:
+    """
+    Turns the edges of a bouncing push button into presses.
+
+    The pin IRQ only hands the level and time of each edge to `edge`, which
+    stores a few integers and allocates nothing. `poll` decides once the pin
+    has been quiet for `settle_ms`: a pin resting low is a press, and so is a
+    pin which went low and back up between two polls if it stayed down for at
+    least `min_press_ms`, so a short tap is not lost. Bursts shorter than that
+    are noise.
+
+    A press less than `repeat_ms` after the one before is flagged as a repeat,
+    which the caller may treat as an impatient double press.
+
+    Times are ticks in ms, `diff` is ticks_diff on the device.
+    """
+
+    def __init__(
+        self, settle_ms=20, min_press_ms=None, repeat_ms=400, diff=lambda a, b: a - b
+    ):
+        self.settle_ms = settle_ms
+        self.min_press_ms = settle_ms if min_press_ms is None else min_press_ms
+        self.repeat_ms = repeat_ms
+        self.diff = diff
+        self.pressed = False
+        self.edge_at = None
+        # first falling edge since the last poll while released, last rise
+        self.fell_at = None
+        self.rose_at = None
+        self.pressed_at = None
+        self.repeat = False
+
+    def edge(self, level, at):
+        # called from the pin IRQ, must not allocate
+        self.edge_at = at
+        if level:
+            self.rose_at = at
+        elif self.fell_at is None and not self.pressed:
+            self.fell_at = at
+
+    def settled(self, now):
+        return self.edge_at is None or self.diff(now, self.edge_at) >= self.settle_ms
+
+    def poll(self, level, now):
+        """
+        Whether the pin was pressed, None while it is still bouncing. A press
+        is reported once, `pressed_at` is the time of its first falling edge.
+        """
+        if not self.settled(now):
+            return None
+
+        if self.pressed:
+            if level:
+                self.pressed = False
+                self.fell_at = None
+            return False
+
+        fell_at = self.fell_at
+        if fell_at is None:
+            return False
+        if level:
+            # released again before this poll
+            self.fell_at = None
+            held_ms = self.rose_at is not None and self.diff(self.rose_at, fell_at)
+            if not held_ms or held_ms < self.min_press_ms:
+                return False
+        else:
+            self.pressed = True
+
+        self.repeat = (
+            self.pressed_at is not None
+            and self.diff(fell_at, self.pressed_at) < self.repeat_ms
+        )
+        self.pressed_at = fell_at
+        return True
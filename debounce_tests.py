@@ -0,0 +1,67 @@
+import unittest
+from debounce import Debouncer
+
+
+def replay(debouncer, script, poll_every_ms=20, end_ms=1000):
+    """
+    Feeds (at, level) pin changes to the debouncer like the IRQ and polls it
+    like the button task, returns the reported presses as (pressed_at, repeat).
+    """
+    presses = []
+    changes = list(script)
+    level = 1
+    for now in range(0, end_ms, poll_every_ms):
+        while changes and changes[0][0] <= now:
+            at, level = changes.pop(0)
+            debouncer.edge(level, at)
+        if debouncer.poll(level, now):
+            presses.append((debouncer.pressed_at, debouncer.repeat))
+    return presses
+
+
+def bouncing(at, level, bounces=4, gap_ms=1):
+    # the contact chatters for a few ms before it rests at `level`
+    script = []
+    for i in range(bounces):
+        script.append((at + 2 * i * gap_ms, level))
+        script.append((at + (2 * i + 1) * gap_ms, 1 - level))
+    script.append((at + 2 * bounces * gap_ms, level))
+    return script
+
+
+class TestDebouncer(unittest.TestCase):
+    def test_a_bouncing_press_and_release_is_one_press(self):
+        script = bouncing(100, 0) + bouncing(300, 1)
+
+        assert replay(Debouncer(), script) == [(100, False)]
+
+    def test_a_tap_between_two_polls_is_not_lost(self):
+        script = [(105, 0), (131, 1)]
+
+        assert replay(Debouncer(), script, poll_every_ms=50) == [(105, False)]
+
+    def test_a_glitch_shorter_than_a_press_is_ignored(self):
+        script = [(105, 0), (108, 1)]
+
+        assert replay(Debouncer(), script, poll_every_ms=50) == []
+
+    def test_a_quick_second_press_is_flagged_as_a_repeat(self):
+        script = bouncing(100, 0) + bouncing(200, 1) + bouncing(300, 0)
+        script += bouncing(400, 1) + bouncing(900, 0)
+
+        assert replay(Debouncer(repeat_ms=400), script, end_ms=1200) == [
+            (100, False),
+            (300, True),
+            (900, False),
+        ]
+
+    def test_uses_the_given_tick_difference(self):
+        debouncer = Debouncer(diff=lambda a, b: (a - b) % 1000)
+        debouncer.edge(0, 990)
+
+        assert debouncer.poll(0, 5) is None
+        assert debouncer.poll(0, 10) is True
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,20 +3,46 @@
 set -euo pipefail
 IFS=$'\n\t'
 
-files=("config.json" "main.py" "render_helpers.py" "models.py" "ssd1306.py")
+files=("config.json" "main.py" "atomic_file.py" "boot_profile.py" "clock_poll.py" "clock_sync.py" "config_cache.py" "debounce.py" "render_helpers.py" "widgets.py" "text_cache.py" "events.py" "json_stream.py" "http_client.py" "journal.py" "knob_filter.py" "metrics.py" "power.py" "task_sync.py" "tracing.py" "models.py" "wifi_cache.py" "ssd1306.py")
+build_dir="build"
+mpy=false
+
+if [[ "${1:-}" == "--mpy" ]]; then
+  mpy=true
+  shift
+fi
+
 port=${1:-}
 
 if [[ -z "$port" ]]; then
   echo "Please specify port as first argument (e.g. /dev/ttyUSB0)"
+  echo "Use --mpy before the port to copy precompiled bytecode (needs mpy-cross)"
   exit 1
 fi
 
+mkdir -p "$build_dir"
+
 for file in "${files[@]}"; do
-  if [[ -e $file ]]; then
+  if [[ ! -e $file ]]; then
+    echo "$file not found"
+  elif [[ $mpy == true && $file == *.py ]]; then
+    # the device only runs main.py from source, so the application is compiled
+    # as app.mpy and started by a main.py importing it
+    module=${file%.py}
+    if [[ $file == "main.py" ]]; then
+      module="app"
+      echo "import app" > "$build_dir/main.py"
+      ampy --port $port put "$build_dir/main.py" main.py
+    else
+      # a .py file on the device would be imported instead of the .mpy
+      ampy --port $port rm $file 2>/dev/null || true
+    fi
+
+    mpy-cross -o "$build_dir/$module.mpy" $file
+    ampy --port $port put "$build_dir/$module.mpy" "$module.mpy"
+    echo "$file compiled and copied to device at $port as $module.mpy"
+  else
     ampy --port $port put $file
     echo "$file copied to device at $port"
-  else
-    echo "$file not found"
   fi
 done
-
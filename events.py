@@ -0,0 +1,37 @@
+import asyncio
+
+
+class EventQueue:
+    """Events from input tasks, consumed in order by a single task."""
+
+    def __init__(self, size=16):
+        self.size = size
+        self.events = []
+        self.available = asyncio.Event()
+
+    def put(self, kind, value=None, replace=False):
+        """
+        Returns whether the event was queued, it is dropped while the queue is
+        full so that a stalled consumer cannot take the input tasks down.
+        """
+        # With replace, a queued event of the same kind which has not been
+        # consumed yet takes the new value instead of queueing another one.
+        if replace and self.events and self.events[-1][0] == kind:
+            self.events[-1] = (kind, value)
+        elif len(self.events) < self.size:
+            self.events.append((kind, value))
+        else:
+            return False
+
+        self.available.set()
+        return True
+
+    def pending(self):
+        return len(self.events)
+
+    async def get(self):
+        while not self.events:
+            self.available.clear()
+            await self.available.wait()
+
+        return self.events.pop(0)
@@ -0,0 +1,52 @@
+import asyncio
+import unittest
+from events import EventQueue
+
+
+class TestEventQueue(unittest.TestCase):
+    def test_get_returns_events_in_order(self):
+        queue = EventQueue()
+        queue.put("KNOB_TURN", 1)
+        queue.put("BUTTON_PUSH")
+
+        async def consume():
+            return [await queue.get(), await queue.get()]
+
+        assert asyncio.run(consume()) == [("KNOB_TURN", 1), ("BUTTON_PUSH", None)]
+
+    def test_put_with_replace_updates_the_last_event_of_the_same_kind(self):
+        queue = EventQueue()
+        queue.put("KNOB_TURN", 1, replace=True)
+        queue.put("KNOB_TURN", 2, replace=True)
+        queue.put("BUTTON_PUSH")
+        queue.put("KNOB_TURN", 3, replace=True)
+
+        assert queue.events == [
+            ("KNOB_TURN", 2),
+            ("BUTTON_PUSH", None),
+            ("KNOB_TURN", 3),
+        ]
+
+    def test_put_drops_new_events_while_the_queue_is_full(self):
+        queue = EventQueue(size=1)
+
+        assert queue.put("BUTTON_PUSH")
+        assert not queue.put("BUTTON_PUSH", 2)
+        assert queue.events == [("BUTTON_PUSH", None)]
+
+    def test_get_waits_for_the_next_event(self):
+        queue = EventQueue()
+
+        async def produce_later():
+            await asyncio.sleep(0)
+            queue.put("BUTTON_PUSH")
+
+        async def consume():
+            asyncio.create_task(produce_later())
+            return await queue.get()
+
+        assert asyncio.run(consume()) == ("BUTTON_PUSH", None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,496 @@
+"""
+Scripted scenarios run in the simulator, measuring per scenario:
+
+- frame ms: mean and maximum time of Display.render on this host
+- i2c bytes/frame: bytes sent to the display per rendered frame
+- http/action: requests sent to the API per knob turn or button push
+- alloc bytes/frame: peak bytes allocated while rendering a frame
+
+and per API response the peak bytes allocated while reading and decoding it,
+as a whole with json() and streamed with only the needed paths extracted,
+and per synthetic task table the RAM it takes as ClockodoTask objects and as
+a packed TaskTable on flash, the time to look a task up in the table as
+restoring the timer does (and with a linear scan over the objects) and to
+render the task list from the table, and per synthetic config.json the time
+and peak heap of loading it by parsing the JSON and from the binary snapshot
+(only kept for a config.json of ConfigCache.MIN_SOURCE_BYTES or more), and
+the time Wifi.connect takes without (cold) and with (warm) the cached
+access point and lease, with DHCP and with a static IP. Connect times follow
+the delays modelled by the fake network, a twentieth of those of an ESP32.
+The time of an API request through the Session on its kept-alive connection
+and on a fresh connection each time is taken against FakeClockodo on this
+host, which speaks plain HTTP: the TLS handshake a fresh connection to the
+real API adds is not part of it.
+The cost of recording a metric, with the metrics turned on and off, is
+measured too.
+
+    python3 host/benchmark.py           print the results
+    python3 host/benchmark.py --write   and update benchmark_results.txt
+
+Commit the updated results together with changes that affect them, so the
+difference shows up in review. Frame times depend on the host and are only
+comparable between runs on the same machine.
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from simulator import DEFAULT_CONFIG, HOST_DIR, Simulator
+
+from config_cache import ConfigCache  # noqa: E402
+from fake_clockodo import FakeClockodo  # noqa: E402
+from http_client import READ_SIZE, Session  # noqa: E402
+from json_stream import JsonExtractor  # noqa: E402
+from metrics import MetricsRegistry  # noqa: E402
+from models import ClockodoTask  # noqa: E402
+from network import DHCP_CONFIG  # noqa: E402
+from task_sync import MergedTasks, TaskTable  # noqa: E402
+from widgets import TaskList  # noqa: E402
+
+RESULTS_FILENAME = os.path.join(HOST_DIR, "benchmark_results.txt")
+
+
+class Meter:
+    def __init__(self, simulator):
+        self.simulator = simulator
+        self.reset()
+
+        render = simulator.app.Display.render
+
+        def measured_render():
+            i2c_bytes = simulator.i2c_bytes
+            tracemalloc.reset_peak()
+            allocated = tracemalloc.get_traced_memory()[0]
+            started_at = time.perf_counter()
+            render()
+            self.frame_ms.append((time.perf_counter() - started_at) * 1000)
+            peak = tracemalloc.get_traced_memory()[1]
+            self.frame_allocations.append(peak - allocated)
+            self.frame_bytes.append(simulator.i2c_bytes - i2c_bytes)
+
+        simulator.app.Display.render = measured_render
+
+    def reset(self):
+        self.frame_ms = []
+        self.frame_bytes = []
+        self.frame_allocations = []
+        self.calls_before = len(self.simulator.api.calls)
+        self.actions = 0
+
+    def result(self):
+        frames = len(self.frame_ms) or 1
+        calls = len(self.simulator.api.calls) - self.calls_before
+        return {
+            "frames": len(self.frame_ms),
+            "frame ms": sum(self.frame_ms) / frames,
+            "max frame ms": max(self.frame_ms, default=0),
+            "i2c bytes/frame": sum(self.frame_bytes) / frames,
+            # requests made without any action, e.g. when booting, count fully
+            "http/action": calls / (self.actions or 1),
+            "alloc bytes/frame": sum(self.frame_allocations) / frames,
+        }
+
+
+async def boot(simulator, meter):
+    await simulator.wait_until_booted()
+    meter.actions = 1
+
+
+async def browse(simulator, meter):
+    await simulator.wait_until_booted()
+    meter.reset()
+    for index in (1, 2, 3, 4, 3, 2, 1, 0) * 2:
+        await simulator.turn_knob(index)
+        await asyncio.sleep(0.05)
+        meter.actions += 1
+
+
+async def start_stop(simulator, meter):
+    await simulator.wait_until_booted()
+    await simulator.turn_knob(1)
+    meter.reset()
+    for _ in range(2):
+        await simulator.push_button()
+        await simulator.wait_until_synced()
+        meter.actions += 1
+
+
+async def running_timer(simulator, meter):
+    await simulator.wait_until_booted()
+    await simulator.turn_knob(1)
+    await simulator.push_button()
+    await simulator.wait_until_synced()
+    meter.reset()
+    await asyncio.sleep(3)
+
+
+async def scrolling(simulator, meter):
+    await simulator.wait_until_booted()
+    await simulator.turn_knob(3)
+    meter.reset()
+    await asyncio.sleep(3)
+
+
+async def offline_start(simulator, meter):
+    await simulator.wait_until_booted()
+    await simulator.turn_knob(1)
+    simulator.app.ClockodoRequest.RETRY_MS = 100
+    meter.reset()
+
+    simulator.api.fail_status = 503
+    await simulator.push_button()
+    meter.actions += 1
+    await asyncio.sleep(0.5)
+    simulator.api.fail_status = None
+    await simulator.wait_until_synced()
+
+
+async def impatient_pushes(simulator, meter):
+    await simulator.wait_until_booted()
+    await simulator.turn_knob(1)
+    simulator.api.delay = 1.5
+    meter.reset()
+
+    # a bouncing double push to start, then a stop and a start again while
+    # the start is still being sent
+    await simulator.push_button(bounces=5)
+    await simulator.push_button(bounces=5)
+    for _ in range(2):
+        await asyncio.sleep(0.3)
+        await simulator.push_button(bounces=5)
+    meter.actions += 4
+    await simulator.wait_until_synced()
+
+
+SCENARIOS = (
+    boot,
+    browse,
+    start_stop,
+    running_timer,
+    scrolling,
+    offline_start,
+    impatient_pushes,
+)
+
+
+def run_scenario(scenario):
+    async def script(simulator):
+        meter = Meter(simulator)
+        await scenario(simulator, meter)
+        return meter.result()
+
+    # the firmware prints its boot profile and latencies
+    with contextlib.redirect_stdout(io.StringIO()):
+        return asyncio.run(Simulator().run(script))
+
+
+# the fields of a time entry as the Clockodo API returns them
+ENTRY = {
+    "id": 123456,
+    "customers_id": 2000,
+    "projects_id": 3000,
+    "users_id": 42,
+    "billable": 1,
+    "texts_id": None,
+    "text": "Working on the firmware of the time tracking device",
+    "time_since": "2024-01-01T08:00:00Z",
+    "time_until": None,
+    "time_insert": "2024-01-01T08:00:01Z",
+    "time_last_change": "2024-01-01T08:00:01Z",
+    "test_data": False,
+    "type": 1,
+    "services_id": 1000,
+    "lumpsum_services_id": None,
+    "hourly_rate": 95.0,
+    "duration": None,
+    "offset": 0,
+    "clocked": True,
+    "clocked_offline": False,
+    "time_last_change_work_time": "2024-01-01T08:00:01Z",
+    "time_clocked_since": "2024-01-01T08:00:00Z",
+}
+CUSTOMER = {"id": 2000, "name": "ACME Corporation", "number": "C-2000", "active": True}
+
+RESPONSES = {
+    "clock": (
+        {"running": ENTRY, "current_time": "2024-01-01T09:00:00Z"},
+        ["running.id", "running.customers_id", "running.time_since"],
+    ),
+    "entries (20)": (
+        {"paging": {"count_pages": 1}, "entries": [ENTRY] * 20},
+        ["entries.*.customers_id", "entries.*.time_since"],
+    ),
+    "customers (50)": (
+        {"paging": {"count_pages": 4}, "customers": [CUSTOMER] * 50},
+        ["paging.count_pages", "customers.*.id", "customers.*.name"],
+    ),
+}
+
+
+def peak_bytes(function):
+    tracemalloc.reset_peak()
+    allocated = tracemalloc.get_traced_memory()[0]
+    function()
+    return tracemalloc.get_traced_memory()[1] - allocated
+
+
+def measure_response(document, paths):
+    data = json.dumps(document).encode()
+    chunks = [
+        data[start : start + READ_SIZE] for start in range(0, len(data), READ_SIZE)
+    ]
+
+    def read_whole():
+        json.loads(b"".join(chunks))
+
+    def read_streamed():
+        extractor = JsonExtractor(paths)
+        for chunk in chunks:
+            extractor.feed(chunk)
+        extractor.finish()
+
+    return {
+        "body bytes": len(data),
+        "json() peak": peak_bytes(read_whole),
+        "streamed peak": peak_bytes(read_streamed),
+    }
+
+
+TASK_COUNTS = (10, 100, 1000, 5000)
+
+
+class NullCanvas:
+    def fill_rect(self, x, y, width, height, color):
+        pass
+
+    def text(self, text, x, y):
+        pass
+
+    def hline(self, x, y, width, color):
+        pass
+
+
+def mean_us(function, repeat):
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started_at) / repeat * 1000000
+
+
+def traced_bytes(function):
+    # bytes still allocated by what `function` returns
+    allocated = tracemalloc.get_traced_memory()[0]
+    kept = function()
+    return tracemalloc.get_traced_memory()[0] - allocated, kept
+
+
+def synthetic_tasks(count):
+    return [
+        ClockodoTask(f"Customer {i:05d}: Project", customer_id=i, project_id=i + 1)
+        for i in range(count)
+    ]
+
+
+def measure_task_memory(directory, count):
+    objects_bytes, _ = traced_bytes(lambda: synthetic_tasks(count))
+
+    filename = os.path.join(directory, f"tasks-{count}.bin")
+    TaskTable(filename).save(synthetic_tasks(count), 0, "benchmark")
+
+    def load_and_show():
+        table = TaskTable(filename)
+        table.load()
+        tasks = MergedTasks([], table)
+        for i in range(min(count, 8)):
+            tasks[i]
+        return table
+
+    table_bytes, table = traced_bytes(load_and_show)
+    table.close()
+    return {"objects bytes": objects_bytes, "table bytes": table_bytes}
+
+
+def measure_task_speed(directory, count):
+    tasks = synthetic_tasks(count)
+    customer_id, project_id = count - 1, count
+
+    def scan():
+        for task in tasks:
+            if task.customer_id == customer_id and task.project_id == project_id:
+                return task
+
+    table = TaskTable(os.path.join(directory, f"tasks-{count}.bin"))
+    table.load()
+    task_list = TaskList(3)
+    task_list.set_tasks(MergedTasks([], table))
+    canvas = NullCanvas()
+
+    def render():
+        task_list.update(count - 2)
+        task_list.invalidate()
+        task_list.render(canvas)
+
+    result = {
+        "lookup us": mean_us(lambda: table.find(customer_id, project_id), 1000),
+        "scan us": mean_us(scan, 10),
+        "render us": mean_us(render, 100),
+    }
+    table.close()
+    return result
+
+
+CONFIG_TASK_COUNTS = (5, 100, 500)
+
+
+def measure_config(directory, count):
+    tasks = [
+        {"name": f"Task {i:05d}", "customer_id": i, "project_id": i + 1}
+        for i in range(count)
+    ]
+    source = json.dumps(dict(DEFAULT_CONFIG, tasks=tasks)).encode()
+    cache = ConfigCache(os.path.join(directory, f"config-{count}.bin"))
+    settings = {name: DEFAULT_CONFIG.get(name) for name in ("api_key", "api_user")}
+
+    # both as Config.load does them, hashing config.json included
+    def load_json():
+        ConfigCache.digest(source, settings)
+        config_dict = json.loads(source)
+        return [ClockodoTask.from_dict(task) for task in config_dict["tasks"]]
+
+    def load_cache():
+        return cache.load(ConfigCache.digest(source, settings))
+
+    cache.save(ConfigCache.digest(source, settings), settings, load_json())
+
+    tracemalloc.start()
+    json_peak = peak_bytes(load_json)
+    cache_peak = peak_bytes(load_cache)
+    tracemalloc.stop()
+    return {
+        "json ms": mean_us(load_json, 20) / 1000,
+        "cache ms": mean_us(load_cache, 20) / 1000,
+        "json peak": json_peak,
+        "cache peak": cache_peak,
+    }
+
+
+def measure_metrics(enabled):
+    registry = MetricsRegistry(enabled)
+    counter = registry.counter("failures")
+    histogram = registry.histogram("frame ms", (5, 10, 20, 50, 100, 200))
+    return {
+        "counter us": mean_us(counter.add, 10000),
+        "histogram us": mean_us(lambda: histogram.record(37), 10000),
+    }
+
+
+async def wifi_connects(simulator):
+    await simulator.wait_until_booted()
+    wifi = simulator.app.Wifi
+    results = {}
+    for name, static_ip in (("dhcp", None), ("static ip", DHCP_CONFIG)):
+        wifi.static_ip = static_ip
+        wifi.cache.clear()
+        result = results[name] = {}
+        for kind in ("cold ms", "warm ms"):
+            wifi.station_interface.disconnect()
+            await wifi.connect()
+            result[kind] = wifi.connect_ms
+    return results
+
+
+def measure_wifi():
+    with contextlib.redirect_stdout(io.StringIO()):
+        return asyncio.run(Simulator().run(wifi_connects))
+
+
+async def session_requests(repeat):
+    api = await FakeClockodo().start()
+    session = Session(api.url, {"X-ClockodoApiKey": "benchmark"})
+    result = {}
+    try:
+        for kind, fresh in (("reused ms", False), ("fresh ms", True)):
+            started_at = time.perf_counter()
+            for _ in range(repeat):
+                if fresh:
+                    await session.close()
+                await session.request("GET", "clock", paths=("running",))
+            result[kind] = (time.perf_counter() - started_at) / repeat * 1000
+        await session.close()
+        result["connections"] = session.connections
+    finally:
+        await api.stop()
+    return result
+
+
+def measure_session(repeat=200):
+    return {"clock": asyncio.run(session_requests(repeat))}
+
+
+def format_results(results, title="scenario"):
+    columns = list(next(iter(results.values())))
+    lines = [title.ljust(16) + "".join(column.rjust(19) for column in columns)]
+    for name, result in results.items():
+        cells = "".join(
+            f"{value:19d}" if isinstance(value, int) else f"{value:19.1f}"
+            for value in result.values()
+        )
+        lines.append(name.ljust(16) + cells)
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    tracemalloc.start()
+    results = {}
+    for scenario in SCENARIOS:
+        results[scenario.__name__] = run_scenario(scenario)
+
+    wifi = measure_wifi()
+    responses = {
+        name: measure_response(document, paths)
+        for name, (document, paths) in RESPONSES.items()
+    }
+
+    task_tables = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for count in TASK_COUNTS:
+            task_tables[f"{count} tasks"] = measure_task_memory(directory, count)
+        # timed without the overhead of tracing allocations
+        tracemalloc.stop()
+        for count in TASK_COUNTS:
+            task_tables[f"{count} tasks"].update(measure_task_speed(directory, count))
+
+        configs = {
+            f"{count} tasks": measure_config(directory, count)
+            for count in CONFIG_TASK_COUNTS
+        }
+
+    # timed after tracing allocations stopped
+    session = measure_session()
+    metrics = {"on": measure_metrics(True), "off": measure_metrics(False)}
+
+    text = "\n".join(
+        (
+            format_results(results),
+            format_results(responses, "response"),
+            format_results(task_tables, "task table"),
+            format_results(configs, "config.json"),
+            format_results(wifi, "wifi"),
+            format_results(session, "api request"),
+            format_results(metrics, "metrics"),
+        )
+    )
+    print(text, end="")
+    if "--write" in sys.argv:
+        with open(RESULTS_FILENAME, "w") as file:
+            file.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import asyncio
+import json
+import zlib
+from email.utils import formatdate
+
+
+class FakeClockodo:
+    """
+    A local stand-in for the parts of the Clockodo API the firmware uses,
+    speaking plain HTTP/1.1 with keep-alive.
+
+    `calls` records every (method, path), `fail_status` makes every request
+    fail with that status and `delay` slows down every response. `customers`
+    and `projects` are listed `items_per_page` at a time. GET responses carry
+    an ETag and are answered with 304 when If-None-Match still matches, unless
+    `etags` is turned off.
+    """
+
+    def __init__(self):
+        self.running = None
+        self.entries = []
+        self.customers = []
+        self.projects = []
+        self.items_per_page = 50
+        self.next_id = 1
+        self.calls = []
+        self.connections = 0
+        self.fail_status = None
+        self.delay = 0
+        self.etags = True
+        self.server = None
+        self.url = None
+        self.handlers = set()
+        self.writers = set()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/api/v2"
+        return self
+
+    async def stop(self):
+        self.server.close()
+        # closing the connections lets the handlers finish on their own
+        for writer in list(self.writers):
+            writer.close()
+        while self.writers:
+            await asyncio.sleep(0.01)
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        self.handlers.add(asyncio.current_task())
+        self.writers.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                method, path, _ = request_line.decode().split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b""):
+                        break
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                body = await reader.readexactly(length)
+
+                self.calls.append((method, path))
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+
+                status, payload = self.route(method, path, body)
+                close = headers.get("connection", "").lower() == "close"
+                data = json.dumps(payload).encode()
+                etag = None
+                if self.etags and method == "GET" and status == 200:
+                    etag = '"%08x"' % zlib.crc32(data)
+                    if headers.get("if-none-match") == etag:
+                        status, data = 304, b""
+                writer.write(self.encode_response(status, data, close, etag))
+                await writer.drain()
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.handlers.discard(asyncio.current_task())
+            self.writers.discard(writer)
+            writer.close()
+
+    @staticmethod
+    def encode_response(status, data, close, etag=None):
+        head = f"HTTP/1.1 {status} X\r\nDate: {formatdate(usegmt=True)}\r\n"
+        if status != 304:
+            head += (
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n"
+            )
+        if etag is not None:
+            head += f"ETag: {etag}\r\n"
+        if close:
+            head += "Connection: close\r\n"
+        return (head + "\r\n").encode() + data
+
+    def route(self, method, path, body):
+        if self.fail_status is not None:
+            return self.fail_status, {"error": {"message": "failing on purpose"}}
+
+        path = path.split("/api/v2/", 1)[-1]
+        name, _, query = path.partition("?")
+        data = json.loads(body) if body else {}
+
+        if name == "clock" and method == "GET":
+            return 200, {"running": self.running}
+        elif name == "clock" and method == "POST":
+            return self.start_clock(data)
+        elif name.startswith("clock/") and method == "DELETE":
+            return self.stop_clock(int(name.split("/")[1]))
+        elif name == "entries" and method == "POST":
+            entry = dict(data, id=self.new_id())
+            self.entries.append(entry)
+            return 200, {"entry": entry}
+        elif name == "entries" and method == "GET":
+            return 200, {"entries": self.entries}
+        elif name.startswith("entries/") and method == "PUT":
+            return 200, {"entry": data}
+        elif name in ("customers", "projects") and method == "GET":
+            return self.list_page(name, query)
+        elif name.startswith(("customers/", "projects/")) and method == "GET":
+            return self.find_item(*name.split("/"))
+        return 404, {"error": {"message": "not found"}}
+
+    def list_page(self, name, query):
+        parameters = dict(part.partition("=")[::2] for part in query.split("&"))
+        page = int(parameters.get("page", 1))
+        items = getattr(self, name)
+        count_pages = max(1, -(-len(items) // self.items_per_page))
+        start = (page - 1) * self.items_per_page
+        paging = {
+            "items_per_page": self.items_per_page,
+            "current_page": page,
+            "count_pages": count_pages,
+            "count_items": len(items),
+        }
+        return 200, {"paging": paging, name: items[start : start + self.items_per_page]}
+
+    def find_item(self, name, item_id):
+        for item in getattr(self, name):
+            if item["id"] == int(item_id):
+                # {"customer": ...} for customers/<id>
+                return 200, {name[:-1]: item}
+        return 404, {"error": {"message": "not found"}}
+
+    def new_id(self):
+        entry_id = self.next_id
+        self.next_id += 1
+        return entry_id
+
+    def start_clock(self, data):
+        if self.running is not None:
+            return 400, {"error": {"message": "clock already running"}}
+
+        self.running = {
+            "id": self.new_id(),
+            "customers_id": data["customers_id"],
+            "projects_id": data.get("projects_id"),
+            "services_id": data["services_id"],
+            "time_since": data["time_since"],
+        }
+        return 200, {"running": self.running}
+
+    def stop_clock(self, entry_id):
+        if self.running is None or self.running["id"] != entry_id:
+            return 404, {"error": {"message": "no running clock"}}
+
+        stopped = self.running
+        self.running = None
+        self.entries.append(stopped)
+        return 200, {"stopped": stopped, "running": None}
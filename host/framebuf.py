@@ -0,0 +1,136 @@
+MONO_VLSB = 0
+MONO_HLSB = 3
+MONO_HMSB = 4
+
+
+class FrameBuffer:
+    """
+    The parts of MicroPython's FrameBuffer used by the firmware, MONO_VLSB only.
+
+    `text` does not use the real 8x8 font: every character gets a distinct,
+    deterministic 7x7 pattern, so the bytes sent to the display still change
+    whenever the text changes.
+    """
+
+    def __init__(self, buffer, width, height, format, stride=None):
+        if format != MONO_VLSB:
+            raise ValueError("only MONO_VLSB is supported")
+        self.fb_buffer = buffer
+        self.fb_width = width
+        self.fb_height = height
+        self.fb_stride = width if stride is None else stride
+
+    def pixel(self, x, y, c=None):
+        if not (0 <= x < self.fb_width and 0 <= y < self.fb_height):
+            return None if c is not None else 0
+
+        index = (y >> 3) * self.fb_stride + x
+        bit = 1 << (y & 7)
+        if c is None:
+            return 1 if self.fb_buffer[index] & bit else 0
+        elif c:
+            self.fb_buffer[index] |= bit
+        else:
+            self.fb_buffer[index] &= ~bit & 0xFF
+
+    def fill(self, c):
+        self.fill_rect(0, 0, self.fb_width, self.fb_height, c)
+
+    def fill_rect(self, x, y, w, h, c):
+        x0 = max(x, 0)
+        x1 = min(x + w, self.fb_width)
+        y0 = max(y, 0)
+        y1 = min(y + h, self.fb_height)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        buffer = self.fb_buffer
+        for page in range(y0 >> 3, ((y1 - 1) >> 3) + 1):
+            # bits of this page covered by the rectangle
+            top = max(y0 - page * 8, 0)
+            bottom = min(y1 - page * 8, 8)
+            mask = ((1 << bottom) - 1) & ~((1 << top) - 1)
+            start = page * self.fb_stride
+            for i in range(start + x0, start + x1):
+                if c:
+                    buffer[i] |= mask
+                else:
+                    buffer[i] &= ~mask & 0xFF
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+            return
+
+        self.hline(x, y, w, c)
+        self.hline(x, y + h - 1, w, c)
+        self.vline(x, y, h, c)
+        self.vline(x + w - 1, y, h, c)
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def line(self, x1, y1, x2, y2, c):
+        steps = max(abs(x2 - x1), abs(y2 - y1), 1)
+        for i in range(steps + 1):
+            self.pixel(x1 + (x2 - x1) * i // steps, y1 + (y2 - y1) * i // steps, c)
+
+    def text(self, s, x, y, c=1):
+        for n, char in enumerate(s):
+            if char == " ":
+                continue
+
+            code = ord(char)
+            for column in range(7):
+                bits = (code * (column + 3)) & 0x7F | 0x01
+                for row in range(7):
+                    if bits & (1 << row):
+                        self.pixel(x + n * 8 + column, y + row, c)
+
+    def scroll(self, dx, dy):
+        copy = FrameBuffer(
+            bytearray(self.fb_buffer),
+            self.fb_width,
+            self.fb_height,
+            MONO_VLSB,
+            self.fb_stride,
+        )
+        self.fill(0)
+        self.blit(copy, dx, dy)
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        # whole pages are copied at once when they line up
+        pages = 0
+        if y & 7 == 0 and key == -1 and self.fb_height & 7 == 0:
+            pages = fbuf.fb_height >> 3
+            for page in range(pages):
+                target_page = (y >> 3) + page
+                if 0 <= target_page < self.fb_height >> 3:
+                    self.blit_page(fbuf, x, page, target_page)
+
+        for source_y in range(pages * 8, fbuf.fb_height):
+            target_y = y + source_y
+            if not 0 <= target_y < self.fb_height:
+                continue
+
+            for source_x in range(fbuf.fb_width):
+                target_x = x + source_x
+                if 0 <= target_x < self.fb_width:
+                    c = fbuf.pixel(source_x, source_y)
+                    if c != key:
+                        self.pixel(target_x, target_y, c)
+
+    def blit_page(self, fbuf, x, source_page, target_page):
+        x0 = max(x, 0)
+        x1 = min(x + fbuf.fb_width, self.fb_width)
+        if x0 >= x1:
+            return
+
+        source = source_page * fbuf.fb_stride - x
+        target = target_page * self.fb_stride
+        self.fb_buffer[target + x0 : target + x1] = fbuf.fb_buffer[
+            source + x0 : source + x1
+        ]
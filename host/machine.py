@@ -0,0 +1,178 @@
+import asyncio
+import time
+
+PWRON_RESET = 1
+HARD_RESET = 2
+WDT_RESET = 3
+DEEPSLEEP_RESET = 4
+SOFT_RESET = 5
+
+PIN_WAKE = EXT0_WAKE = 2
+TIMER_WAKE = 4
+
+
+class Pin:
+    """A pin whose level is set by the script, falling edges call the IRQ handler."""
+
+    IN = 1
+    OUT = 3
+    PULL_UP = 2
+    IRQ_FALLING = 2
+    IRQ_RISING = 1
+
+    def __init__(self, id, mode=None, pull=None, value=None):
+        self.id = id
+        self.level = 1 if value is None else value
+        self.handler = None
+        self.trigger = None
+
+    def init(self, mode=None, pull=None, value=None):
+        if value is not None:
+            self.level = value
+
+    def value(self, level=None):
+        if level is None:
+            return self.level
+
+        previous = self.level
+        self.level = level
+        if self.handler is None:
+            return
+        falling = previous == 1 and level == 0
+        rising = previous == 0 and level == 1
+        if (falling and self.trigger & Pin.IRQ_FALLING) or (
+            rising and self.trigger & Pin.IRQ_RISING
+        ):
+            self.handler(self)
+
+    def __call__(self, level=None):
+        return self.value(level)
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING):
+        self.handler = handler
+        self.trigger = trigger
+
+
+class ADC:
+    """Reads `ADC.reading`, which the script sets to turn the knob."""
+
+    ATTN_0DB = 0
+    ATTN_11DB = 3
+    reading = 0
+
+    def __init__(self, pin):
+        self.pin = pin
+
+    def atten(self, attenuation):
+        pass
+
+    def read(self):
+        return ADC.reading
+
+
+class SoftI2C:
+    """Counts the bytes written to each address instead of sending them."""
+
+    def __init__(self, scl=None, sda=None, freq=400000):
+        self.bytes_written = 0
+        self.transfers = 0
+
+    def writeto(self, addr, buf):
+        self.bytes_written += len(buf)
+        self.transfers += 1
+
+    def writevto(self, addr, bufs):
+        self.bytes_written += sum(len(buf) for buf in bufs)
+        self.transfers += 1
+
+
+I2C = SoftI2C
+
+
+class Timer:
+    """Calls back from the running asyncio loop, like a soft timer would."""
+
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1):
+        self.id = id
+        self.handle = None
+
+    def init(self, mode=PERIODIC, period=None, callback=None, freq=None):
+        self.deinit()
+        self.mode = mode
+        self.period = period if freq is None else 1000 // freq
+        self.callback = callback
+        self.schedule()
+
+    def schedule(self):
+        loop = asyncio.get_event_loop()
+        self.handle = loop.call_later(self.period / 1000, self.fire)
+
+    def fire(self):
+        if self.mode == Timer.PERIODIC:
+            self.schedule()
+        else:
+            self.handle = None
+        self.callback(self)
+
+    def deinit(self):
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+
+
+class RTC:
+    memory_data = b""
+
+    def memory(self, data=None):
+        if data is None:
+            return RTC.memory_data
+        RTC.memory_data = bytes(data)
+
+    # the host clock is already set, setting the time is only recorded
+    datetime_set = None
+
+    def datetime(self, datetime=None):
+        if datetime is None:
+            return time.gmtime()[:8]
+        RTC.datetime_set = tuple(datetime)
+
+
+# set by the script to simulate a reboot from deep sleep or a button wake
+state = {"reset_cause": PWRON_RESET, "wake_reason": TIMER_WAKE}
+
+
+def reset_cause():
+    return state["reset_cause"]
+
+
+def wake_reason():
+    return state["wake_reason"]
+
+
+def lightsleep(time_ms=None):
+    if time_ms is not None:
+        time.sleep(time_ms / 1000)
+
+
+class DeepSleep(SystemExit):
+    pass
+
+
+def deepsleep(time_ms=None):
+    # the firmware does not come back from deep sleep
+    raise DeepSleep(time_ms)
+
+
+def reset():
+    raise SystemExit("reset")
+
+
+def unique_id():
+    return b"\x24\x0a\xc4\x00\x00\x01"
+
+
+def freq(hz=None):
+    return 240000000
@@ -0,0 +1,252 @@
+"""
+Runs the firmware under CPython, with the MicroPython modules it imports
+replaced by the fakes in this directory and the Clockodo API by FakeClockodo.
+
+    python3 host/simulator.py [seconds]
+
+runs main() headless and prints the screen whenever it changes. Scripts use
+Simulator.run to turn the knob, push the button and look at the state.
+"""
+
+import asyncio
+import calendar
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from time import time as cpython_time
+
+HOST_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(HOST_DIR)
+# heap of an ESP32 running MicroPython, reported by gc.mem_free
+HEAP_BYTES = 110000
+
+sys.path[:0] = [HOST_DIR, ROOT_DIR]
+
+from fake_clockodo import FakeClockodo  # noqa: E402
+
+
+class ThreadSafeFlag:
+    def __init__(self):
+        self.event = asyncio.Event()
+
+    def set(self):
+        self.event.set()
+
+    def clear(self):
+        self.event.clear()
+
+    async def wait(self):
+        await self.event.wait()
+        self.event.clear()
+
+
+# time.monotonic() when the simulated device was powered on
+powered_on_at = time.monotonic()
+
+
+def uptime():
+    return time.monotonic() - powered_on_at
+
+
+def install():
+    """Adds the MicroPython specific parts of time, asyncio and gc."""
+    if hasattr(time, "ticks_ms"):
+        return
+
+    time.ticks_ms = lambda: int(uptime() * 1000)
+    time.ticks_us = lambda: int(uptime() * 1000000)
+    time.ticks_diff = lambda a, b: a - b
+    time.ticks_add = lambda a, b: a + b
+    time.sleep_ms = lambda ms: time.sleep(ms / 1000)
+    time.sleep_us = lambda us: time.sleep(us / 1000000)
+    # MicroPython's time is UTC in whole seconds
+    time.mktime = lambda t: calendar.timegm(tuple(t)[:6] + (0, 0, 0))
+    time.time = lambda: int(cpython_time())
+
+    asyncio.sleep_ms = lambda ms: asyncio.sleep(ms / 1000)
+    asyncio.ThreadSafeFlag = ThreadSafeFlag
+
+    gc.mem_alloc = lambda: tracemalloc.get_traced_memory()[0]
+    gc.mem_free = lambda: HEAP_BYTES - gc.mem_alloc()
+
+
+def unload():
+    # a fresh firmware, including the class level state of its modules
+    for name, module in list(sys.modules.items()):
+        filename = getattr(module, "__file__", None) or ""
+        fresh = filename.startswith(ROOT_DIR) and not filename.startswith(HOST_DIR)
+        fake = filename.startswith(HOST_DIR) and name in FAKE_MODULES
+        if fresh or fake or name == "main":
+            del sys.modules[name]
+
+
+FAKE_MODULES = ("esp32", "framebuf", "machine", "micropython", "network", "ntptime")
+
+DEFAULT_CONFIG = {
+    "wifi_essid": "essid",
+    "wifi_password": "password",
+    "api_key": "key",
+    "api_user": "user@example.com",
+    "service_id": 1000,
+    # scripts about the task sync turn it on
+    "sync_tasks": False,
+    "tasks": [
+        {"name": "Development", "customer_id": 2000, "project_id": 3000},
+        {"name": "Meetings", "customer_id": 2000, "project_id": 3001},
+        {"name": "Support", "customer_id": 2001},
+        {"name": "A task with a name too long for one line", "customer_id": 2002},
+        {"name": "Administration", "customer_id": 2003},
+    ],
+}
+
+
+class Simulator:
+    def __init__(self, config=None):
+        self.config = DEFAULT_CONFIG if config is None else config
+        self.api = FakeClockodo()
+        self.app = None
+        self.machine = None
+        self.directory = None
+
+    def load(self):
+        global powered_on_at
+
+        install()
+        unload()
+        powered_on_at = time.monotonic()
+        self.directory = tempfile.TemporaryDirectory()
+        os.chdir(self.directory.name)
+        with open("config.json", "w") as file:
+            json.dump(self.config, file)
+
+        filename = os.path.join(ROOT_DIR, "main.py")
+        with open(filename) as file:
+            source = file.read()
+
+        # main.py ends by running main(), which Simulator.run does instead
+        app = types.ModuleType("main")
+        app.__file__ = filename
+        started = []
+        asyncio_run = asyncio.run
+        asyncio.run = started.append
+        try:
+            exec(compile(source, filename, "exec"), app.__dict__)
+        finally:
+            asyncio.run = asyncio_run
+        for coroutine in started:
+            coroutine.close()
+
+        sys.modules["main"] = app
+        self.app = app
+        self.machine = sys.modules["machine"]
+
+    async def run(self, script):
+        """Runs main() until `script(simulator)` returns, returns its result."""
+        directory = os.getcwd()
+        await self.api.start()
+        try:
+            self.load()
+            self.app.ClockodoClient.BASE_URL = self.api.url
+            main_task = asyncio.create_task(self.app.main())
+            try:
+                return await script(self)
+            finally:
+                main_task.cancel()
+                try:
+                    await main_task
+                except (asyncio.CancelledError, SystemExit):
+                    pass
+                # the tasks main() created, the API keeps serving until stopped
+                running = asyncio.all_tasks() - self.api.handlers
+                for task in running - {asyncio.current_task()}:
+                    task.cancel()
+                session = self.app.ClockodoClient.session
+                if session is not None:
+                    await session.close()
+        finally:
+            await self.api.stop()
+            os.chdir(directory)
+            if self.directory is not None:
+                self.directory.cleanup()
+
+    @property
+    def state(self):
+        return self.app.State
+
+    @property
+    def i2c_bytes(self):
+        return self.app.Display.i2c.bytes_written
+
+    def screen_text(self):
+        # the values of the widgets currently on screen
+        return [widget.value for widget in self.app.Display.screen or ()]
+
+    async def wait_for(self, condition, timeout=5):
+        started_at = time.monotonic()
+        while not condition():
+            if time.monotonic() - started_at > timeout:
+                raise TimeoutError("condition not met in time")
+            await asyncio.sleep(0.01)
+
+    async def wait_until_booted(self):
+        profile = self.app.Boot.profile
+        invalidated = self.app.Display.invalidated
+        # and the screen shows the state after restoring the timer
+        await self.wait_for(
+            lambda: profile.at_ms("timer restored") is not None
+            and not invalidated.is_set()
+        )
+
+    async def wait_until_synced(self):
+        journal = self.app.ClockodoRequest.journal
+        await self.wait_for(lambda: not journal.events and self.state.progress is None)
+
+    async def turn_knob(self, index):
+        band = self.app.Knob.filter.band
+        self.machine.ADC.reading = index * band + band // 2
+        await self.wait_for(lambda: self.state.selected_task_index == index)
+
+    async def push_button(self, hold_ms=100, bounces=0):
+        # the contact chatters `bounces` times on press and release
+        pin = self.app.Button.pin
+        for level in (0, 1) * bounces + (0,):
+            pin.value(level)
+            await asyncio.sleep(0.001)
+        await asyncio.sleep(hold_ms / 1000)
+        for level in (1, 0) * bounces + (1,):
+            pin.value(level)
+            await asyncio.sleep(0.001)
+        await asyncio.sleep(0.05)
+
+
+async def run_headless(simulator, seconds):
+    oled = simulator.app.Display.oled
+    show = oled.show
+    shown = [None]
+
+    def print_changed_screen():
+        show()
+        text = simulator.screen_text()
+        if text != shown[0]:
+            shown[0] = text
+            print(f"{time.ticks_ms():>8} ms  {text}")
+
+    oled.show = print_changed_screen
+    started_at = time.monotonic()
+    while seconds is None or time.monotonic() - started_at < seconds:
+        await asyncio.sleep(0.1)
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else None
+    tracemalloc.start()
+    simulator = Simulator()
+    try:
+        asyncio.run(simulator.run(lambda s: run_headless(s, seconds)))
+    except KeyboardInterrupt:
+        pass
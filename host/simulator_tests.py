@@ -0,0 +1,480 @@
+import asyncio
+import contextlib
+import io
+import sys
+import tracemalloc
+import unittest
+from simulator import DEFAULT_CONFIG, Simulator
+from trace_to_perfetto import chrome_trace
+from tracing import load_dump
+
+
+class TestSimulator(unittest.IsolatedAsyncioTestCase):
+    async def run_script(self, script, config=None):
+        # the firmware prints its boot profile and latencies
+        with contextlib.redirect_stdout(io.StringIO()):
+            return await Simulator(config).run(script)
+
+    async def test_boots_to_the_splash_screen(self):
+        async def script(simulator):
+            await simulator.wait_until_booted()
+            return simulator.screen_text(), simulator.api.calls
+
+        screen, calls = await self.run_script(script)
+
+        assert screen == ["clocko:ctrl"]
+        assert calls == [("GET", "/api/v2/clock")]
+
+    async def test_knob_selects_a_task(self):
+        async def script(simulator):
+            await simulator.wait_until_booted()
+            await simulator.turn_knob(2)
+            await simulator.wait_for(
+                lambda: simulator.screen_text() == ["Select Task", 2]
+            )
+
+        await self.run_script(script)
+
+    async def test_button_starts_and_stops_the_clock(self):
+        async def script(simulator):
+            await simulator.wait_until_booted()
+            await simulator.turn_knob(1)
+
+            await simulator.push_button()
+            await simulator.wait_until_synced()
+            running = simulator.api.running
+
+            await simulator.push_button()
+            await simulator.wait_until_synced()
+            return running, simulator.api.running, simulator.api.entries
+
+        running, running_after_stop, entries = await self.run_script(script)
+
+        assert running["customers_id"] == 2000
+        assert running["projects_id"] == 3001
+        assert running_after_stop is None
+        assert [entry["id"] for entry in entries] == [running["id"]]
+
+    async def test_the_knob_works_while_connecting(self):
+        async def script(simulator):
+            network = sys.modules["network"]
+            network.WLAN.fail_connect = True
+            profile = simulator.app.Boot.profile
+            await simulator.wait_for(lambda: profile.at_ms("config loaded (json)"))
+
+            await simulator.turn_knob(2)
+            await simulator.wait_for(
+                lambda: simulator.screen_text() == ["Select Task", 2]
+            )
+            return simulator.app.Boot.profile.at_ms("wifi up")
+
+        assert await self.run_script(script) is None
+
+    async def test_a_clock_step_does_not_show_on_the_timer(self):
+        async def script(simulator):
+            await simulator.wait_until_booted()
+            await simulator.turn_knob(1)
+            await simulator.push_button()
+            await simulator.wait_until_synced()
+
+            clock = simulator.app.time
+            simulator.app.time = lambda: clock() + 3600
+            await asyncio.sleep(1.1)
+            return simulator.screen_text()
+
+        task, caption, seconds_elapsed = await self.run_script(script)
+
+        assert (task, caption) == ("Meetings", "Timer")
+        assert 1 <= seconds_elapsed <= 2
+
+    async def test_a_bouncing_button_sends_one_request_per_push(self):
+        async def script(simulator):
+            await simulator.wait_until_booted()
+            await simulator.turn_knob(1)
+            for _ in range(2):
+                await simulator.push_button(bounces=5)
+                await simulator.wait_until_synced()
+            return simulator.api.calls
+
+        calls = await self.run_script(script)
+
+        assert [method for method, _ in calls] == ["GET", "POST", "DELETE"]
+
+    async def test_a_double_push_while_starting_is_dropped(self):
+        async def script(simulator):
+            await simulator.wait_until_booted()
+            await simulator.turn_knob(1)
+            simulator.api.delay = 0.3
+            await simulator.push_button(hold_ms=50)
+            await simulator.push_button(hold_ms=50)
+            await simulator.wait_until_synced()
+            return simulator.api.calls, simulator.api.running
+
+        calls, running = await self.run_script(script)
+
+        assert [method for method, _ in calls] == ["GET", "POST"]
+        assert running["customers_id"] == 2000
+
+    async def test_a_stop_and_start_queued_behind_a_request_cancel_out(self):
+        async def script(simulator):
+            await simulator.wait_until_booted()
+            await simulator.turn_knob(1)
+            simulator.api.delay = 1.5
+
+            # start, then stop and start again while the start is still sent
+            for _ in range(3):
+                await simulator.push_button()
+                await asyncio.sleep(0.3)
+            await simulator.wait_until_synced()
+            return simulator.api.calls, simulator.api.running, simulator.state
+
+        calls, running, state = await self.run_script(script)
+
+        assert [method for method, _ in calls] == ["GET", "POST"]
+        assert state.active_task.name == "Meetings"
+        assert state.active_entry_id == running["id"]
+
+    async def test_a_start_does_not_cancel_a_stop_being_sent(self):
+        async def script(simulator):
+            await simulator.wait_until_booted()
+            await simulator.turn_knob(1)
+            await simulator.push_button()
+            await simulator.wait_until_synced()
+            simulator.api.delay = 1.0
+
+            await simulator.push_button()
+            await asyncio.sleep(0.5)
+            await simulator.push_button()
+            await simulator.wait_until_synced()
+            return simulator.api.calls, simulator.api.running, simulator.state
+
+        calls, running, state = await self.run_script(script)
+
+        assert [method for method, _ in calls] == ["GET", "POST", "DELETE", "POST"]
+        assert state.active_task.name == "Meetings"
+        assert state.active_entry_id == running["id"]
+
+    async def test_a_start_which_timed_out_is_stopped_not_booked_again(self):
+        async def script(simulator):
+            await simulator.wait_until_booted()
+            await simulator.turn_knob(1)
+            app = simulator.app
+            app.ClockodoRequest.RETRY_MS = 200
+            # the API starts the clock after the request gave up on it
+            app.ClockodoClient.connection().timeout = 0.3
+            simulator.api.delay = 0.5
+
+            await simulator.push_button()
+            await asyncio.sleep(0.5)
+            simulator.api.delay = 0
+            await simulator.push_button()
+            await simulator.wait_until_synced()
+            return simulator.api.calls, simulator.api.running, simulator.api.entries
+
+        calls, running, entries = await self.run_script(script)
+
+        assert calls.count(("POST", "/api/v2/clock")) == 1
+        assert ("POST", "/api/v2/entries") not in calls
+        assert running is None
+        assert len(entries) == 1
+
+    async def test_a_clock_stopped_elsewhere_is_picked_up(self):
+        async def script(simulator):
+            await simulator.wait_until_booted()
+            app = simulator.app
+            app.ClockPoll.interval = app.PollInterval(50, 200)
+            await simulator.turn_knob(1)
+            await simulator.push_button()
+            await simulator.wait_until_synced()
+
+            # stopped in the web app
+            simulator.api.running = None
+            await simulator.wait_for(lambda: simulator.state.active_task is None)
+            return app.Metrics.registry.snapshot(), simulator.screen_text()
+
+        snapshot, screen = await self.run_script(script)
+
+        assert snapshot["clock polls"] >= 1
+        assert screen == ["Select Task", 1]
+
+    async def test_an_unchanged_clock_is_polled_without_a_body(self):
+        async def script(simulator):
+            await simulator.wait_until_booted()
+            app = simulator.app
+            app.ClockPoll.interval = app.PollInterval(50, 50)
+            app.ClockPoll.nudge()
+            await asyncio.sleep(0.5)
+            polls = app.Metrics.clock_polls.value
+
+            app.Power.awake.clear()
+            await asyncio.sleep(0.3)
+            asleep_polls = app.Metrics.clock_polls.value - polls
+            app.Power.awake.set()
+            return app.Metrics.registry.snapshot(), asleep_polls
+
+        snapshot, asleep_polls = await self.run_script(script)
+
+        assert snapshot["clock polls"] >= 3
+        assert snapshot["clock polls not modified"] == snapshot["clock polls"] - 1
+        assert asleep_polls <= 1
+
+    async def test_a_timer_tick_is_flushed_without_allocating(self):
+        class NullI2C:
+            def writeto(self, addr, buf):
+                pass
+
+            def writevto(self, addr, bufs):
+                pass
+
+        async def script(simulator):
+            await simulator.wait_until_booted()
+            await simulator.turn_knob(1)
+            await simulator.push_button()
+            await simulator.wait_until_synced()
+
+            app = simulator.app
+            oled = app.Display.oled
+            # the fake bus counts bytes, measured is the driver only
+            oled.i2c = NullI2C()
+            show = oled.show
+            flushes = []
+
+            def measured_show():
+                # a large total is a boxed int on CPython only
+                oled.flushed_bytes_total = 0
+                tracemalloc.start()
+                try:
+                    before = tracemalloc.get_traced_memory()[0]
+                    show()
+                    flushes.append(tracemalloc.get_traced_memory()[1] - before)
+                finally:
+                    tracemalloc.stop()
+
+            oled.show = measured_show
+            for seconds in (3725, 3726, 3727, 3728):
+                app.TimerTicks.seconds = lambda: seconds
+                app.Display.render()
+            return flushes
+
+        flushes = await self.run_script(script)
+
+        # the first tick creates the window views of its sizes
+        assert len(flushes) == 4
+        assert flushes[2:] == [0, 0]
+
+    async def test_metrics_follow_frames_and_requests(self):
+        async def script(simulator):
+            await simulator.wait_until_booted()
+            await simulator.turn_knob(1)
+            await simulator.push_button()
+            await simulator.wait_until_synced()
+            return simulator.app.Metrics.registry.snapshot()
+
+        snapshot = await self.run_script(script)
+
+        assert snapshot["frame ms"]["count"] > 0
+        assert snapshot["input to screen ms"]["count"] == 1
+        assert snapshot["http ms"]["count"] == 2
+        assert snapshot["http failures"] == 0
+        assert snapshot["i2c bytes"] > 0
+
+    async def test_a_dumped_trace_converts_to_perfetto_events(self):
+        async def script(simulator):
+            await simulator.wait_until_booted()
+            await simulator.turn_knob(1)
+            await simulator.push_button()
+            await simulator.wait_until_synced()
+
+            simulator.app.Trace.dump()
+            with open(simulator.app.Trace.FILENAME, "rb") as file:
+                return load_dump(file.read())
+
+        spans, records = await self.run_script(
+            script, dict(DEFAULT_CONFIG, trace=True)
+        )
+        events = chrome_trace(spans, records)["traceEvents"]
+
+        names = {event["name"] for event in events}
+        assert {
+            "Knob.handle_turn",
+            "Button.handle_push",
+            "Display.render",
+            "ClockodoRequest.restore_timer",
+            "ClockodoRequest.replay_start",
+        } <= names
+        knob_turns = [e for e in events if e["name"] == "Knob.handle_turn"]
+        assert [event["ph"] for event in knob_turns] == ["B", "E"]
+
+    async def test_start_while_offline_is_sent_later(self):
+        async def script(simulator):
+            await simulator.wait_until_booted()
+            await simulator.turn_knob(1)
+            simulator.app.ClockodoRequest.RETRY_MS = 50
+
+            simulator.api.fail_status = 503
+            await simulator.push_button()
+            await simulator.wait_for(lambda: simulator.state.progress == "QUEUED")
+            simulator.api.fail_status = None
+
+            await simulator.wait_until_synced()
+            return simulator.api.running
+
+        running = await self.run_script(script)
+
+        assert running["customers_id"] == 2000
+
+    async def test_a_start_from_before_a_power_loss_keeps_its_time(self):
+        async def script(simulator):
+            import ntptime
+
+            app = simulator.app
+            clock = app.time
+            started_at = clock() - 600
+            app.ClockodoRequest.journal.record_start(started_at, 2000, 3001)
+
+            # the RTC started over in 2000 and NTP cannot be reached, the Date
+            # of an API response sets the clock
+            ntptime.fail = True
+            offset = [946684800 - clock()]
+            app.time = lambda: clock() + offset[0]
+            app.Clock.set = lambda now: offset.__setitem__(0, now - clock())
+
+            await simulator.wait_until_booted()
+            await simulator.wait_until_synced()
+            time_since = app.TextFormatting.format_timestamp(started_at)
+            return simulator.api.running, time_since, app.TimerTicks.seconds()
+
+        running, time_since, seconds_elapsed = await self.run_script(script)
+
+        assert running["time_since"] == time_since
+        assert 600 <= seconds_elapsed <= 610
+
+    async def test_a_stop_while_the_link_is_down_is_sent_later(self):
+        async def script(simulator):
+            app = simulator.app
+            app.Wifi.WATCH_PERIOD_MS = 50
+            app.Wifi.WARM_CONNECTION_TIMEOUT = 100
+            app.Wifi.CONNECTION_TIMEOUT = 200
+            app.Wifi.RETRY_MS = 100
+            app.ClockodoRequest.RETRY_MS = 50
+            await simulator.wait_until_booted()
+            await simulator.turn_knob(1)
+            await simulator.push_button()
+            await simulator.wait_until_synced()
+
+            # the link drops, so nothing reaches the API either
+            network = sys.modules["network"]
+            network.WLAN.fail_connect = True
+            app.Wifi.station_interface.disconnect()
+            simulator.api.fail_status = 503
+            await simulator.wait_for(lambda: simulator.state.progress == "QUEUED")
+
+            await simulator.push_button()
+            await simulator.wait_for(
+                lambda: simulator.screen_text() == ["Select (offline)", 1]
+            )
+            pending = len(app.ClockodoRequest.journal.events)
+
+            network.WLAN.fail_connect = False
+            simulator.api.fail_status = None
+            await simulator.wait_until_synced()
+            return pending, simulator.api.running, simulator.screen_text()
+
+        pending, running, screen = await self.run_script(script)
+
+        assert pending == 1
+        assert running is None
+        assert screen == ["Select Task", 1]
+
+    async def test_a_failing_wifi_driver_is_a_failed_connect(self):
+        async def script(simulator):
+            app = simulator.app
+            app.Wifi.RETRY_MS = 100
+            network = sys.modules["network"]
+            network.WLAN.internal_error = True
+
+            await simulator.wait_until_booted()
+            offline = simulator.state.progress
+            network.WLAN.internal_error = False
+            await simulator.wait_for(app.Wifi.connected)
+            return offline
+
+        assert await self.run_script(script) == "QUEUED"
+
+    async def test_an_offline_start_and_stop_are_booked_as_the_project_bills(self):
+        async def script(simulator):
+            simulator.api.customers = [
+                {"id": 2000, "name": "ACME", "billable_default": True}
+            ]
+            simulator.api.projects = [
+                {"id": 3001, "customers_id": 2000, "billable_default": False}
+            ]
+            app = simulator.app
+            app.ClockodoRequest.CANCEL_SECONDS = 0
+            app.Wifi.WATCH_PERIOD_MS = 50
+            app.Wifi.WARM_CONNECTION_TIMEOUT = 100
+            app.Wifi.CONNECTION_TIMEOUT = 200
+            app.Wifi.RETRY_MS = 100
+            network = sys.modules["network"]
+            network.WLAN.fail_connect = True
+            await simulator.wait_until_booted()
+            await simulator.turn_knob(1)
+
+            await simulator.push_button()
+            await simulator.push_button()
+            network.WLAN.fail_connect = False
+            await simulator.wait_until_synced()
+            return simulator.api.calls, simulator.api.entries
+
+        calls, entries = await self.run_script(script)
+
+        assert ("GET", "/api/v2/projects/3001") in calls
+        assert [entry["billable"] for entry in entries] == [0]
+
+    async def test_a_dropped_connection_reconnects_to_the_cached_access_point(self):
+        async def script(simulator):
+            await simulator.wait_until_booted()
+            wifi = simulator.app.Wifi
+            wifi.WATCH_PERIOD_MS = 50
+            cached = wifi.cache.load()
+
+            station = wifi.station_interface
+            station.disconnect()
+            await simulator.wait_for(station.isconnected)
+            return cached, station.address
+
+        cached, address = await self.run_script(script)
+
+        # the stronger of the two access points of the network
+        assert cached[:2] == (b"\x02\x00\x00\x00\x00\x02", 6)
+        assert address == cached[2]
+
+    async def test_synced_tasks_follow_the_pinned_ones(self):
+        async def script(simulator):
+            simulator.api.items_per_page = 1
+            simulator.api.customers = [
+                {"id": 2000, "name": "ACME"},
+                {"id": 5000, "name": "Initech"},
+            ]
+            simulator.api.projects = [
+                {"id": 3000, "customers_id": 2000, "name": "Development"}
+            ]
+            await simulator.wait_until_booted()
+            await simulator.wait_for(lambda: len(simulator.app.Config.tasks) > 5)
+            tasks = simulator.app.Config.tasks
+            names = [tasks[i].name for i in range(5, len(tasks))]
+            return names, simulator.api.calls
+
+        config = dict(DEFAULT_CONFIG, sync_tasks=True)
+        names, calls = await self.run_script(script, config)
+
+        assert names == ["ACME", "Initech"]
+        assert [path for _, path in calls if "page=" in path] == [
+            "/api/v2/customers?filter%5Bactive%5D=true&page=1",
+            "/api/v2/customers?filter%5Bactive%5D=true&page=2",
+            "/api/v2/projects?filter%5Bactive%5D=true&page=1",
+        ]
+
+
+if __name__ == "__main__":
+    unittest.main()
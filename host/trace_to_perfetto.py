@@ -0,0 +1,80 @@
+"""
+Converts a trace dumped by the device into the Chrome trace JSON format,
+which ui.perfetto.dev and chrome://tracing open.
+
+    ampy --port /dev/ttyUSB0 get trace.bin trace.bin
+    python3 host/trace_to_perfetto.py trace.bin trace.json
+
+Spans around awaits are shown as async slices on a track of their own, the
+others nest on the main track.
+"""
+
+import json
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from tracing import load_dump  # noqa: E402
+
+# ticks_us of MicroPython on the ESP32 wraps around after this many µs
+TICKS_PERIOD_US = 1 << 30
+
+
+def chrome_trace(spans, records):
+    """The trace events of the records, begins lost to the ring are skipped."""
+    events = []
+    # of the spans on the main track, innermost last
+    open_spans = []
+    open_async_spans = set()
+    elapsed_us = 0
+    previous_at = None
+
+    for index, is_end, at in records:
+        if previous_at is not None:
+            elapsed_us += (at - previous_at) % TICKS_PERIOD_US
+        previous_at = at
+        name, is_async = spans[index]
+
+        if is_async:
+            if is_end and index not in open_async_spans:
+                continue
+            if is_end:
+                open_async_spans.discard(index)
+            else:
+                open_async_spans.add(index)
+            phase = "e" if is_end else "b"
+            event = {"cat": "async", "id": index}
+        else:
+            if is_end:
+                if index not in open_spans:
+                    continue
+                # spans left open inside this one never ended
+                while open_spans.pop() != index:
+                    pass
+            else:
+                open_spans.append(index)
+            phase = "E" if is_end else "B"
+            event = {}
+
+        event.update(name=name, ph=phase, ts=elapsed_us, pid=1, tid=1)
+        events.append(event)
+
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(2)
+
+    with open(sys.argv[1], "rb") as file:
+        spans, records = load_dump(file.read())
+    with open(sys.argv[2], "w") as file:
+        json.dump(chrome_trace(spans, records), file)
+    print(f"{len(records)} records of {len(spans)} spans")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import asyncio
+import json
+from json_stream import JsonExtractor
+
+# bytes of a response body read at once when extracting values
+READ_SIZE = 256
+# requests which may be sent twice, the server may have handled one that failed
+IDEMPOTENT_METHODS = ("GET", "HEAD", "PUT", "DELETE")
+
+
+class Response:
+    def __init__(self, status_code, headers, body, values=None):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        # the values at the requested paths, instead of the body
+        self.values = values
+
+
+def parse_url(url):
+    scheme, _, rest = url.partition("://")
+    host, _, path = rest.partition("/")
+    port = 443 if scheme == "https" else 80
+    if ":" in host:
+        host, port = host.split(":")
+        port = int(port)
+
+    return scheme == "https", host, port, "/" + path
+
+
+def encode_headers(headers):
+    return "".join(f"{name}: {value}\r\n" for name, value in headers.items()).encode()
+
+
+def encode_request(method, host, path, encoded_headers, body):
+    head = f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n".encode()
+    if body is None:
+        length = b"Content-Length: 0\r\n\r\n"
+    else:
+        length = f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+        length = length.encode()
+
+    return head + encoded_headers + length
+
+
+async def read_body(reader, length, extractor):
+    # without a length the body ends when the connection is closed
+    while length is None or length > 0:
+        if length is None:
+            data = await reader.read(READ_SIZE)
+            if not data:
+                return
+        else:
+            data = await reader.readexactly(min(length, READ_SIZE))
+            length -= len(data)
+        extractor.feed(data)
+
+
+async def read_response(reader, paths=None):
+    """
+    Reads the whole body, or only the values at `paths` (see JsonExtractor)
+    without keeping the body. Error responses are always read whole.
+    """
+    status_line = await reader.readline()
+    if not status_line:
+        raise OSError("connection closed")
+    status_code = int(status_line.split(None, 2)[1])
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode().partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if status_code in (204, 304):
+        # never carry a body, even without a length
+        return Response(status_code, headers, b"")
+
+    extractor = None
+    body = b""
+    if paths is not None and status_code < 300:
+        extractor = JsonExtractor(paths)
+        body = None
+
+    if "chunked" in headers.get("transfer-encoding", ""):
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                await reader.readline()
+                break
+            if extractor is not None:
+                await read_body(reader, size, extractor)
+            else:
+                body += await reader.readexactly(size)
+            await reader.readline()
+    elif extractor is not None:
+        length = headers.get("content-length")
+        await read_body(reader, None if length is None else int(length), extractor)
+    elif "content-length" in headers:
+        body = await reader.readexactly(int(headers["content-length"]))
+    else:
+        body = await reader.read(-1)
+
+    if extractor is None:
+        return Response(status_code, headers, body)
+    return Response(status_code, headers, None, extractor.finish())
+
+
+class Session:
+    """
+    Keeps one connection to the host of `base_url` open across requests, so the
+    TLS handshake is paid once. The static headers are encoded once as well.
+    Requests from several tasks take turns on the connection.
+
+    A request failing on a reused connection is retried once on a fresh one
+    when its method is idempotent, others are left to the caller. Connecting
+    and each request time out after `timeout` seconds.
+    """
+
+    def __init__(self, base_url, headers, timeout=10):
+        self.use_ssl, self.host, self.port, self.base_path = parse_url(base_url)
+        self.encoded_headers = encode_headers(headers)
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+        self.connections = 0
+        self.lock = asyncio.Lock()
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(
+            self.host, self.port, ssl=self.use_ssl or None
+        )
+        self.connections += 1
+
+    async def close(self):
+        if self.writer is None:
+            return
+
+        writer = self.writer
+        self.reader = None
+        self.writer = None
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+    async def send(self, method, path, body, paths, headers):
+        encoded_headers = self.encoded_headers
+        if headers:
+            encoded_headers += encode_headers(headers)
+        self.writer.write(
+            encode_request(method, self.host, path, encoded_headers, body)
+        )
+        if body is not None:
+            self.writer.write(body)
+        await self.writer.drain()
+
+        return await read_response(self.reader, paths)
+
+    async def request(self, method, name, data=None, paths=None, headers=None):
+        """
+        Returns the response, with only the values at `paths` when given.
+        `headers` are sent along with the static ones for this request only.
+        """
+        async with self.lock:
+            return await self.request_unlocked(method, name, data, paths, headers)
+
+    async def request_unlocked(self, method, name, data, paths, headers):
+        path = f"{self.base_path}/{name}"
+        body = None if data is None else json.dumps(data).encode()
+
+        while True:
+            reused = self.writer is not None
+            try:
+                if not reused:
+                    await asyncio.wait_for(self.connect(), self.timeout)
+                response = await asyncio.wait_for(
+                    self.send(method, path, body, paths, headers), self.timeout
+                )
+            except asyncio.TimeoutError:
+                # a half-open connection would hold the lock forever, the
+                # response may still arrive on it. TimeoutError is an OSError
+                # on CPython only, so it is caught first.
+                await self.close()
+                raise OSError("timed out")
+            except (OSError, EOFError):
+                await self.close()
+                # the server may have closed an idle connection, which only
+                # shows up when using it: retry once on a fresh connection
+                if reused and method in IDEMPOTENT_METHODS:
+                    continue
+                raise
+
+            if response.headers.get("connection", "").lower() == "close":
+                await self.close()
+            return response
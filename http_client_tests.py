@@ -0,0 +1,253 @@
+import asyncio
+import json
+import unittest
+import http_client
+
+
+class Server:
+    """A local stand-in for the Clockodo API answering every request with `body`."""
+
+    def __init__(
+        self,
+        body,
+        chunked=False,
+        keep_alive=False,
+        requests_per_connection=None,
+        etag=None,
+        delay=0,
+    ):
+        self.body = body
+        self.chunked = chunked
+        self.etag = etag
+        self.delay = delay
+        self.keep_alive = keep_alive
+        self.requests_per_connection = requests_per_connection
+        self.requests = []
+        self.connections = 0
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        served = 0
+        limit = self.requests_per_connection
+        while limit is None or served < limit:
+            if not await self.handle_request(reader, writer):
+                break
+            served += 1
+            if not self.keep_alive:
+                break
+        writer.close()
+
+    async def handle_request(self, reader, writer):
+        request_line = await reader.readline()
+        if not request_line:
+            return False
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+        body = await reader.readexactly(int(headers.get("content-length", 0)))
+        self.requests.append((request_line.decode().strip(), headers, body))
+        await asyncio.sleep(self.delay)
+
+        if self.etag is not None and headers.get("if-none-match") == self.etag:
+            writer.write(b"HTTP/1.1 304 Not Modified\r\n\r\n")
+            await writer.drain()
+            return True
+
+        payload = self.body.encode()
+        writer.write(b"HTTP/1.1 200 OK\r\n")
+        if self.etag is not None:
+            writer.write(b"ETag: %s\r\n" % self.etag.encode())
+        if self.chunked:
+            writer.write(b"Transfer-Encoding: chunked\r\n\r\n")
+            for chunk in (payload[:5], payload[5:]):
+                writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            writer.write(b"0\r\n\r\n")
+        else:
+            writer.write(b"Content-Length: %d\r\n\r\n%s" % (len(payload), payload))
+        await writer.drain()
+        return True
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        self.url = "http://127.0.0.1:%d" % self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *args):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+class TestParseUrl(unittest.TestCase):
+    def test_parse_url_splits_https_urls(self):
+        result = http_client.parse_url("https://my.clockodo.com/api/v2/clock")
+        assert result == (True, "my.clockodo.com", 443, "/api/v2/clock")
+
+    def test_parse_url_reads_the_port(self):
+        result = http_client.parse_url("http://localhost:8080/clock/1")
+        assert result == (False, "localhost", 8080, "/clock/1")
+
+
+class TestSession(unittest.TestCase):
+    def test_session_sends_headers_and_json_body(self):
+        async def run():
+            async with Server('{"running": {"id": 7}}') as server:
+                session = http_client.Session(server.url + "/api/v2", {"X-Key": "key"})
+                response = await session.request("POST", "clock", {"customers_id": 1})
+                await session.close()
+                return server, response
+
+        server, response = asyncio.run(run())
+        request_line, headers, body = server.requests[0]
+
+        assert request_line == "POST /api/v2/clock HTTP/1.1"
+        assert headers["x-key"] == "key"
+        assert json.loads(body) == {"customers_id": 1}
+        assert response.status_code == 200
+        assert json.loads(response.body) == {"running": {"id": 7}}
+
+    def test_session_reads_chunked_responses(self):
+        async def run():
+            async with Server('{"running": null}', chunked=True) as server:
+                session = http_client.Session(server.url, {})
+                response = await session.request("GET", "clock")
+                await session.close()
+                return response
+
+        assert json.loads(asyncio.run(run()).body) == {"running": None}
+
+    def test_session_reuses_one_connection_for_all_requests(self):
+        async def run():
+            async with Server('{"running": null}', keep_alive=True) as server:
+                session = http_client.Session(server.url + "/api/v2", {"X-Key": "key"})
+                for _ in range(3):
+                    response = await session.request("GET", "clock")
+                await session.close()
+                return server, response
+
+        server, response = asyncio.run(run())
+
+        assert server.connections == 1
+        assert [r[0] for r in server.requests] == ["GET /api/v2/clock HTTP/1.1"] * 3
+        assert server.requests[0][1]["x-key"] == "key"
+        assert json.loads(response.body) == {"running": None}
+
+    def test_session_reconnects_when_the_server_closed_the_connection(self):
+        async def run():
+            async with Server(
+                '{"running": null}', keep_alive=True, requests_per_connection=2
+            ) as server:
+                session = http_client.Session(server.url, {})
+                for _ in range(5):
+                    response = await session.request("DELETE", "clock/1")
+                    await asyncio.sleep(0)
+                await session.close()
+                return server, response
+
+        server, response = asyncio.run(run())
+
+        assert server.connections == 3
+        assert len(server.requests) == 5
+        assert response.status_code == 200
+
+    def test_session_serializes_concurrent_requests(self):
+        async def run():
+            async with Server('{"running": null}', keep_alive=True) as server:
+                session = http_client.Session(server.url, {})
+                responses = await asyncio.gather(
+                    *(session.request("GET", "clock") for _ in range(3))
+                )
+                await session.close()
+                return server, responses
+
+        server, responses = asyncio.run(run())
+
+        assert server.connections == 1
+        assert [json.loads(r.body) for r in responses] == [{"running": None}] * 3
+
+    def test_session_does_not_retry_on_a_fresh_connection(self):
+        async def run():
+            async with Server('{}', requests_per_connection=0) as server:
+                session = http_client.Session(server.url, {})
+                with self.assertRaises((OSError, EOFError)):
+                    await session.request("GET", "clock")
+                return server
+
+        assert asyncio.run(run()).connections == 1
+
+    def test_session_does_not_retry_a_post(self):
+        async def run():
+            async with Server(
+                '{"running": null}', keep_alive=True, requests_per_connection=1
+            ) as server:
+                session = http_client.Session(server.url, {})
+                await session.request("POST", "clock", {"customers_id": 1})
+                await asyncio.sleep(0)
+                with self.assertRaises((OSError, EOFError)):
+                    await session.request("POST", "clock", {"customers_id": 1})
+                await session.close()
+                return server
+
+        server = asyncio.run(run())
+
+        assert server.connections == 1
+        assert len(server.requests) == 1
+
+    def test_session_times_out_and_drops_the_connection(self):
+        async def run():
+            async with Server("{}", keep_alive=True, delay=0.5) as server:
+                session = http_client.Session(server.url, {}, timeout=0.05)
+                with self.assertRaises(OSError):
+                    await session.request("GET", "clock")
+                return session
+
+        assert asyncio.run(run()).writer is None
+
+    def test_session_extracts_only_the_requested_paths(self):
+        body = '{"running": {"id": 7, "text": "%s"}}' % ("x" * 1000)
+
+        async def run(chunked):
+            async with Server(body, chunked=chunked, keep_alive=True) as server:
+                session = http_client.Session(server.url, {})
+                response = await session.request("GET", "clock", paths=["running.id"])
+                await session.close()
+                return response
+
+        for chunked in (False, True):
+            response = asyncio.run(run(chunked))
+            assert response.body is None
+            assert response.values == {"running.id": 7}
+
+    def test_session_sends_conditional_requests(self):
+        async def run():
+            server = Server('{"running": null}', keep_alive=True, etag='"1"')
+            async with server:
+                session = http_client.Session(server.url, {"X-Key": "key"})
+                first = await session.request("GET", "clock", paths=["running.id"])
+                etag = first.headers["etag"]
+                responses = [
+                    await session.request(
+                        "GET", "clock", paths=["running.id"], headers=headers
+                    )
+                    for headers in ({"If-None-Match": etag}, None)
+                ]
+                await session.close()
+                return server, first, responses
+
+        server, first, (not_modified, again) = asyncio.run(run())
+
+        assert first.values == {"running.id": None}
+        # a 304 has no body, the connection stays usable for the next request
+        assert not_modified.status_code == 304
+        assert again.values == {"running.id": None}
+        assert server.connections == 1
+        assert server.requests[1][1]["if-none-match"] == '"1"'
+        assert server.requests[1][1]["x-key"] == "key"
+        assert "if-none-match" not in server.requests[2][1]
+
+
+if __name__ == "__main__":
+    unittest.main()
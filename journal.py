@@ -0,0 +1,231 @@
+import struct
+from atomic_file import AtomicFile
+
+
+class Journal:
+    """
+    Append-only log of clock starts and stops on flash. Every event is written
+    before it is sent to the API, so bookings survive network outages and
+    reboots. Sent events are marked done and dropped when the file is compacted.
+
+    Records have a fixed size and a checksum, a record torn by a power loss is
+    discarded on load.
+
+    A toggle which undoes the last pending one before it was sent, like a stop
+    right after a start, cancels that event instead of being recorded, so
+    neither of them costs a request.
+    """
+
+    START = 1
+    STOP = 2
+    SENDING = 3
+    DONE = 4
+    CANCEL = 5
+
+    # actions returned by next_action
+    START_CLOCK = "START_CLOCK"
+    STOP_CLOCK = "STOP_CLOCK"
+    ADD_ENTRY = "ADD_ENTRY"
+
+    # kind, checksum, reserved, seq, time, a, b
+    RECORD_FORMAT = "<BBHIiii"
+    RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+    def __init__(self, filename, max_bytes=4096):
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.max_events = max_bytes // self.RECORD_SIZE // 2
+        self.size = 0
+        self.next_seq = 1
+        # events from this seq on were recorded since the journal was loaded
+        self.boot_seq = 1
+        # pending events as (kind, seq, time, customer_id, project_id), a stop
+        # holds the id of the entry it stops instead of the customer
+        self.events = []
+        self.sending = set()
+        self.entry_id = None
+        # the action returned by next_action which is being sent right now
+        self.replaying = None
+
+    @classmethod
+    def pack(cls, kind, seq, time, a=0, b=0):
+        record = bytearray(struct.pack(cls.RECORD_FORMAT, kind, 0, 0, seq, time, a, b))
+        record[1] = sum(record) & 0xFF
+        return record
+
+    @classmethod
+    def unpack(cls, record):
+        kind, checksum, _, seq, time, a, b = struct.unpack(cls.RECORD_FORMAT, record)
+        if (sum(record) - checksum) & 0xFF != checksum:
+            return None
+        return kind, seq, time, a, b
+
+    def load(self):
+        self.size = 0
+        self.events = []
+        self.sending = set()
+        self.entry_id = None
+        intact = True
+
+        try:
+            with open(self.filename, "rb") as file:
+                while True:
+                    record = file.read(self.RECORD_SIZE)
+                    if len(record) < self.RECORD_SIZE:
+                        intact = len(record) == 0
+                        break
+
+                    unpacked = self.unpack(record)
+                    if unpacked is None or not self.apply(*unpacked):
+                        intact = False
+                        break
+                    self.size += self.RECORD_SIZE
+        except OSError:
+            pass
+
+        if not intact:
+            self.compact()
+        self.boot_seq = self.next_seq
+
+    def apply(self, kind, seq, time, a, b):
+        if kind == self.START or kind == self.STOP:
+            self.events.append((kind, seq, time, a or None, b or None))
+            self.next_seq = max(self.next_seq, seq + 1)
+        elif kind == self.SENDING:
+            self.sending.add(seq)
+        elif kind == self.DONE:
+            event = self.find(seq)
+            if a:
+                self.entry_id = a
+            elif event is not None and event[0] == self.STOP:
+                self.entry_id = None
+            if event is not None:
+                self.events.remove(event)
+            self.sending.discard(seq)
+        elif kind == self.CANCEL:
+            # unlike DONE, the running entry stays as it is
+            event = self.find(seq)
+            if event is not None:
+                self.events.remove(event)
+        else:
+            return False
+        return True
+
+    def find(self, seq):
+        for event in self.events:
+            if event[1] == seq:
+                return event
+        return None
+
+    def append(self, kind, seq, time, a=0, b=0):
+        record = self.pack(kind, seq, time, a, b)
+        with open(self.filename, "ab") as file:
+            file.write(record)
+        self.apply(kind, seq, time, a, b)
+        self.size += self.RECORD_SIZE
+
+        if self.size > self.max_bytes:
+            self.compact()
+
+    def record(self, kind, time, customer_id=None, project_id=None):
+        if len(self.events) >= self.max_events:
+            raise OverflowError("journal full")
+
+        seq = self.next_seq
+        self.append(kind, seq, time, customer_id or 0, project_id or 0)
+        return seq
+
+    def record_start(self, time, customer_id, project_id):
+        return self.record(self.START, time, customer_id, project_id)
+
+    def record_stop(self, time):
+        # the running entry may only be known in memory, like when it was
+        # taken over from the API, so its id is kept with the stop. An entry
+        # started by a pending event gets its id when that is sent.
+        entry_id = None if self.events else self.entry_id
+        return self.record(self.STOP, time, entry_id)
+
+    def cancel_last(self, kind, time, within):
+        """
+        Cancels the last pending event instead of recording `kind` at `time`
+        when the two undo each other: it is the opposite toggle, has not been
+        sent and is less than `within` seconds older. Returns whether it did.
+        """
+        if not self.events:
+            return False
+
+        last = self.events[-1]
+        last_kind, seq, last_time, _, _ = last
+        if last_kind == kind or seq in self.sending:
+            return False
+        if self.replaying is not None and last in self.replaying:
+            return False
+        if not 0 <= time - last_time < within:
+            return False
+
+        self.append(self.CANCEL, seq, 0)
+        return True
+
+    def mark_sending(self, seq):
+        self.append(self.SENDING, seq, 0)
+
+    def mark_done(self, seq, entry_id=None):
+        self.append(self.DONE, seq, 0, entry_id or 0)
+
+    def compact(self):
+        records = []
+        if self.entry_id is not None:
+            records.append(self.pack(self.DONE, 0, 0, self.entry_id))
+        for kind, seq, time, customer_id, project_id in self.events:
+            records.append(self.pack(kind, seq, time, customer_id or 0, project_id or 0))
+            if seq in self.sending:
+                records.append(self.pack(self.SENDING, seq, 0))
+
+        with AtomicFile(self.filename) as file:
+            for record in records:
+                file.write(record)
+        self.size = len(records) * self.RECORD_SIZE
+
+    def recorded_since_load(self, event):
+        return event[1] >= self.boot_seq
+
+    def shift(self, offset):
+        # moves the times of the events recorded since loading, taken by a clock
+        # off by `offset`, the ones loaded were taken before it started over
+        if not any(self.recorded_since_load(event) for event in self.events):
+            return
+
+        self.events = [
+            (kind, seq, time + offset, customer_id, project_id)
+            if seq >= self.boot_seq
+            else (kind, seq, time, customer_id, project_id)
+            for kind, seq, time, customer_id, project_id in self.events
+        ]
+        self.compact()
+
+    def next_action(self):
+        """
+        The next request needed to bring the API up to date, as
+        (action, start_event, stop_event). A start and stop which are both
+        pending are coalesced into a single time entry, unless the start may
+        have reached the API as a running clock already: it is settled on its
+        own then and the stop ends that clock.
+        """
+        if not self.events:
+            return None
+
+        first = self.events[0]
+        if first[0] == self.STOP:
+            return self.STOP_CLOCK, None, first
+        if len(self.events) > 1:
+            stop = self.events[1]
+            # both are marked sending while they are sent as one entry
+            if first[1] not in self.sending or stop[1] in self.sending:
+                return self.ADD_ENTRY, first, stop
+        return self.START_CLOCK, first, None
+
+    def running_event(self):
+        # the pending start of a clock which has not been stopped yet
+        if self.events and self.events[-1][0] == self.START:
+            return self.events[-1]
+        return None
@@ -0,0 +1,204 @@
+import os
+import tempfile
+import unittest
+from journal import Journal
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "journal.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def reloaded(self, max_bytes=4096):
+        journal = Journal(self.filename, max_bytes)
+        journal.load()
+        return journal
+
+    def test_pending_events_survive_a_reload(self):
+        journal = self.reloaded()
+        journal.record_start(1000, 2000, 3000)
+        journal.record_stop(1060)
+
+        journal = self.reloaded()
+        assert journal.events == [
+            (Journal.START, 1, 1000, 2000, 3000),
+            (Journal.STOP, 2, 1060, None, None),
+        ]
+        assert journal.next_seq == 3
+
+    def test_a_torn_record_at_the_end_is_discarded(self):
+        journal = self.reloaded()
+        journal.record_start(1000, 2000, None)
+        with open(self.filename, "ab") as file:
+            file.write(Journal.pack(Journal.STOP, 2, 1060)[:7])
+
+        journal = self.reloaded()
+        assert journal.events == [(Journal.START, 1, 1000, 2000, None)]
+        assert os.path.getsize(self.filename) == Journal.RECORD_SIZE
+
+        journal.record_stop(1060)
+        assert len(self.reloaded().events) == 2
+
+    def test_a_corrupt_record_ends_the_journal(self):
+        journal = self.reloaded()
+        journal.record_start(1000, 2000, None)
+        journal.record_stop(1060)
+        with open(self.filename, "r+b") as file:
+            file.seek(Journal.RECORD_SIZE + 8)
+            file.write(b"\xff")
+
+        assert self.reloaded().events == [(Journal.START, 1, 1000, 2000, None)]
+
+    def test_a_pending_start_and_stop_are_coalesced_into_one_entry(self):
+        journal = self.reloaded()
+        start_seq = journal.record_start(1000, 2000, 3000)
+        stop_seq = journal.record_stop(1060)
+
+        action, start, stop = journal.next_action()
+        assert action == Journal.ADD_ENTRY
+        assert (start[1], stop[1]) == (start_seq, stop_seq)
+
+    def test_a_running_start_is_sent_as_clock_start(self):
+        journal = self.reloaded()
+        journal.record_start(1000, 2000, 3000)
+
+        action, start, stop = journal.next_action()
+        assert action == Journal.START_CLOCK
+        assert stop is None
+        assert journal.running_event() == start
+
+    def test_a_start_sent_as_a_clock_is_not_coalesced_with_its_stop(self):
+        journal = self.reloaded()
+        start_seq = journal.record_start(1000, 2000, 3000)
+        journal.mark_sending(start_seq)
+        journal.record_stop(1060)
+
+        journal = self.reloaded()
+        assert journal.next_action()[0] == Journal.START_CLOCK
+        journal.mark_done(start_seq, 77)
+        assert journal.next_action()[0] == Journal.STOP_CLOCK
+        assert journal.entry_id == 77
+
+    def test_a_start_and_stop_sent_as_one_entry_stay_coalesced(self):
+        journal = self.reloaded()
+        start_seq = journal.record_start(1000, 2000, 3000)
+        stop_seq = journal.record_stop(1060)
+        journal.mark_sending(start_seq)
+        journal.mark_sending(stop_seq)
+
+        assert self.reloaded().next_action()[0] == Journal.ADD_ENTRY
+
+    def test_done_events_are_removed_and_the_entry_id_is_kept(self):
+        journal = self.reloaded()
+        start_seq = journal.record_start(1000, 2000, 3000)
+        journal.mark_sending(start_seq)
+        journal.mark_done(start_seq, 77)
+        journal.record_stop(1060)
+
+        journal = self.reloaded()
+        assert journal.entry_id == 77
+        assert journal.next_action()[0] == Journal.STOP_CLOCK
+
+        journal.mark_done(journal.events[0][1])
+        journal = self.reloaded()
+        assert journal.entry_id is None
+        assert journal.next_action() is None
+
+    def test_a_stop_keeps_the_entry_id_which_was_not_recorded(self):
+        journal = self.reloaded()
+        # taken over from the API, not written to the journal
+        journal.entry_id = 42
+        journal.record_stop(1060)
+
+        journal = self.reloaded()
+        assert journal.next_action() == (
+            Journal.STOP_CLOCK,
+            None,
+            (Journal.STOP, 1, 1060, 42, None),
+        )
+
+    def test_sending_marks_survive_a_reload(self):
+        journal = self.reloaded()
+        start_seq = journal.record_start(1000, 2000, 3000)
+        journal.mark_sending(start_seq)
+
+        assert start_seq in self.reloaded().sending
+
+    def test_the_file_is_compacted_when_it_grows_too_large(self):
+        journal = self.reloaded(max_bytes=10 * Journal.RECORD_SIZE)
+        for i in range(5):
+            start_seq = journal.record_start(1000 + i, 2000, None)
+            journal.mark_done(start_seq, 70 + i)
+            stop_seq = journal.record_stop(1060 + i)
+            journal.mark_done(stop_seq)
+        journal.record_start(2000, 2000, None)
+
+        assert os.path.getsize(self.filename) <= 10 * Journal.RECORD_SIZE
+        journal = self.reloaded()
+        assert journal.events == [(Journal.START, 11, 2000, 2000, None)]
+        assert journal.next_seq == 12
+
+    def test_shifted_events_survive_a_reload(self):
+        journal = self.reloaded()
+        journal.record_start(1000, 2000, 3000)
+        journal.record_stop(1060)
+
+        journal.shift(500)
+
+        assert [event[2] for event in self.reloaded().events] == [1500, 1560]
+
+    def test_only_events_recorded_since_loading_are_shifted(self):
+        journal = self.reloaded()
+        journal.record_start(1000, 2000, 3000)
+
+        journal = self.reloaded()
+        journal.record_stop(1060)
+        journal.shift(500)
+
+        assert [event[2] for event in self.reloaded().events] == [1000, 1560]
+
+    def test_an_unsent_opposite_toggle_is_cancelled(self):
+        journal = self.reloaded()
+        start_seq = journal.record_start(1000, 2000, 3000)
+        journal.mark_done(start_seq, 70)
+        journal.record_stop(1060)
+
+        # a start right after the stop keeps the entry running
+        assert not journal.cancel_last(Journal.STOP, 1062, 5)
+        assert journal.cancel_last(Journal.START, 1062, 5)
+        journal = self.reloaded()
+        assert journal.events == []
+        assert journal.entry_id == 70
+
+    def test_only_recent_unsent_toggles_are_cancelled(self):
+        journal = self.reloaded()
+        seq = journal.record_start(1000, 2000, 3000)
+
+        assert not journal.cancel_last(Journal.STOP, 1010, 5)
+        journal.mark_sending(seq)
+        assert not journal.cancel_last(Journal.STOP, 1002, 5)
+        assert journal.next_action()[0] == Journal.START_CLOCK
+
+    def test_an_event_being_replayed_is_not_cancelled(self):
+        journal = self.reloaded()
+        journal.record_stop(1060)
+        journal.replaying = journal.next_action()
+
+        assert not journal.cancel_last(Journal.START, 1062, 5)
+        journal.replaying = None
+        assert journal.cancel_last(Journal.START, 1062, 5)
+
+    def test_recording_fails_when_the_journal_is_full(self):
+        journal = self.reloaded(max_bytes=4 * Journal.RECORD_SIZE)
+        journal.record_start(1000, 2000, None)
+        journal.record_stop(1060)
+
+        with self.assertRaises(OverflowError):
+            journal.record_start(1100, 2000, None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import json
+
+QUOTE = 0x22
+BACKSLASH = 0x5C
+COMMA = 0x2C
+OPEN_OBJECT = 0x7B
+CLOSE_OBJECT = 0x7D
+OPEN_ARRAY = 0x5B
+CLOSE_ARRAY = 0x5D
+# skipped between tokens, the colon after a key included
+SEPARATORS = b" \t\r\n:"
+# end a number, true, false or null
+DELIMITERS = b" \t\r\n,]}"
+ANY_INDEX = b"*"
+
+
+def closing_quote(data, start):
+    # the index of the quote ending the string opened at `start`, or -1
+    end = data.find(b'"', start + 1)
+    while end >= 0:
+        backslashes = 0
+        while data[end - 1 - backslashes] == BACKSLASH:
+            backslashes += 1
+        if backslashes % 2 == 0:
+            return end
+        end = data.find(b'"', end + 1)
+    return -1
+
+
+class JsonExtractor:
+    """
+    Pulls the values at a few paths out of a JSON document fed in chunks,
+    without keeping the document or building its tree.
+
+    Paths separate object keys with dots, "*" stands for every item of an
+    array: "running.id" or "entries.*.time_since". They lead to strings,
+    numbers, booleans or null. `values` maps every path to its value, None
+    when it was not in the document, or to the list of values for paths with
+    "*".
+    """
+
+    def __init__(self, paths):
+        self.paths = []
+        self.values = {}
+        self.max_depth = 0
+        for path in paths:
+            keys = tuple(key.encode() for key in path.split("."))
+            self.paths.append((path, keys))
+            self.values[path] = [] if ANY_INDEX in keys else None
+            if len(keys) > self.max_depth:
+                self.max_depth = len(keys)
+
+        # per open container the key or index of the value being read
+        self.keys = []
+        self.in_object = []
+        self.expect_key = False
+        self.pending = b""
+
+    def feed(self, data):
+        if self.pending:
+            data = self.pending + data
+        index = 0
+        end = len(data)
+
+        while index < end:
+            character = data[index]
+            if character in SEPARATORS:
+                index += 1
+            elif character == COMMA:
+                if self.in_object[-1]:
+                    self.expect_key = True
+                else:
+                    self.keys[-1] += 1
+                index += 1
+            elif character == OPEN_OBJECT or character == OPEN_ARRAY:
+                is_object = character == OPEN_OBJECT
+                self.keys.append(None if is_object else 0)
+                self.in_object.append(is_object)
+                self.expect_key = is_object
+                index += 1
+            elif character == CLOSE_OBJECT or character == CLOSE_ARRAY:
+                if not self.keys:
+                    raise ValueError("unbalanced JSON")
+                self.keys.pop()
+                self.in_object.pop()
+                self.expect_key = False
+                index += 1
+            elif character == QUOTE:
+                quote = closing_quote(data, index)
+                if quote < 0:
+                    break
+                if self.expect_key:
+                    self.keys[-1] = data[index + 1 : quote]
+                    self.expect_key = False
+                else:
+                    self.found(data, index, quote + 1)
+                index = quote + 1
+            else:
+                token_end = index
+                while token_end < end and data[token_end] not in DELIMITERS:
+                    token_end += 1
+                if token_end == end:
+                    # the token may go on in the next chunk
+                    break
+                self.found(data, index, token_end)
+                index = token_end
+
+        self.pending = data[index:]
+
+    def finish(self):
+        """Raises ValueError when the document ended early."""
+        if self.keys or self.pending.strip():
+            raise ValueError("truncated JSON")
+        return self.values
+
+    def found(self, data, start, end):
+        depth = len(self.keys)
+        if depth > self.max_depth:
+            return
+
+        for path, keys in self.paths:
+            if len(keys) == depth and self.matches(keys):
+                value = json.loads(data[start:end].decode())
+                if ANY_INDEX in keys:
+                    self.values[path].append(value)
+                else:
+                    self.values[path] = value
+
+    def matches(self, keys):
+        for expected, key in zip(keys, self.keys):
+            if expected == ANY_INDEX:
+                if not isinstance(key, int):
+                    return False
+            elif expected != key:
+                return False
+        return True
@@ -0,0 +1,72 @@
+import json
+import unittest
+from json_stream import JsonExtractor
+
+CLOCK = {
+    "running": {
+        "id": 7,
+        "customers_id": 2000,
+        "projects_id": None,
+        "time_since": "2024-01-01T10:00:00Z",
+        "text": 'a "quoted" text, with {braces} and \\\\',
+        "billable": True,
+    },
+    "current_time": "2024-01-01T11:00:00Z",
+}
+
+
+def extract(document, paths, chunk_size=None):
+    data = json.dumps(document).encode()
+    chunk_size = chunk_size or len(data)
+    extractor = JsonExtractor(paths)
+    for start in range(0, len(data), chunk_size):
+        extractor.feed(data[start : start + chunk_size])
+    return extractor.finish()
+
+
+class TestJsonExtractor(unittest.TestCase):
+    def test_extracts_the_values_at_the_paths(self):
+        paths = ["running.id", "running.projects_id", "running.time_since"]
+
+        assert extract(CLOCK, paths) == {
+            "running.id": 7,
+            "running.projects_id": None,
+            "running.time_since": "2024-01-01T10:00:00Z",
+        }
+
+    def test_values_split_across_chunks_are_joined(self):
+        paths = ["running.customers_id", "running.text", "current_time"]
+        expected = extract(CLOCK, paths)
+
+        for chunk_size in (1, 2, 3, 7):
+            assert extract(CLOCK, paths, chunk_size) == expected
+        assert expected["running.text"] == CLOCK["running"]["text"]
+
+    def test_paths_missing_from_the_document_are_none(self):
+        values = extract({"running": None}, ["running.id"])
+
+        assert values == {"running.id": None}
+
+    def test_a_wildcard_collects_the_values_of_every_item(self):
+        document = {
+            "paging": {"count_pages": 2},
+            "entries": [
+                {"customers_id": 1, "nested": [{"customers_id": 9}]},
+                {"customers_id": 2, "nested": []},
+            ],
+        }
+
+        values = extract(document, ["entries.*.customers_id", "paging.count_pages"], 5)
+
+        assert values == {"entries.*.customers_id": [1, 2], "paging.count_pages": 2}
+
+    def test_a_truncated_document_raises_value_error(self):
+        extractor = JsonExtractor(["running.id"])
+        extractor.feed(b'{"running": {"id": 7')
+
+        with self.assertRaises(ValueError):
+            extractor.finish()
+
+
+if __name__ == "__main__":
+    unittest.main()
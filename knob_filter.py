@@ -0,0 +1,76 @@
+from array import array
+
+
+class KnobFilter:
+    """
+    Maps raw ADC samples to a stable index in range(count).
+
+    Samples are collected in a ring buffer, the median of the buffer removes
+    spikes and an integer exponential moving average smooths the rest. The
+    index only changes once the smoothed value has moved past the boundary of
+    the current band by `hysteresis`, so noise near a boundary cannot make it
+    flicker. Only integer arithmetic is used.
+    """
+
+    def __init__(self, count, max_value=4095, window=5, smoothing_shift=2):
+        self.max_value = max_value
+        self.window = window
+        self.smoothing_shift = smoothing_shift
+        self.samples = array("H", [0] * window)
+        self.sorted_samples = array("H", [0] * window)
+        self.position = 0
+        self.filled = 0
+        self.smoothed = None
+        self.set_count(count)
+
+    def set_count(self, count):
+        self.count = max(count, 1)
+        # width of each index band, rounded up so the last band ends at max_value
+        self.band = (self.max_value + self.count) // self.count
+        self.hysteresis = self.band // 4
+        self.index = None
+
+    def add(self, sample):
+        # called from a timer interrupt, must not allocate
+        self.samples[self.position] = sample
+        self.position = (self.position + 1) % self.window
+        if self.filled < self.window:
+            self.filled += 1
+
+    def median(self):
+        # insertion sort into a preallocated array
+        sorted_samples = self.sorted_samples
+        filled = self.filled
+        for i in range(filled):
+            sample = self.samples[i]
+            j = i
+            while j > 0 and sorted_samples[j - 1] > sample:
+                sorted_samples[j] = sorted_samples[j - 1]
+                j -= 1
+            sorted_samples[j] = sample
+        return sorted_samples[filled // 2]
+
+    def value(self):
+        if self.filled == 0:
+            return None
+
+        median = self.median()
+        if self.smoothed is None:
+            self.smoothed = median
+        else:
+            self.smoothed += (median - self.smoothed) >> self.smoothing_shift
+        return self.smoothed
+
+    def current_index(self):
+        value = self.value()
+        if value is None:
+            return self.index
+
+        if self.index is not None:
+            lower = self.index * self.band - self.hysteresis
+            upper = (self.index + 1) * self.band + self.hysteresis
+            if lower <= value < upper:
+                return self.index
+
+        self.index = min(value // self.band, self.count - 1)
+        return self.index
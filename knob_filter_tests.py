@@ -0,0 +1,83 @@
+import random
+import unittest
+from knob_filter import KnobFilter
+
+
+def noisy_trace(levels, samples_per_level, noise, spike_every=None, seed=1):
+    """An ADC trace resting at each of `levels` with gaussian noise and spikes."""
+    generator = random.Random(seed)
+    trace = []
+    for level in levels:
+        for i in range(samples_per_level):
+            sample = level + round(generator.gauss(0, noise))
+            if spike_every and i % spike_every == spike_every - 1:
+                sample = generator.choice((0, 4095))
+            trace.append(min(max(sample, 0), 4095))
+    return trace
+
+
+def replay(trace, task_count, samples_per_read=10):
+    """Feed the trace like the sampling timer and count index changes per read."""
+    knob_filter = KnobFilter(task_count)
+    indexes = []
+    for i, sample in enumerate(trace):
+        knob_filter.add(sample)
+        if i % samples_per_read == samples_per_read - 1:
+            indexes.append(knob_filter.current_index())
+    changes = sum(1 for a, b in zip(indexes, indexes[1:]) if a != b)
+    return indexes, changes
+
+
+def unfiltered_changes(trace, task_count, samples_per_read=10):
+    scale = task_count - 1
+    indexes = [
+        round((scale / 4095) * sample)
+        for sample in trace[samples_per_read - 1 :: samples_per_read]
+    ]
+    return sum(1 for a, b in zip(indexes, indexes[1:]) if a != b)
+
+
+class TestKnobFilter(unittest.TestCase):
+    def test_index_is_stable_while_resting_on_a_band_boundary(self):
+        # 4 tasks have a boundary at 2048
+        trace = noisy_trace([2048], 2000, noise=40, spike_every=37)
+
+        indexes, changes = replay(trace, 4)
+
+        assert changes <= 1
+        assert unfiltered_changes(trace, 4) > 50
+
+    def test_index_changes_once_per_band_when_turning_through_all_tasks(self):
+        task_count = 8
+        band = 4096 // task_count
+        levels = [band * i + band // 2 for i in range(task_count)]
+        trace = noisy_trace(levels, 200, noise=60, spike_every=23)
+
+        indexes, changes = replay(trace, task_count)
+
+        assert changes == task_count - 1
+        assert indexes[-1] == task_count - 1
+
+    def test_bands_cover_the_full_adc_range(self):
+        knob_filter = KnobFilter(3)
+        for sample in (0, 4095):
+            for _ in range(20):
+                knob_filter.add(sample)
+                index = knob_filter.current_index()
+            assert index == (0 if sample == 0 else 2)
+
+    def test_set_count_resets_the_index(self):
+        knob_filter = KnobFilter(2)
+        for _ in range(5):
+            knob_filter.add(4095)
+        assert knob_filter.current_index() == 1
+
+        knob_filter.set_count(5)
+        assert knob_filter.current_index() == 4
+
+    def test_without_samples_there_is_no_index(self):
+        assert KnobFilter(3).current_index() is None
+
+
+if __name__ == "__main__":
+    unittest.main()
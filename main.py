@@ -1,14 +1,154 @@
-import re
-import ntptime
-import network
 import gc
-import urequests
-from machine import ADC, Pin, SoftI2C, Timer
+from time import ticks_ms
+from boot_profile import BootProfile
+
+
+# BOOT
+
+
+class Boot:
+    profile = BootProfile()
+
+    @classmethod
+    def mark(cls, stage):
+        cls.profile.mark(stage, ticks_ms(), gc.mem_alloc())
+
+    @classmethod
+    def report(cls):
+        for line in cls.profile.report():
+            print(line)
+
+
+# marked before the other imports, loading them is part of the boot time
+Boot.mark("firmware start")
+
+import asyncio
+import network
+import esp32
+from machine import ADC, Pin, RTC, SoftI2C, Timer
+from machine import DEEPSLEEP_RESET, TIMER_WAKE
+from machine import deepsleep, lightsleep, reset_cause, wake_reason
 import json
 import ssd1306
-from time import localtime, mktime, gmtime, sleep, ticks_ms, ticks_diff
+from time import gmtime, mktime, ticks_add, ticks_diff, ticks_us, time
+from clock_poll import PollInterval, running_key
+from clock_sync import ClockRecord, parse_http_date
+from config_cache import ConfigCache
+from debounce import Debouncer
+from events import EventQueue
 from models import ClockodoTask
+from journal import Journal
+from knob_filter import KnobFilter
+from metrics import MetricsRegistry, largest_free_block
+from power import DutyCycle, IdlePolicy, TimerSnapshot
 from render_helpers import TextFormatting, TextScrolling
+from task_sync import MergedTasks, TaskSync, TaskTable
+from text_cache import TextCache
+from tracing import Tracer
+from wifi_cache import WifiCache, parse_ifconfig, strongest_access_point
+from widgets import Layout, Label, CenteredLabel, ScrollingLabel, TaskList, TimerLabel
+
+
+# METRICS
+
+
+class Metrics:
+    # frame times, display traffic, API latency and the heap: Metrics.report()
+    # from the REPL or GET /metrics on status_port
+    registry = MetricsRegistry()
+    frame_ms = registry.histogram("frame ms", (5, 10, 20, 50, 100, 200))
+    frame_bytes = registry.histogram("i2c bytes/frame", (0, 128, 256, 512, 1024))
+    i2c_bytes = registry.gauge("i2c bytes", lambda: Display.oled.flushed_bytes_total)
+    input_ms = registry.histogram("input to screen ms", (20, 50, 100, 200, 500))
+    http_ms = registry.histogram("http ms", (100, 200, 500, 1000, 2000, 5000))
+    http_failures = registry.counter("http failures")
+    clock_polls = registry.counter("clock polls")
+    clock_polls_not_modified = registry.counter("clock polls not modified")
+    presses_dropped = registry.counter("button presses dropped")
+    events_dropped = registry.counter("input events dropped")
+    toggles_cancelled = registry.counter("toggles cancelled")
+    heap_free = registry.gauge("heap free", gc.mem_free)
+    heap_alloc = registry.gauge("heap alloc", gc.mem_alloc)
+    # probes the heap, only done when the metrics are looked at
+    heap_largest_block = registry.gauge(
+        "heap largest free block", lambda: largest_free_block(gc.mem_free())
+    )
+
+    @classmethod
+    def report(cls):
+        for line in cls.registry.report():
+            print(line)
+
+
+class Status:
+    # a tiny HTTP server answering GET /metrics with the metrics as JSON
+    server = None
+
+    @classmethod
+    async def respond(cls, writer, status, body):
+        writer.write(
+            f"HTTP/1.0 {status}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode()
+        )
+        writer.write(body)
+        await writer.drain()
+
+    @classmethod
+    async def handle(cls, reader, writer):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+
+            if request_line.startswith(b"GET /metrics "):
+                body = json.dumps(Metrics.registry.snapshot()).encode()
+                await cls.respond(writer, "200 OK", body)
+            else:
+                await cls.respond(writer, "404 Not Found", b"{}")
+        except OSError:
+            pass
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    @classmethod
+    async def run(cls):
+        if Config.status_port:
+            cls.server = await asyncio.start_server(
+                cls.handle, "0.0.0.0", Config.status_port
+            )
+
+
+class Trace:
+    # spans around the hot paths in a ring buffer, dumped to trace.bin when an
+    # error is shown, see host/trace_to_perfetto.py
+    FILENAME = "trace.bin"
+
+    tracer = Tracer(ticks_us)
+    knob_turn = tracer.span("Knob.handle_turn")
+    button_push = tracer.span("Button.handle_push")
+    render = tracer.span("Display.render")
+    scroll = tracer.span("TextScrolling.advance")
+    restore_timer = tracer.span("ClockodoRequest.restore_timer", is_async=True)
+    replay_start = tracer.span("ClockodoRequest.replay_start", is_async=True)
+    replay_entry = tracer.span("ClockodoRequest.replay_entry", is_async=True)
+    replay_stop = tracer.span("ClockodoRequest.replay_stop", is_async=True)
+    wifi_connect = tracer.span("Wifi.connect", is_async=True)
+    dumped_error = None
+
+    @classmethod
+    def dump(cls):
+        try:
+            cls.tracer.dump(cls.FILENAME)
+        except OSError:
+            pass
+
+    @classmethod
+    def dump_for(cls, error):
+        # once per error, showing it again does not wear the flash
+        if cls.tracer.enabled and error != cls.dumped_error:
+            cls.dumped_error = error
+            cls.dump()
 
 
 # APPLICATION STATE
@@ -16,7 +156,7 @@ from render_helpers import TextFormatting, TextScrolling
 
 class State:
     error: str | None = None
-    triggered_request = None
+    progress: str | None = None
 
     selected_task_index = None
 
@@ -24,11 +164,14 @@ class State:
     active_entry_id = None
     timer_started_at: int | None = None
 
+    events = EventQueue()
+
     @classmethod
     def change_for_clock_start(cls, active_task, entry_id, timer_started_at):
         cls.active_task = active_task
         cls.active_entry_id = entry_id
         cls.timer_started_at = timer_started_at
+        TimerTicks.start(timer_started_at)
 
     @classmethod
     def change_for_clock_stop(cls):
@@ -48,21 +191,54 @@ class State:
 
             return
 
+        if cls.progress == Progress.RESTORING:
+            return
+
         if cls.active_task:
-            cls.triggered_request = ClockodoRequest.stop_clock
-        else:
-            cls.triggered_request = ClockodoRequest.start_clock
+            ClockodoRequest.stop_clock()
+        elif cls.selected_task_index is not None and Config.tasks:
+            ClockodoRequest.start_clock()
+
+    @classmethod
+    def apply(cls, kind, value):
+        if kind == Event.KNOB_TURN:
+            cls.change_for_knob_turn(value)
+        elif kind == Event.BUTTON_PUSH:
+            cls.change_for_button_push()
+
+    @classmethod
+    async def run(cls):
+        while True:
+            kind, value = await cls.events.get()
+            if Power.touch() and kind == Event.BUTTON_PUSH:
+                # the push only woke the screen up
+                continue
+
+            cls.apply(kind, value)
+            Display.invalidate()
+
+
+class Event:
+    KNOB_TURN = "KNOB_TURN"
+    BUTTON_PUSH = "BUTTON_PUSH"
+
+
+class Progress:
+    RESTORING = "RESTORING"
+    STARTING = "STARTING"
+    STOPPING = "STOPPING"
+    QUEUED = "QUEUED"
 
 
 class Error:
     GENERAL = "GENERAL"
-    WIFI_CONNECTION = "WIFI_CONNECTION"
     CONFIG_READ = "CONFIG_READ"
     CONFIG_PARSE = "CONFIG_PARSE"
     CONFIG_API = "CONFIG_API"
     CONFIG_WIFI = "CONFIG_WIFI"
     CONFIG_SERVICE_ID = "CONFIG_SERVICE_ID"
     API_REQUEST = "API_REQUEST"
+    JOURNAL = "JOURNAL"
 
 
 # CONFIG
@@ -71,97 +247,301 @@ class Error:
 class Config:
     class File:
         FILENAME = "config.json"
+        # parsed and validated config.json, loaded instead of parsing it again
+        cache = ConfigCache("config.bin")
+        # "cache" or "json", where the config was loaded from
+        source = None
 
         @classmethod
-        def read_and_parse(cls):
+        def read(cls):
             try:
-                with open(cls.FILENAME) as file:
-                    return json.load(file)
+                with open(cls.FILENAME, "rb") as file:
+                    return file.read()
             except OSError:
                 State.error = Error.CONFIG_READ
-            except json.JSONDecodeError:
+                return b""
+
+        @staticmethod
+        def parse(source):
+            try:
+                return json.loads(source)
+            except ValueError:
                 State.error = Error.CONFIG_PARSE
-            return {}
+                return {}
 
     class Wifi:
         essid = None
         password = None
+        # (ip, netmask, gateway, dns) instead of DHCP
+        static_ip = None
+
+    # the settings in config.json with their defaults
+    DEFAULTS = {
+        "api_key": None,
+        "api_user": None,
+        "service_id": None,
+        "wifi_essid": None,
+        "wifi_password": None,
+        # "ip,netmask,gateway,dns"
+        "wifi_static_ip": None,
+        "sync_tasks": True,
+        "task_max_age_hours": 24,
+        "metrics": True,
+        "trace": False,
+        # serves GET /metrics when set
+        "status_port": None,
+        "button_debounce_ms": 20,
+        # a second press within this is a double press
+        "button_repeat_ms": 400,
+    }
 
     api_key = None
     api_user = None
+    service_id = None
     wifi = Wifi
-    tasks = []
+    # the tasks from config.json, shown in front of the synced ones
+    pinned_tasks = []
+    tasks = MergedTasks([])
+    sync_tasks = True
+    task_max_age_hours = 24
+    metrics = True
+    trace = False
+    status_port = None
+    button_debounce_ms = 20
+    button_repeat_ms = 400
 
     @classmethod
     def validate(cls):
         if not cls.wifi.essid or not cls.wifi.password:
             State.error = Error.CONFIG_WIFI
+        elif cls.wifi.static_ip == ():
+            State.error = Error.CONFIG_WIFI
         elif not cls.api_key or not cls.api_user:
             State.error = Error.CONFIG_API
         elif not cls.service_id:
             State.error = Error.CONFIG_SERVICE_ID
 
     @classmethod
-    def load(cls):
-        config_dict = cls.File.read_and_parse()
-        cls.api_key = config_dict.get("api_key")
-        cls.api_user = config_dict.get("api_user")
-        cls.service_id = config_dict.get("service_id")
-        cls.wifi.essid = config_dict.get("wifi_essid")
-        cls.wifi.password = config_dict.get("wifi_password")
-
-        cls.tasks = []
+    def apply(cls, settings, tasks):
+        cls.api_key = settings["api_key"]
+        cls.api_user = settings["api_user"]
+        cls.service_id = settings["service_id"]
+        cls.wifi.essid = settings["wifi_essid"]
+        cls.wifi.password = settings["wifi_password"]
+        static_ip = settings["wifi_static_ip"]
+        try:
+            cls.wifi.static_ip = static_ip and parse_ifconfig(static_ip)
+        except ValueError:
+            # reported by validate
+            cls.wifi.static_ip = ()
+        cls.sync_tasks = settings["sync_tasks"]
+        cls.task_max_age_hours = settings["task_max_age_hours"]
+        cls.metrics = settings["metrics"]
+        cls.trace = settings["trace"]
+        cls.status_port = settings["status_port"]
+        cls.button_debounce_ms = settings["button_debounce_ms"]
+        cls.button_repeat_ms = settings["button_repeat_ms"]
+
+        cls.pinned_tasks = tasks
+        cls.set_tasks(MergedTasks(tasks))
+
+    @classmethod
+    def parse(cls, source):
+        config_dict = cls.File.parse(source)
+        settings = {}
+        for name, default in cls.DEFAULTS.items():
+            settings[name] = config_dict.get(name, default)
+
+        tasks = []
         config_tasks = config_dict.get("tasks", [])
         for task_data in config_tasks:
             task = ClockodoTask.from_dict(task_data)
 
             if task is not None:
-                cls.tasks.append(task)
+                tasks.append(task)
+        return settings, tasks
+
+    @classmethod
+    def load(cls):
+        source = cls.File.read()
+        cache = len(source) >= ConfigCache.MIN_SOURCE_BYTES
+        if cache:
+            digest = ConfigCache.digest(source, cls.DEFAULTS)
+            cached = cls.File.cache.load(digest)
+            if cached is not None:
+                cls.File.source = "cache"
+                cls.apply(*cached)
+                return
 
+        cls.File.source = "json"
+        settings, tasks = cls.parse(source)
+        cls.apply(settings, tasks)
         cls.validate()
+        if State.error is not None or not cache:
+            return
+
+        try:
+            cls.File.cache.save(digest, settings, tasks)
+        except (OSError, TypeError, OverflowError):
+            # parsed from config.json again on the next boot
+            pass
+
+    @classmethod
+    def set_tasks(cls, tasks):
+        cls.tasks = tasks
+
+    @classmethod
+    def find_task(cls, customer_id, project_id):
+        return cls.tasks.find(customer_id, project_id)
 
 
 # WIFI
 
 
 class Wifi:
+    # connects in the background, first to the cached access point and lease,
+    # and reconnects when the link drops
     CONNECTION_TIMEOUT = 10000
-    station_interface = network.WLAN(network.STA_IF)
-    access_point_interface = network.WLAN(network.AP_IF)
-    last_connect_at = None
+    WARM_CONNECTION_TIMEOUT = 3000
+    POLL_MS = 50
+    WATCH_PERIOD_MS = 2000
+    RETRY_MS = 5000
+    MAX_RETRY_MS = 300000
+
+    # created on the first connect, initialising the radio takes a while and
+    # should not delay the splash screen
+    station_interface = None
+    access_point_interface = None
+    cache = WifiCache("wifi.json")
     essid = None
     password = None
+    static_ip = None
+    connect_ms = None
 
     @classmethod
-    def wait_for_connection(cls):
+    async def wait_for_connection(cls, timeout_ms):
+        started_at = ticks_ms()
         while not cls.station_interface.isconnected():
-            diff = ticks_diff(ticks_ms(), cls.last_connect_at)
-            if diff < cls.CONNECTION_TIMEOUT:
-                continue
+            if ticks_diff(ticks_ms(), started_at) >= timeout_ms:
+                return False
+            await asyncio.sleep_ms(cls.POLL_MS)
+        return True
+
+    @classmethod
+    async def attempt(cls, bssid, ifconfig, timeout_ms):
+        station = cls.station_interface
+        try:
+            station.disconnect()
+            # a static address skips DHCP
+            station.ifconfig(ifconfig)
+            if bssid is None:
+                station.connect(cls.essid, cls.password)
             else:
-                break
+                station.connect(cls.essid, cls.password, bssid=bssid)
+        except OSError:
+            # "Wifi Internal Error" or an invalid state of the driver
+            return False
+        return await cls.wait_for_connection(timeout_ms)
 
-        if not cls.station_interface.isconnected():
-            raise
+    @classmethod
+    async def warm_connect(cls):
+        cached = cls.cache.load()
+        if cached is None:
+            return False
+
+        bssid, _, lease = cached
+        ifconfig = cls.static_ip or lease
+        if await cls.attempt(bssid, ifconfig, cls.WARM_CONNECTION_TIMEOUT):
+            return True
+
+        # the access point or the network changed
+        cls.cache.clear()
+        return False
 
     @classmethod
-    def connect(cls):
-        if cls.station_interface.isconnected():
-            return
+    async def cold_connect(cls):
+        # scanning blocks, but only happens without a usable cache. It fails
+        # while the station is still connecting after a failed attempt.
+        station = cls.station_interface
+        try:
+            station.disconnect()
+            access_points = station.scan()
+        except OSError:
+            access_points = []
+        access_point = strongest_access_point(access_points, cls.essid)
+        bssid = access_point and access_point[0]
+        ifconfig = cls.static_ip or "dhcp"
+        if not await cls.attempt(bssid, ifconfig, cls.CONNECTION_TIMEOUT):
+            return False
+
+        if access_point is not None:
+            try:
+                cls.cache.save(*access_point, cls.station_interface.ifconfig())
+            except OSError:
+                pass
+        return True
 
+    @classmethod
+    async def connect(cls):
         if not cls.essid or not cls.password:
-            return
+            return False
+
+        if cls.station_interface is None:
+            cls.station_interface = network.WLAN(network.STA_IF)
+            cls.access_point_interface = network.WLAN(network.AP_IF)
+
+        if cls.station_interface.isconnected():
+            return True
 
         cls.station_interface.active(True)
         cls.access_point_interface.active(False)
 
-        cls.last_connect_at = ticks_ms()
+        started_at = ticks_ms()
+        with Trace.wifi_connect:
+            if await cls.warm_connect():
+                kind = "warm"
+            elif await cls.cold_connect():
+                kind = "cold"
+            else:
+                kind = None
+
+        if kind is None:
+            cls.offline()
+            return False
 
-        try:
-            cls.station_interface.connect(cls.essid, cls.password)
-            cls.wait_for_connection()
-        except:
-            State.error = Error.WIFI_CONNECTION
+        cls.connect_ms = ticks_diff(ticks_ms(), started_at)
+        print(f"wifi connected ({kind}): {cls.connect_ms} ms")
+        # sends what was queued meanwhile, which clears "(offline)"
+        ClockodoRequest.triggered.set()
+        ClockPoll.nudge()
+        return True
+
+    @classmethod
+    def connected(cls):
+        return cls.station_interface is not None and cls.station_interface.isconnected()
+
+    @staticmethod
+    def offline():
+        # like an unreachable API: starts and stops are queued in the journal
+        if State.progress is None:
+            State.progress = Progress.QUEUED
+        Display.invalidate()
+
+    @classmethod
+    async def run(cls):
+        # reconnects a dropped link, without waiting for a request to fail
+        retry_ms = cls.RETRY_MS
+        while True:
+            await asyncio.sleep_ms(cls.WATCH_PERIOD_MS)
+            if cls.station_interface is None or cls.station_interface.isconnected():
+                continue
+
+            cls.offline()
+            if await cls.connect():
+                retry_ms = cls.RETRY_MS
+            else:
+                await asyncio.sleep_ms(retry_ms)
+                retry_ms = min(retry_ms * 2, cls.MAX_RETRY_MS)
 
 
 # PERIPHERALS
@@ -170,167 +550,487 @@ class Wifi:
 class Knob:
     MAX_ATTN_VALUE = 4095
     GPIO_PIN = 36
+    SAMPLE_PERIOD_MS = 50
+    OVERSAMPLE_PERIOD_MS = 5
 
-    scale = MAX_ATTN_VALUE
     poti = ADC(Pin(GPIO_PIN))
     poti.atten(ADC.ATTN_11DB)
+    filter = KnobFilter(1, MAX_ATTN_VALUE)
+    sampler = Timer(1)
     previous_value = 0
+    sleep_reading = 0
 
     @classmethod
-    def scale_value(cls, value):
-        return round((cls.scale / 4095) * value)
+    def set_task_count(cls, count):
+        cls.filter.set_count(count)
 
     @classmethod
-    def value(cls):
-        read_value = cls.poti.read()
-        result = cls.scale_value(read_value)
-        return result
+    def sample(cls, _):
+        cls.filter.add(cls.poti.read())
+
+    @classmethod
+    def remember_position(cls):
+        cls.sleep_reading = cls.poti.read()
+
+    @classmethod
+    def moved(cls):
+        # compared to the position before sleeping, the sampler does not run
+        # while the device sleeps
+        return abs(cls.poti.read() - cls.sleep_reading) > cls.filter.band // 2
 
     @classmethod
     def handle_turn(cls):
-        current_value = cls.value()
+        began_at = ticks_us()
+        current_value = cls.filter.current_index()
+
+        if current_value is not None and current_value != cls.previous_value:
+            if not State.events.put(Event.KNOB_TURN, current_value, replace=True):
+                # queued on one of the next samples, once there is room
+                Metrics.events_dropped.add()
+                return
 
-        if current_value != cls.previous_value:
             cls.previous_value = current_value
-            State.change_for_knob_turn(current_value)
+            # only turns are traced, the knob is polled all the time
+            Trace.knob_turn.record(began_at)
+
+    @classmethod
+    async def run(cls):
+        cls.sampler.init(
+            period=cls.OVERSAMPLE_PERIOD_MS, mode=Timer.PERIODIC, callback=cls.sample
+        )
+
+        while True:
+            cls.handle_turn()
+            await asyncio.sleep_ms(cls.SAMPLE_PERIOD_MS)
 
 
 class Button:
+    # the IRQ feeds the debouncer, a repeated press while the previous request
+    # is still in flight is dropped
     GPIO_PIN = 15
     pin = Pin(GPIO_PIN, Pin.IN, Pin.PULL_UP)
-    previous_value = 1
+    # replaced with the configured timing in init
+    debouncer = Debouncer(diff=ticks_diff)
+    edge = asyncio.ThreadSafeFlag()
+
+    @classmethod
+    def handle_edge(cls, pin):
+        cls.debouncer.edge(pin.value(), ticks_ms())
+        cls.edge.set()
 
     @classmethod
     def handle_push(cls):
-        current_value = cls.pin.value()
+        with Trace.button_push:
+            cls.read_push()
+
+    @classmethod
+    def read_push(cls):
+        debouncer = cls.debouncer
+        if not debouncer.poll(cls.pin.value(), ticks_ms()):
+            return
+
+        if debouncer.repeat and State.progress in (
+            Progress.STARTING,
+            Progress.STOPPING,
+        ):
+            Metrics.presses_dropped.add()
+            return
 
-        if current_value == 0 and cls.previous_value == 1:
-            cls.previous_value = 0
-            State.change_for_button_push()
+        if not State.events.put(Event.BUTTON_PUSH):
+            Metrics.events_dropped.add()
+            return
 
-        elif current_value == 1:
-            cls.previous_value = 1
+        Latency.start(debouncer.pressed_at)
+
+    @classmethod
+    async def run(cls):
+        cls.pin.irq(trigger=Pin.IRQ_FALLING | Pin.IRQ_RISING, handler=cls.handle_edge)
+
+        while True:
+            await cls.edge.wait()
+            # until the pin rests, edges while waiting only set the flag again
+            while not cls.debouncer.settled(ticks_ms()):
+                await asyncio.sleep_ms(cls.debouncer.settle_ms)
+            cls.handle_push()
+
+
+class Latency:
+    # time from a button edge until the screen shows its result
+    started_at = None
+    last_ms = None
+    max_ms = 0
+
+    @classmethod
+    def start(cls, edge_at):
+        cls.started_at = edge_at
+
+    @classmethod
+    def stop(cls):
+        if cls.started_at is None:
+            return
+
+        cls.last_ms = ticks_diff(ticks_ms(), cls.started_at)
+        cls.max_ms = max(cls.max_ms, cls.last_ms)
+        cls.started_at = None
+        Metrics.input_ms.record(cls.last_ms)
+        print(f"button to screen: {cls.last_ms} ms (max {cls.max_ms} ms)")
 
 
 class Display:
     SCL_PIN = 22
     SDA_PIN = 21
-    WIDTH = 128
-    HEIGHT = 64
-    CHAR_WIDTH = 8
-    LINE_HEIGHT = 10
-    CHARS_PER_LINE = round(WIDTH / CHAR_WIDTH)
+    WIDTH = Layout.WIDTH
+    HEIGHT = Layout.HEIGHT
+    ANIMATION_PERIOD_MS = 500
+    FRAME_BUDGET_MS = 50
+    TEXT_CACHE_BYTES = 2048
+
+    TEXT_FOR_ERROR = {
+        Error.GENERAL: "Error!",
+        Error.API_REQUEST: "API request failed!",
+        Error.JOURNAL: "Journal write error!",
+        Error.CONFIG_READ: "Config read error!",
+        Error.CONFIG_PARSE: "Config parse error!",
+        Error.CONFIG_WIFI: "Please configure WIFI credentials!",
+        Error.CONFIG_API: "Please configure API credentials!",
+        Error.CONFIG_SERVICE_ID: "Please configure a service ID!",
+    }
 
     scl = Pin(SCL_PIN)
     sda = Pin(SDA_PIN)
     i2c = SoftI2C(scl=scl, sda=sda)
     oled = ssd1306.SSD1306_I2C(WIDTH, HEIGHT, i2c)
-    scroll_timer = Timer(0).init(
-        period=500, mode=Timer.PERIODIC, callback=lambda _: TextScrolling.scroll()
-    )
+    invalidated = asyncio.Event()
+    frame_ms = 0
+    Layout.text_cache = TextCache(TEXT_CACHE_BYTES)
 
-    @classmethod
-    def wrapped_text(cls, text, start_line=0, max_line=None):
-        text_segments = TextFormatting.split_for_wrapping(text, cls.CHARS_PER_LINE)
+    class Screen:
+        short_error = (CenteredLabel(3),)
+        long_error = (Label(2, lines=5),)
+        pending = (CenteredLabel(2),)
+        timer = (ScrollingLabel(0), CenteredLabel(3), TimerLabel(5))
+        task_selection = (CenteredLabel(0), TaskList(3))
+        splash = (CenteredLabel(2),)
 
-        for i, segment in enumerate(text_segments):
-            position = (start_line + i) * cls.LINE_HEIGHT
-            if max_line is None or position <= max_line * cls.LINE_HEIGHT:
-                cls.oled.text(segment, 0, position)
-            else:
-                break
+    screen = None
 
     @classmethod
-    def centered_text(cls, text, line):
-        margin_left = 0
-        text_length = len(text)
-        if text_length < cls.CHARS_PER_LINE:
-            margin_left = round((cls.WIDTH - text_length * cls.CHAR_WIDTH) / 2)
-
-        cls.oled.text(text, margin_left, line * cls.LINE_HEIGHT)
+    def switch_screen(cls, screen):
+        if screen is cls.screen:
+            return screen
 
-    @classmethod
-    def text(cls, text, line):
-        cls.oled.text(text, 0, line * cls.LINE_HEIGHT)
+        cls.screen = screen
+        cls.oled.fill(0)
+        for widget in screen:
+            widget.invalidate()
+        return screen
 
     @classmethod
     def render_error(cls, error):
-        text_for_error = {
-            Error.GENERAL: "Error!",
-            Error.WIFI_CONNECTION: "WIFI connection error!",
-            Error.API_REQUEST: "API request failed!",
-            Error.CONFIG_READ: "Config read error!",
-            Error.CONFIG_PARSE: "Config parse error!",
-            Error.CONFIG_WIFI: "Please configure WIFI credentials!",
-            Error.CONFIG_API: "Please configure API credentials!",
-            Error.CONFIG_SERVICE_ID: "Please configure a service ID!",
-        }
-
-        text = text_for_error[error]
-        if len(text) < cls.CHARS_PER_LINE:
-            cls.centered_text(text, 3)
+        Trace.dump_for(error)
+        text = cls.TEXT_FOR_ERROR[error]
+        if len(text) < Layout.CHARS_PER_LINE:
+            (label,) = cls.switch_screen(cls.Screen.short_error)
         else:
-            cls.wrapped_text(text, 2)
+            (label,) = cls.switch_screen(cls.Screen.long_error)
+        label.update(text)
+
+    @staticmethod
+    def timer_caption():
+        if State.progress == Progress.STARTING:
+            return "Starting..."
+        elif State.progress == Progress.QUEUED:
+            return "Timer (offline)"
+        return "Timer"
+
+    @staticmethod
+    def task_selection_title():
+        if State.progress == Progress.STOPPING:
+            return "Stopping..."
+        elif State.progress == Progress.QUEUED:
+            return "Select (offline)"
+        return "Select Task"
 
     @classmethod
     def render(cls):
-        cls.oled.fill(0)
-
         if State.error is not None:
             cls.render_error(State.error)
-        elif State.triggered_request is not None:
-            cls.centered_text("...", 2)
+        elif State.progress == Progress.RESTORING:
+            (label,) = cls.switch_screen(cls.Screen.pending)
+            label.update("...")
         elif State.active_task is not None and State.timer_started_at is not None:
-            now = mktime(gmtime())
-            seconds_elapsed = now - State.timer_started_at
-            timer_text = TextFormatting.format_time(seconds_elapsed)
+            task_label, caption, timer = cls.switch_screen(cls.Screen.timer)
+            task_label.update(State.active_task.name)
+            caption.update(cls.timer_caption())
+            timer.update(TimerTicks.seconds())
+        elif State.selected_task_index is not None:
+            title, task_list = cls.switch_screen(cls.Screen.task_selection)
+            title.update(cls.task_selection_title())
+            if task_list.tasks is not Config.tasks:
+                task_list.set_tasks(Config.tasks)
+            task_list.update(State.selected_task_index)
+        else:
+            (label,) = cls.switch_screen(cls.Screen.splash)
+            label.update("clocko:ctrl")
 
-            task_name = State.active_task.name
-            text, is_scrolling = TextScrolling.maybe_scroll(
-                task_name, cls.CHARS_PER_LINE
-            )
-            if is_scrolling:
-                cls.text(text, 0)
-            else:
-                cls.centered_text(text, 0)
+        changed = False
+        for widget in cls.screen:
+            if widget.render(cls.oled):
+                changed = True
 
-            cls.centered_text("Timer", 3)
-            cls.centered_text(timer_text, 5)
-        elif State.selected_task_index is not None:
-            selected_task_index = State.selected_task_index
-            cls.centered_text("Select Task", 0)
+        if changed:
+            cls.oled.show()
+
+    @classmethod
+    def invalidate(cls):
+        cls.invalidated.set()
+
+    @classmethod
+    async def run(cls):
+        while True:
+            await cls.invalidated.wait()
+            cls.invalidated.clear()
+            if Power.blanked():
+                # Power invalidates the display again when waking up
+                continue
+
+            started_at = ticks_ms()
+            flushed_bytes = cls.oled.flushed_bytes_total
+            with Trace.render:
+                cls.render()
+            cls.frame_ms = ticks_diff(ticks_ms(), started_at)
+            Metrics.frame_ms.record(cls.frame_ms)
+            Metrics.frame_bytes.record(cls.oled.flushed_bytes_total - flushed_bytes)
+            if cls.frame_ms > cls.FRAME_BUDGET_MS:
+                print(f"slow frame: {cls.frame_ms} ms")
+            Latency.stop()
 
-            if len(Config.tasks) == 0:
-                cls.wrapped_text("No tasks configured", 3)
+    @classmethod
+    async def animate(cls):
+        # scrolls long task names
+        while True:
+            await asyncio.sleep_ms(cls.ANIMATION_PERIOD_MS)
+
+            if Power.blanked():
+                continue
+            elif TextScrolling.text is not None:
+                with Trace.scroll:
+                    TextScrolling.advance()
+                cls.invalidate()
+
+    @classmethod
+    async def tick(cls):
+        # renders the running timer once per second, when the shown one changes
+        while True:
+            if Power.blanked():
+                # the missed seconds are skipped, waking up shows the current one
+                await Power.awake.wait()
+            elif State.timer_started_at is None:
+                await asyncio.sleep_ms(cls.ANIMATION_PERIOD_MS)
             else:
-                task_name = Config.tasks[selected_task_index].name
-                underline_width = len(task_name) * cls.CHAR_WIDTH
-                cls.oled.hline(0, 38, underline_width, 2)
+                await asyncio.sleep_ms(TimerTicks.ms_to_next_second())
+                cls.invalidate()
+
+
+# TIME
+
+
+class RtcMemory:
+    # survives resets and deep sleep but not a power loss
+    TIMER_AT = 0
+    CLOCK_AT = TimerSnapshot.SIZE
+
+    rtc = RTC()
+
+    @classmethod
+    def read(cls, offset, size):
+        return cls.rtc.memory()[offset : offset + size]
 
-                for i, task in enumerate(Config.tasks):
-                    if i < selected_task_index - 1:
-                        continue
+    @classmethod
+    def write(cls, offset, data):
+        memory = bytearray(cls.rtc.memory())
+        end = offset + len(data)
+        if len(memory) < end:
+            memory.extend(bytes(end - len(memory)))
+        memory[offset:end] = data
+        cls.rtc.memory(memory)
+
+
+class Clock:
+    # keeps the RTC in time from NTP or the API's Date header, times taken before
+    # the first sync after a power loss are moved by the offset found
+    SYNC_PERIOD_MS = 3600000
+    CORRECT_PERIOD_MS = 60000
+    RETRY_MS = 10000
+    MAX_RETRY_MS = 600000
+    NTP_TIMEOUT_SECONDS = 1
+    # Date headers have a resolution of a second and include the latency
+    DATE_TOLERANCE_SECONDS = 2
+    # a clock earlier than this has not been set since the RTC started over
+    EARLIEST_TIME = (2026, 1, 1, 0, 0, 0, 0, 0, 0)
+
+    record = ClockRecord()
+    trusted = asyncio.Event()
+    ntp_available = False
+
+    @classmethod
+    def set(cls, now):
+        year, month, day, hour, minute, second, weekday = gmtime(now)[:7]
+        # the RTC counts weekdays from 1
+        weekday += 1
+        RtcMemory.rtc.datetime((year, month, day, weekday, hour, minute, second, 0))
 
-                    task_name = task.name
-                    if i == selected_task_index:
-                        task_name, _ = TextScrolling.maybe_scroll(
-                            task_name, cls.CHARS_PER_LINE
-                        )
+    @classmethod
+    def save(cls):
+        RtcMemory.write(RtcMemory.CLOCK_AT, cls.record.pack())
 
-                    line = 3 + (i - selected_task_index)
-                    cls.text(task_name, line)
+    @classmethod
+    def load(cls):
+        data = RtcMemory.read(RtcMemory.CLOCK_AT, ClockRecord.SIZE)
+        record = ClockRecord.unpack(data)
+        if record is None:
+            if time() >= mktime(cls.EARLIEST_TIME):
+                cls.trusted.set()
+            return
 
+        cls.record = record
+        if time() < record.synced_at:
+            # the RTC started over, the last known good time is closer
+            cls.set(record.synced_at)
         else:
-            cls.centered_text("clocko:ctrl", 2)
+            cls.correct()
+            cls.trusted.set()
+
+    @classmethod
+    def correct(cls):
+        now = time()
+        corrected = cls.record.correct(now)
+        if corrected != now:
+            cls.set(corrected)
+            cls.save()
+
+    @classmethod
+    def synced(cls, reference, measure=True):
+        cls.correct()
+        local = time()
+        offset = reference - local
+        cls.record.sync(local, reference, measure)
+        cls.save()
+        if offset:
+            cls.set(reference)
+
+        if not cls.trusted.is_set():
+            journal = ClockodoRequest.journal
+            running_event = journal.running_event()
+            if State.timer_started_at is not None:
+                if running_event and journal.recorded_since_load(running_event):
+                    # started by a clock off by the offset
+                    State.timer_started_at += offset
+                else:
+                    # restored from a good time, counted from the clock off by it
+                    TimerTicks.start(State.timer_started_at)
+            journal.shift(offset)
+            cls.trusted.set()
+        if offset:
+            print(f"clock set by {offset} s")
+            Display.invalidate()
+
+    @classmethod
+    def observe(cls, date):
+        # the Date header of a response, only needed without NTP
+        if cls.ntp_available or date is None:
+            return
+
+        reference = parse_http_date(date)
+        if reference is None:
+            return
+        if (
+            not cls.trusted.is_set()
+            or abs(reference - time()) > cls.DATE_TOLERANCE_SECONDS
+        ):
+            # too coarse to measure the drift with
+            cls.synced(reference, measure=False)
+
+    @classmethod
+    async def run(cls):
+        # only needed once, loaded after the splash screen is shown
+        import ntptime
+
+        # the query blocks, for this long at most
+        ntptime.timeout = cls.NTP_TIMEOUT_SECONDS
+        synced_at = None
+        retry_ms = cls.RETRY_MS
+
+        while True:
+            due = synced_at is None
+            if not due:
+                due = ticks_diff(ticks_ms(), synced_at) >= cls.SYNC_PERIOD_MS
+
+            if due:
+                try:
+                    reference = ntptime.time()
+                except (OSError, OverflowError, IndexError):
+                    cls.ntp_available = False
+                    await asyncio.sleep_ms(retry_ms)
+                    retry_ms = min(retry_ms * 2, cls.MAX_RETRY_MS)
+                    continue
+
+                cls.synced(reference)
+                cls.ntp_available = True
+                synced_at = ticks_ms()
+                retry_ms = cls.RETRY_MS
+            else:
+                cls.correct()
+
+            await asyncio.sleep_ms(cls.CORRECT_PERIOD_MS)
 
-        cls.oled.show()
+
+class TimerTicks:
+    # elapsed time of the running timer in ticks_ms, clock syncs do not step it
+    # ticks_diff only covers about six days, the anchor moves up long before
+    REBASE_MS = 3600000
+
+    base_seconds = 0
+    anchor_ms = 0
+
+    @classmethod
+    def start(cls, timer_started_at):
+        cls.base_seconds = time() - timer_started_at
+        cls.anchor_ms = ticks_ms()
+
+    @classmethod
+    def elapsed_ms(cls):
+        since_ms = ticks_diff(ticks_ms(), cls.anchor_ms)
+        if since_ms >= cls.REBASE_MS:
+            seconds = since_ms // 1000
+            cls.base_seconds += seconds
+            cls.anchor_ms = ticks_add(cls.anchor_ms, seconds * 1000)
+            since_ms -= seconds * 1000
+        return cls.base_seconds * 1000 + since_ms
+
+    @classmethod
+    def seconds(cls):
+        return cls.elapsed_ms() // 1000
+
+    @classmethod
+    def ms_to_next_second(cls):
+        return 1000 - cls.elapsed_ms() % 1000
 
 
 # API INTERACTION
 
 
 class ClockodoClient:
+    # each request names the fields it needs, only those are kept
     BASE_URL = "https://my.clockodo.com/api/v2"
+    RUNNING_FIELDS = ("id", "customers_id", "projects_id", "time_since")
+    ENTRY_FIELDS = ("customers_id", "time_since")
+    PAGE_FIELDS = {
+        "customers": ("id", "name"),
+        "projects": ("id", "customers_id", "name"),
+    }
+
+    session = None
 
     @staticmethod
     def headers():
@@ -341,104 +1041,709 @@ class ClockodoClient:
         }
 
     @classmethod
-    def endpoint(cls, name):
-        return f"{cls.BASE_URL}/{name}"
+    def connection(cls):
+        if cls.session is None:
+            import http_client
+
+            cls.session = http_client.Session(cls.BASE_URL, cls.headers())
+        return cls.session
 
     @classmethod
-    def start_clock(cls, task):
+    async def request(cls, method, name, data=None, paths=None, headers=None):
+        started_at = ticks_ms()
+        try:
+            response = await cls.connection().request(
+                method, name, data, paths=paths, headers=headers
+            )
+        except Exception:
+            Metrics.http_failures.add()
+            raise
+        finally:
+            Metrics.http_ms.record(ticks_diff(ticks_ms(), started_at))
+        Clock.observe(response.headers.get("date"))
+        return response
+
+    @staticmethod
+    def paths(prefix, fields):
+        return [f"{prefix}.{field}" for field in fields]
+
+    @classmethod
+    def running_entry(cls, response):
+        # the running entry with RUNNING_FIELDS, None when the clock is stopped
+        values = response.values
+        if values["running.id"] is None:
+            return None
+        return {field: values[f"running.{field}"] for field in cls.RUNNING_FIELDS}
+
+    @staticmethod
+    def items(response, kind, fields):
+        # the lists extracted per field, zipped back into one dict per item
+        columns = [response.values[f"{kind}.*.{field}"] for field in fields]
+        return [dict(zip(fields, row)) for row in zip(*columns)]
+
+    @classmethod
+    async def start_clock(cls, customer_id, project_id, time_since):
         data = {
-            "customers_id": task.customer_id,
-            "projects_id": task.project_id,
+            "customers_id": customer_id,
+            "projects_id": project_id,
             "services_id": Config.service_id,
+            "time_since": TextFormatting.format_timestamp(time_since),
         }
-        return urequests.post(cls.endpoint("clock"), headers=cls.headers(), json=data)
+        return await cls.request(
+            "POST", "clock", data, paths=("running.id",)
+        )
 
     @classmethod
-    def stop_clock(cls, entry_id):
-        return urequests.delete(
-            cls.endpoint(f"clock/{entry_id}"), headers=cls.headers()
+    async def stop_clock(cls, entry_id):
+        return await cls.request(
+            "DELETE", f"clock/{entry_id}", paths=()
         )
 
     @classmethod
-    def get_clock(cls):
-        return urequests.get(cls.endpoint("clock"), headers=cls.headers())
+    async def get_clock(cls, etag=None):
+        # answered with 304 and no body while the clock still matches `etag`
+        paths = cls.paths("running", cls.RUNNING_FIELDS)
+        headers = {"If-None-Match": etag} if etag else None
+        return await cls.request("GET", "clock", paths=paths, headers=headers)
+
+    @classmethod
+    async def billable_default(cls, customer_id, project_id):
+        # what the API books a clock started for the task as, None if unknown
+        if project_id is not None:
+            name, path = f"projects/{project_id}", "project.billable_default"
+        else:
+            name, path = f"customers/{customer_id}", "customer.billable_default"
+        response = await cls.request("GET", name, paths=(path,))
+        if response.status_code >= 500:
+            raise OSError(response.status_code)
+        if response.status_code != 200 or response.values[path] is None:
+            return None
+        return 1 if response.values[path] else 0
+
+    @classmethod
+    async def add_entry(cls, customer_id, project_id, time_since, time_until):
+        data = {
+            "customers_id": customer_id,
+            "projects_id": project_id,
+            "services_id": Config.service_id,
+            "time_since": TextFormatting.format_timestamp(time_since),
+            "time_until": TextFormatting.format_timestamp(time_until),
+        }
+        billable = await cls.billable_default(customer_id, project_id)
+        if billable is not None:
+            data["billable"] = billable
+        return await cls.request("POST", "entries", data, paths=())
+
+    @classmethod
+    async def get_entries(cls, time_since, time_until):
+        time_since = TextFormatting.format_timestamp(time_since)
+        time_until = TextFormatting.format_timestamp(time_until)
+        return await cls.request(
+            "GET",
+            f"entries?time_since={time_since}&time_until={time_until}",
+            paths=cls.paths("entries.*", cls.ENTRY_FIELDS),
+        )
+
+    @classmethod
+    async def set_entry_end(cls, entry_id, time_until):
+        data = {"time_until": TextFormatting.format_timestamp(time_until)}
+        return await cls.request(
+            "PUT", f"entries/{entry_id}", data, paths=()
+        )
+
+    @classmethod
+    async def get_page(cls, kind, page):
+        # kind is "customers" or "projects", only active ones are listed
+        fields = cls.PAGE_FIELDS[kind]
+        response = await cls.request(
+            "GET",
+            f"{kind}?filter%5Bactive%5D=true&page={page}",
+            paths=["paging.count_pages"] + cls.paths(f"{kind}.*", fields),
+        )
+        if response.status_code != 200:
+            raise OSError(response.status_code)
+
+        return {
+            "paging": {"count_pages": response.values["paging.count_pages"]},
+            kind: cls.items(response, kind, fields),
+        }
+
+
+class ClockodoTasks:
+    # customers and projects as a task table on flash, refetched in the
+    # background once older than task_max_age_hours
+    FILENAME = "tasks.bin"
+    CHECK_PERIOD_MS = 600000
+    RETRY_MS = 60000
+
+    table = TaskTable(FILENAME)
+    task_sync = None
+
+    @classmethod
+    def load(cls):
+        cls.task_sync = TaskSync(cls.table, Config.task_max_age_hours * 3600)
+        if Config.sync_tasks:
+            cls.table.load()
+            cls.apply()
+
+    @classmethod
+    def apply(cls):
+        Config.set_tasks(MergedTasks(Config.pinned_tasks, cls.table))
+        Knob.set_task_count(len(Config.tasks))
+
+        index = State.selected_task_index
+        if index is not None and index >= len(Config.tasks):
+            State.selected_task_index = len(Config.tasks) - 1 if Config.tasks else None
+        Display.invalidate()
+
+    @classmethod
+    async def run(cls):
+        # without credentials there is nothing to sync from, a lost connection
+        # is picked up again by Wifi.run
+        if not Config.sync_tasks or State.error is not None:
+            return
+
+        await Clock.trusted.wait()
+        while True:
+            if cls.task_sync.stale(time()):
+                try:
+                    changed = await cls.task_sync.sync(ClockodoClient.get_page, time())
+                except (OSError, EOFError, ValueError, KeyError):
+                    await asyncio.sleep_ms(cls.RETRY_MS)
+                    continue
+
+                if changed:
+                    cls.apply()
+
+            await asyncio.sleep_ms(cls.CHECK_PERIOD_MS)
 
 
 class ClockodoRequest:
-    @staticmethod
-    def send(request, on_success):
-        try:
-            response = request()
+    # starts and stops go to the journal, which is replayed to the API in the
+    # background; an action which may have been sent is looked up first
+    RETRY_MS = 5000
+    MAX_RETRY_MS = 300000
+    # stops replayed later than this get their end time corrected
+    LATE_STOP_SECONDS = 60
+    CANCEL_SECONDS = 5
+
+    journal = Journal("journal.bin")
+    triggered = asyncio.Event()
+    # (customer_id, project_id, timer_started_at) of the last stop, resumed
+    # when a start of the same task cancels it
+    stopped = None
+
+    @classmethod
+    def cancel(cls, kind, now):
+        if not cls.journal.cancel_last(kind, now, cls.CANCEL_SECONDS):
+            return False
+
+        Metrics.toggles_cancelled.add()
+        cls.triggered.set()
+        ClockPoll.nudge()
+        return True
 
-            if response.status_code == 200:
-                on_success(response)
+    @classmethod
+    def record(cls, kind, *args):
+        try:
+            if kind == Journal.START:
+                cls.journal.record_start(*args)
             else:
-                raise
-        except:
-            State.error = Error.API_REQUEST
-        finally:
-            State.triggered_request = None
+                cls.journal.record_stop(*args)
+        except (OSError, OverflowError):
+            State.error = Error.JOURNAL
+            return False
+
+        cls.triggered.set()
+        ClockPoll.nudge()
+        return True
 
     @classmethod
     def start_clock(cls):
         active_task = Config.tasks[State.selected_task_index]
+        customer_id = active_task.customer_id
+        project_id = active_task.project_id
+        now = time()
+
+        stopped = cls.stopped
+        if (
+            stopped
+            and stopped[:2] == (customer_id, project_id)
+            and cls.cancel(Journal.START, now)
+        ):
+            # the clock never stopped, the entry keeps running
+            entry_id = None if cls.journal.events else cls.journal.entry_id
+            State.change_for_clock_start(active_task, entry_id, stopped[2])
+            return
 
-        def request():
-            return ClockodoClient.start_clock(active_task)
-
-        def on_success(response):
-            entry_id = response.json()["running"]["id"]
-            now = mktime(gmtime())
-            State.change_for_clock_start(active_task, entry_id, now)
-
-        cls.send(request, on_success)
+        if cls.record(Journal.START, now, customer_id, project_id):
+            State.change_for_clock_start(active_task, None, now)
+            State.progress = Progress.STARTING
 
     @classmethod
     def stop_clock(cls):
-        def request():
-            return ClockodoClient.stop_clock(State.active_entry_id)
+        now = time()
+        active_task = State.active_task
+        cls.stopped = (
+            active_task.customer_id,
+            active_task.project_id,
+            State.timer_started_at,
+        )
+
+        if cls.cancel(Journal.STOP, now):
+            # the start was never sent
+            State.change_for_clock_stop()
+            return
 
-        def on_success(_):
+        if cls.record(Journal.STOP, now):
             State.change_for_clock_stop()
+            State.progress = Progress.STOPPING
+
+    @staticmethod
+    def accepted(response):
+        # server errors are retried like an unreachable API
+        if response.status_code >= 500:
+            raise OSError(response.status_code)
+        return response.status_code == 200
+
+    @classmethod
+    def reject(cls, start_event):
+        State.error = Error.API_REQUEST
+        if cls.journal.running_event() is start_event:
+            State.change_for_clock_stop()
+
+    @classmethod
+    async def replay_start(cls, start_event):
+        _, seq, time, customer_id, project_id = start_event
+
+        if seq in cls.journal.sending:
+            response = await ClockodoClient.get_clock()
+            running_entry = cls.accepted(response) and ClockodoClient.running_entry(
+                response
+            )
+            if (
+                running_entry
+                and running_entry["customers_id"] == customer_id
+                and running_entry["projects_id"] == project_id
+            ):
+                cls.journal.mark_done(seq, running_entry["id"])
+                return
+
+        cls.journal.mark_sending(seq)
+        response = await ClockodoClient.start_clock(customer_id, project_id, time)
+        if cls.accepted(response):
+            entry_id = response.values["running.id"]
+            cls.journal.mark_done(seq, entry_id)
+            if cls.journal.running_event() is None and State.active_task is not None:
+                State.active_entry_id = entry_id
+        else:
+            cls.reject(start_event)
+            cls.journal.mark_done(seq)
+
+    @classmethod
+    async def replay_entry(cls, start_event, stop_event):
+        _, seq, time_since, customer_id, project_id = start_event
+        time_until = stop_event[2]
+
+        if seq in cls.journal.sending:
+            response = await ClockodoClient.get_entries(time_since, time_until)
+            entries = cls.accepted(response) and ClockodoClient.items(
+                response, "entries", ClockodoClient.ENTRY_FIELDS
+            )
+            for entry in entries or []:
+                entry_since = TextFormatting.parse_timestamp(entry["time_since"])
+                if entry["customers_id"] == customer_id and entry_since == time_since:
+                    cls.journal.mark_done(seq)
+                    cls.journal.mark_done(stop_event[1])
+                    return
+
+        cls.journal.mark_sending(seq)
+        cls.journal.mark_sending(stop_event[1])
+        response = await ClockodoClient.add_entry(
+            customer_id, project_id, time_since, time_until
+        )
+        if not cls.accepted(response):
+            cls.reject(start_event)
+        cls.journal.mark_done(seq)
+        cls.journal.mark_done(stop_event[1])
+
+    @classmethod
+    async def replay_stop(cls, stop_event):
+        _, seq, time_until, entry_id, _ = stop_event
+        if entry_id is None:
+            entry_id = cls.journal.entry_id
 
-        cls.send(request, on_success)
+        if entry_id is not None:
+            cls.journal.mark_sending(seq)
+            # a rejected stop means the clock was stopped already, which
+            # happens when a stop is replayed twice
+            cls.accepted(await ClockodoClient.stop_clock(entry_id))
+            if time() - time_until > cls.LATE_STOP_SECONDS:
+                cls.accepted(await ClockodoClient.set_entry_end(entry_id, time_until))
+
+        cls.journal.mark_done(seq)
 
     @classmethod
-    def restore_timer(cls):
-        def request():
-            return ClockodoClient.get_clock()
+    async def replay(cls):
+        while True:
+            action = cls.journal.next_action()
+            if action is None:
+                return
+            if not Wifi.connected():
+                # kept unsent, a start and stop can still become one entry
+                raise OSError("offline")
+
+            kind, start_event, stop_event = action
+            # a toggle must not cancel what is on its way to the API
+            cls.journal.replaying = action
+            try:
+                if kind == Journal.START_CLOCK:
+                    with Trace.replay_start:
+                        await cls.replay_start(start_event)
+                elif kind == Journal.ADD_ENTRY:
+                    with Trace.replay_entry:
+                        await cls.replay_entry(start_event, stop_event)
+                else:
+                    with Trace.replay_stop:
+                        await cls.replay_stop(stop_event)
+            finally:
+                cls.journal.replaying = None
 
-        def on_success(response):
-            running_entry = response.json()["running"]
+    @classmethod
+    async def restore_timer(cls):
+        running_event = cls.journal.running_event()
+        if running_event is not None:
+            _, _, timer_started_at, customer_id, project_id = running_event
+            active_task = Config.find_task(customer_id, project_id)
+            if active_task:
+                State.change_for_clock_start(active_task, None, timer_started_at)
+            return
+        elif cls.journal.events:
+            return
+
+        snapshot = Power.take_snapshot()
+        if snapshot is not None:
+            timer_started_at, customer_id, project_id, entry_id = snapshot
+            active_task = Config.find_task(customer_id, project_id)
+            if timer_started_at and active_task:
+                cls.journal.entry_id = entry_id
+                State.change_for_clock_start(active_task, entry_id, timer_started_at)
+            return
+
+        if not Wifi.connected():
+            # a clock running at the API is picked up by ClockPoll once online
+            return
+
+        State.progress = Progress.RESTORING
+        Display.invalidate()
+        try:
+            response = await ClockodoClient.get_clock()
+            if response.status_code != 200:
+                raise OSError(response.status_code)
+
+            running_entry = ClockodoClient.running_entry(response)
             if not running_entry:
                 return
 
             active_entry_id = running_entry["id"]
-            active_task = None
-            for task in Config.tasks:
-                if (
-                    task.project_id == running_entry["projects_id"]
-                    and task.customer_id == running_entry["customers_id"]
-                ):
-                    active_task = task
-                    break
+            active_task = Config.find_task(
+                running_entry["customers_id"], running_entry["projects_id"]
+            )
+            time_since = running_entry["time_since"]
+            timer_started_at = TextFormatting.parse_timestamp(time_since)
 
-            start_time_str = running_entry["time_since"]
-            datetime_regexp ="(\d\d\d\d)-(\d\d)-(\d\d)T(\d\d):(\d\d):(\d\d)"
-            result = re.search(datetime_regexp , start_time_str)
-            timer_started_at = None
+            if active_entry_id and active_task and timer_started_at:
+                cls.journal.entry_id = active_entry_id
+                State.change_for_clock_start(
+                    active_task, active_entry_id, timer_started_at
+                )
+        except:
+            State.error = Error.API_REQUEST
+        finally:
+            State.progress = None
 
-            if result:
+    @classmethod
+    async def run(cls):
+        with Trace.restore_timer:
+            await cls.restore_timer()
+        Boot.mark("timer restored")
+        Boot.report()
+        retry_ms = cls.RETRY_MS
+        # times taken before are corrected once the clock is synced, the Date
+        # of a response does when NTP cannot be reached
+        while not Clock.trusted.is_set():
+            cls.triggered.clear()
+            try:
+                await ClockodoClient.get_clock()
+            except (OSError, EOFError, ValueError, KeyError):
+                pass
+            if Clock.trusted.is_set():
+                break
+            try:
+                # or until the link is back
+                await asyncio.wait_for(cls.triggered.wait(), retry_ms / 1000)
+            except asyncio.TimeoutError:
+                retry_ms = min(retry_ms * 2, cls.MAX_RETRY_MS)
+        retry_ms = cls.RETRY_MS
+
+        while True:
+            cls.triggered.clear()
+            try:
+                await cls.replay()
+                # with nothing to send this succeeds without a link as well
+                State.progress = None if Wifi.connected() else Progress.QUEUED
+                retry_ms = cls.RETRY_MS
+                Display.invalidate()
+                await cls.triggered.wait()
+            except (OSError, EOFError, ValueError, KeyError):
+                State.progress = Progress.QUEUED
+                Display.invalidate()
                 try:
-                    t = tuple([int(result.group(i)) if i < 7 else 0 for i in range(1, 10)])
-                    timer_started_at = mktime(t)
-                except:
+                    await asyncio.wait_for(cls.triggered.wait(), retry_ms / 1000)
+                except asyncio.TimeoutError:
                     pass
+                retry_ms = min(retry_ms * 2, cls.MAX_RETRY_MS)
 
-            if active_entry_id and active_task and timer_started_at:
-                State.change_for_clock_start(active_task, active_entry_id, timer_started_at)
 
-        cls.send(request, on_success)
+class ClockPoll:
+    # picks up changes made elsewhere, polling GET /clock with the last ETag;
+    # pending local starts and stops win
+    MIN_INTERVAL_MS = 10000
+    MAX_INTERVAL_MS = 300000
+
+    interval = PollInterval(MIN_INTERVAL_MS, MAX_INTERVAL_MS)
+    nudged = asyncio.Event()
+    etag = None
+    # running_key of the last running entry taken over
+    seen = None
+    # counts local actions, a poll they overlap with is stale
+    local_changes = 0
+
+    @classmethod
+    def nudge(cls):
+        cls.local_changes += 1
+        cls.etag = None
+        cls.seen = None
+        cls.interval.reset()
+        cls.nudged.set()
+
+    @staticmethod
+    def settled():
+        return not ClockodoRequest.journal.events and State.progress is None
+
+    @classmethod
+    def reconcile(cls, running_entry):
+        # changes State to the running entry, returns whether it had to
+        if running_entry is not None:
+            active_task = Config.find_task(
+                running_entry["customers_id"], running_entry["projects_id"]
+            )
+            timer_started_at = TextFormatting.parse_timestamp(
+                running_entry["time_since"]
+            )
+            if active_task and timer_started_at:
+                entry_id = running_entry["id"]
+                if (
+                    State.active_entry_id == entry_id
+                    and State.timer_started_at == timer_started_at
+                    and State.active_task is not None
+                    and State.active_task.customer_id == active_task.customer_id
+                    and State.active_task.project_id == active_task.project_id
+                ):
+                    return False
+
+                ClockodoRequest.journal.entry_id = entry_id
+                State.change_for_clock_start(active_task, entry_id, timer_started_at)
+                return True
+
+        # stopped, or running a task this device does not list
+        if State.active_task is None:
+            return False
+        ClockodoRequest.journal.entry_id = None
+        State.change_for_clock_stop()
+        return True
+
+    @classmethod
+    async def poll(cls):
+        local_changes = cls.local_changes
+        try:
+            response = await ClockodoClient.get_clock(cls.etag)
+        except (OSError, EOFError, ValueError, KeyError):
+            # tried again after the next interval
+            return
+
+        Metrics.clock_polls.add()
+        if response.status_code == 304:
+            Metrics.clock_polls_not_modified.add()
+            return
+        if response.status_code != 200:
+            return
+        if local_changes != cls.local_changes or not cls.settled():
+            # pressed while polling, the answer may be from before
+            return
+
+        running_entry = ClockodoClient.running_entry(response)
+        key = running_key(running_entry)
+        cls.etag = response.headers.get("etag")
+        if key is not None and key == cls.seen:
+            return
+        cls.seen = key
+
+        if cls.reconcile(running_entry):
+            cls.interval.reset()
+            Display.invalidate()
+
+    @classmethod
+    async def run(cls):
+        if State.error is not None:
+            return
+
+        await Clock.trusted.wait()
+        while True:
+            cls.nudged.clear()
+            try:
+                await asyncio.wait_for(
+                    cls.nudged.wait(), cls.interval.next_ms() / 1000
+                )
+                # a local action, the next poll follows the shortest interval
+                continue
+            except asyncio.TimeoutError:
+                pass
+
+            if not Power.awake.is_set():
+                # looked at again as soon as the screen comes back on
+                await Power.awake.wait()
+                cls.interval.reset()
+
+            if cls.settled():
+                await cls.poll()
+
+
+# POWER
+
+
+class Power:
+    DIM_AFTER_MS = 30000
+    BLANK_AFTER_MS = 120000
+    LIGHT_SLEEP_AFTER_MS = 120000
+    DEEP_SLEEP_AFTER_MS = 3600000
+    LIGHT_SLEEP_MS = 500
+    CHECK_PERIOD_MS = 1000
+    FULL_CONTRAST = 0xFF
+    DIM_CONTRAST = 0x10
+
+    policy = IdlePolicy(
+        DIM_AFTER_MS, BLANK_AFTER_MS, LIGHT_SLEEP_AFTER_MS, DEEP_SLEEP_AFTER_MS
+    )
+    duty_cycle = DutyCycle()
+    level = IdlePolicy.AWAKE
+    # set while the screen is on
+    awake = asyncio.Event()
+    awake.set()
+    booted_at = ticks_ms()
+    last_input_at = booted_at
+
+    @classmethod
+    def blanked(cls):
+        return cls.level >= IdlePolicy.BLANKED
+
+    @classmethod
+    def touch(cls):
+        # returns True when the input woke up a blank screen
+        cls.last_input_at = ticks_ms()
+        woke_up = cls.blanked()
+        if cls.level != IdlePolicy.AWAKE:
+            cls.change_level(IdlePolicy.AWAKE)
+        return woke_up
+
+    @classmethod
+    def change_level(cls, level):
+        oled = Display.oled
+        if level == IdlePolicy.AWAKE:
+            oled.poweron()
+            oled.contrast(cls.FULL_CONTRAST)
+            Display.invalidate()
+        elif level == IdlePolicy.DIMMED:
+            oled.poweron()
+            oled.contrast(cls.DIM_CONTRAST)
+        elif not cls.blanked():
+            oled.poweroff()
+
+        cls.level = level
+        if cls.blanked():
+            cls.awake.clear()
+        else:
+            cls.awake.set()
+
+    @classmethod
+    def busy(cls):
+        return State.progress is not None or bool(ClockodoRequest.journal.events)
+
+    @classmethod
+    def light_sleep(cls):
+        cls.change_level(IdlePolicy.BLANKED)
+        Knob.remember_position()
+
+        while True:
+            slept_at = ticks_ms()
+            lightsleep(cls.LIGHT_SLEEP_MS)
+            cls.duty_cycle.add_sleep(ticks_diff(ticks_ms(), slept_at))
+
+            if wake_reason() != TIMER_WAKE or Knob.moved():
+                break
+
+            idle_ms = ticks_diff(ticks_ms(), cls.last_input_at)
+            if cls.policy.level(idle_ms, cls.busy()) == IdlePolicy.DEEP_SLEEP:
+                cls.deep_sleep()
+
+        # the input itself arrives as an event and wakes up the screen
+        cls.last_input_at = ticks_ms()
+        elapsed_ms = ticks_diff(ticks_ms(), cls.booted_at)
+        print(f"awake duty cycle: {cls.duty_cycle.awake_percent(elapsed_ms)}%")
+
+    @classmethod
+    def deep_sleep(cls):
+        task = State.active_task
+        RtcMemory.write(
+            RtcMemory.TIMER_AT,
+            TimerSnapshot.pack(
+                State.timer_started_at,
+                task and task.customer_id,
+                task and task.project_id,
+                State.active_entry_id or ClockodoRequest.journal.entry_id,
+            )
+        )
+        Display.oled.poweroff()
+        deepsleep()
+
+    @classmethod
+    def take_snapshot(cls):
+        # the running timer saved before the last deep sleep, if any
+        if reset_cause() != DEEPSLEEP_RESET:
+            return None
+
+        snapshot = TimerSnapshot.unpack(
+            RtcMemory.read(RtcMemory.TIMER_AT, TimerSnapshot.SIZE)
+        )
+        RtcMemory.write(RtcMemory.TIMER_AT, bytes(TimerSnapshot.SIZE))
+        return snapshot
+
+    @classmethod
+    async def run(cls):
+        # the button wakes the device from light and deep sleep
+        esp32.wake_on_ext0(pin=Button.pin, level=esp32.WAKEUP_ALL_LOW)
+
+        while True:
+            await asyncio.sleep_ms(cls.CHECK_PERIOD_MS)
+
+            idle_ms = ticks_diff(ticks_ms(), cls.last_input_at)
+            level = cls.policy.level(idle_ms, cls.busy())
+            if level == IdlePolicy.DEEP_SLEEP:
+                cls.deep_sleep()
+            elif level == IdlePolicy.LIGHT_SLEEP:
+                cls.light_sleep()
+            elif level != cls.level:
+                cls.change_level(level)
 
 
 # MAIN
@@ -447,32 +1752,53 @@ class ClockodoRequest:
 def init():
     gc.enable()
     Display.render()
+    Boot.mark("splash shown")
 
     Config.load()
+    ClockodoTasks.load()
+    Boot.mark(f"config loaded ({Config.File.source})")
 
-    Knob.scale = len(Config.tasks) - 1
+    Knob.set_task_count(len(Config.tasks))
     Wifi.essid = Config.wifi.essid
     Wifi.password = Config.wifi.password
+    Wifi.static_ip = Config.wifi.static_ip
 
-    Wifi.connect()
-    ntptime.settime()
+    Metrics.registry.enabled = Config.metrics
+    Trace.tracer.enabled = Config.trace
+    Button.debouncer = Debouncer(
+        Config.button_debounce_ms, repeat_ms=Config.button_repeat_ms, diff=ticks_diff
+    )
+    Clock.load()
+    ClockodoRequest.journal.load()
 
-    State.triggered_request = ClockodoRequest.restore_timer
 
-def main():
-    init()
+async def connect():
+    # the tasks which need the network start once the first connect is done
+    if await Wifi.connect():
+        Boot.mark("wifi up")
 
-    while True:
-        Knob.handle_turn()
-        Button.handle_push()
+    asyncio.create_task(Clock.run())
+    asyncio.create_task(Status.run())
+    asyncio.create_task(Wifi.run())
+    asyncio.create_task(ClockodoRequest.run())
+    asyncio.create_task(ClockPoll.run())
+    asyncio.create_task(ClockodoTasks.run())
+    asyncio.create_task(Power.run())
 
-        Display.render()
 
-        if State.triggered_request is not None:
-            State.triggered_request()
+async def main():
+    init()
+    Display.invalidate()
 
-        gc.collect()
-        sleep(0.1)
+    asyncio.create_task(Display.run())
+    asyncio.create_task(Display.animate())
+    asyncio.create_task(Display.tick())
+    # the display keeps animating and the input is handled while connecting,
+    # the journal keeps starts and stops until they can be sent
+    asyncio.create_task(Knob.run())
+    asyncio.create_task(Button.run())
+    asyncio.create_task(connect())
+    await State.run()
 
 
-main()
+asyncio.run(main())
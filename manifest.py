@@ -0,0 +1,26 @@
+# Freezes the application into the firmware as bytecode, see "Frozen firmware"
+# in the README. Without a main.py on the filesystem the frozen one is run.
+include("$(PORT_DIR)/boards/manifest.py")
+
+module("main.py")
+module("atomic_file.py")
+module("boot_profile.py")
+module("clock_poll.py")
+module("clock_sync.py")
+module("config_cache.py")
+module("debounce.py")
+module("render_helpers.py")
+module("widgets.py")
+module("text_cache.py")
+module("events.py")
+module("json_stream.py")
+module("http_client.py")
+module("journal.py")
+module("knob_filter.py")
+module("metrics.py")
+module("power.py")
+module("task_sync.py")
+module("tracing.py")
+module("models.py")
+module("wifi_cache.py")
+module("ssd1306.py")
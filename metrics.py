@@ -0,0 +1,159 @@
+from array import array
+
+
+def largest_free_block(limit):
+    # the largest bytearray up to `limit` which can be allocated, by bisection
+    low = 0
+    high = limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        try:
+            block = bytearray(middle)
+            del block
+            low = middle
+        except MemoryError:
+            high = middle - 1
+    return low
+
+
+class Counter:
+    def __init__(self, registry):
+        self.registry = registry
+        self.value = 0
+
+    def add(self, amount=1):
+        if self.registry.enabled:
+            self.value += amount
+
+    def reset(self):
+        self.value = 0
+
+    def snapshot(self):
+        return self.value
+
+    def describe(self):
+        return str(self.value)
+
+
+class Gauge:
+    """A value read when the metrics are looked at, nothing to do on hot paths."""
+
+    def __init__(self, registry, read):
+        self.registry = registry
+        self.read = read
+
+    def reset(self):
+        pass
+
+    def snapshot(self):
+        return self.read()
+
+    def describe(self):
+        return str(self.read())
+
+
+class Histogram:
+    """
+    Counts values into fixed buckets kept in a preallocated array, so recording
+    allocates nothing. Bucket i counts the values up to `bounds[i]`, the last
+    one the values above all bounds.
+    """
+
+    def __init__(self, registry, bounds):
+        self.registry = registry
+        self.bounds = tuple(bounds)
+        self.counts = array("I", [0] * (len(self.bounds) + 1))
+        self.reset()
+
+    def record(self, value):
+        if not self.registry.enabled:
+            return
+
+        bounds = self.bounds
+        end = len(bounds)
+        i = 0
+        while i < end and value > bounds[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def reset(self):
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def percentile(self, fraction):
+        # the bound of the bucket holding that share of the values, max above
+        # the bounds, None without values
+        if not self.count:
+            return None
+
+        rank = fraction * self.count
+        seen = 0
+        for i, bound in enumerate(self.bounds):
+            seen += self.counts[i]
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "max": self.max,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "bounds": list(self.bounds),
+            "buckets": list(self.counts),
+        }
+
+    def describe(self):
+        if not self.count:
+            return "no values"
+        mean = self.total / self.count
+        p50 = self.percentile(0.5)
+        p90 = self.percentile(0.9)
+        return (
+            f"{self.count} values, mean {mean:.1f}, p50 <= {p50}, p90 <= {p90}, "
+            f"max {self.max}"
+        )
+
+
+class MetricsRegistry:
+    """
+    Counters, gauges and histograms by name, fed from the hot paths of the
+    firmware. While disabled recording returns right away and keeps nothing.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        # (name, metric) in the order they were added
+        self.metrics = []
+
+    def add(self, name, metric):
+        self.metrics.append((name, metric))
+        return metric
+
+    def counter(self, name):
+        return self.add(name, Counter(self))
+
+    def gauge(self, name, read):
+        return self.add(name, Gauge(self, read))
+
+    def histogram(self, name, bounds):
+        return self.add(name, Histogram(self, bounds))
+
+    def reset(self):
+        for _, metric in self.metrics:
+            metric.reset()
+
+    def snapshot(self):
+        return {name: metric.snapshot() for name, metric in self.metrics}
+
+    def report(self):
+        return [f"{name}: {metric.describe()}" for name, metric in self.metrics]
@@ -0,0 +1,58 @@
+import unittest
+from metrics import MetricsRegistry, largest_free_block
+
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram_counts_values_into_buckets(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("frame ms", (10, 20, 50))
+
+        for value in (3, 10, 12, 15, 40, 80):
+            histogram.record(value)
+
+        assert list(histogram.counts) == [2, 2, 1, 1]
+        assert (histogram.count, histogram.total, histogram.max) == (6, 160, 80)
+        assert histogram.percentile(0.5) == 20
+        assert histogram.percentile(0.9) == 80
+
+    def test_percentiles_do_not_exceed_the_largest_value(self):
+        histogram = MetricsRegistry().histogram("http ms", (100, 1000))
+        histogram.record(120)
+
+        assert histogram.percentile(0.5) == 120
+        assert MetricsRegistry().histogram("empty", (1,)).percentile(0.5) is None
+
+    def test_nothing_is_kept_while_disabled(self):
+        registry = MetricsRegistry(enabled=False)
+        counter = registry.counter("failures")
+        histogram = registry.histogram("frame ms", (10,))
+
+        counter.add()
+        histogram.record(5)
+
+        assert counter.value == 0
+        assert histogram.count == 0
+
+    def test_snapshot_and_report_list_every_metric(self):
+        registry = MetricsRegistry()
+        registry.counter("failures").add(2)
+        registry.gauge("heap free", lambda: 1234)
+        registry.histogram("frame ms", (10,)).record(4)
+
+        snapshot = registry.snapshot()
+
+        assert snapshot["failures"] == 2
+        assert snapshot["heap free"] == 1234
+        assert snapshot["frame ms"]["buckets"] == [1, 0]
+        assert registry.report() == [
+            "failures: 2",
+            "heap free: 1234",
+            "frame ms: 1 values, mean 4.0, p50 <= 4, p90 <= 4, max 4",
+        ]
+
+    def test_largest_free_block_is_capped_by_the_limit(self):
+        assert largest_free_block(4096) == 4096
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,7 @@
 class ClockodoTask:
+    # without an instance dict, also used for the tasks read from the task table
+    __slots__ = ("project_id", "customer_id", "name")
+
     def __init__(self, name, project_id=None, customer_id=None):
         self.project_id = project_id
         self.customer_id = customer_id
@@ -16,3 +19,17 @@ class ClockodoTask:
             return None
 
         return ClockodoTask(name=name, customer_id=customer_id, project_id=project_id)
+
+
+class TaskIndex:
+    """The tasks by (customer_id, project_id), of duplicates the first one."""
+
+    def __init__(self, tasks=()):
+        self.tasks_by_ids = {}
+        for task in tasks:
+            ids = (task.customer_id, task.project_id)
+            if ids not in self.tasks_by_ids:
+                self.tasks_by_ids[ids] = task
+
+    def find(self, customer_id, project_id):
+        return self.tasks_by_ids.get((customer_id, project_id))
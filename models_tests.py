@@ -0,0 +1,20 @@
+import unittest
+from models import ClockodoTask, TaskIndex
+
+
+class TestTaskIndex(unittest.TestCase):
+    def test_finds_tasks_by_customer_and_project(self):
+        tasks = [
+            ClockodoTask("ACME", customer_id=1),
+            ClockodoTask("ACME: Website", customer_id=1, project_id=10),
+            ClockodoTask("ACME again", customer_id=1),
+        ]
+        index = TaskIndex(tasks)
+
+        assert index.find(1, 10) is tasks[1]
+        assert index.find(1, None) is tasks[0]
+        assert index.find(2, None) is None
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import struct
+
+
+class IdlePolicy:
+    """How deep the device may idle after a time without input."""
+
+    AWAKE = 0
+    DIMMED = 1
+    BLANKED = 2
+    LIGHT_SLEEP = 3
+    DEEP_SLEEP = 4
+
+    def __init__(
+        self,
+        dim_after_ms,
+        blank_after_ms,
+        light_sleep_after_ms,
+        deep_sleep_after_ms=None,
+    ):
+        self.dim_after_ms = dim_after_ms
+        self.blank_after_ms = blank_after_ms
+        self.light_sleep_after_ms = light_sleep_after_ms
+        self.deep_sleep_after_ms = deep_sleep_after_ms
+
+    def level(self, idle_ms, busy=False):
+        # while busy (e.g. a request is pending) the device stays awake enough
+        # to finish it, only the panel is turned down
+        deep_sleep_after_ms = self.deep_sleep_after_ms
+        deep_sleep_enabled = deep_sleep_after_ms is not None
+        if not busy and deep_sleep_enabled and idle_ms >= deep_sleep_after_ms:
+            return self.DEEP_SLEEP
+        elif not busy and idle_ms >= self.light_sleep_after_ms:
+            return self.LIGHT_SLEEP
+        elif idle_ms >= self.blank_after_ms:
+            return self.BLANKED
+        elif idle_ms >= self.dim_after_ms:
+            return self.DIMMED
+        return self.AWAKE
+
+
+class DutyCycle:
+    def __init__(self):
+        self.asleep_ms = 0
+
+    def add_sleep(self, ms):
+        self.asleep_ms += ms
+
+    def awake_percent(self, elapsed_ms):
+        if elapsed_ms <= 0:
+            return 100
+        awake_ms = max(elapsed_ms - self.asleep_ms, 0)
+        return awake_ms * 100 // elapsed_ms
+
+
+class TimerSnapshot:
+    """The running timer packed for RTC memory, which survives deep sleep."""
+
+    MAGIC = b"CCT1"
+    FORMAT = "<4siiii"
+    SIZE = struct.calcsize(FORMAT)
+
+    @classmethod
+    def pack(cls, timer_started_at, customer_id, project_id, entry_id):
+        return struct.pack(
+            cls.FORMAT,
+            cls.MAGIC,
+            timer_started_at or 0,
+            customer_id or 0,
+            project_id or 0,
+            entry_id or 0,
+        )
+
+    @classmethod
+    def unpack(cls, data):
+        # (timer_started_at, customer_id, project_id, entry_id), None when stopped
+        if len(data) != cls.SIZE:
+            return None
+
+        magic, timer_started_at, customer_id, project_id, entry_id = struct.unpack(
+            cls.FORMAT, data
+        )
+        if magic != cls.MAGIC:
+            return None
+
+        return (
+            timer_started_at or None,
+            customer_id or None,
+            project_id or None,
+            entry_id or None,
+        )
@@ -0,0 +1,53 @@
+import unittest
+from power import DutyCycle, IdlePolicy, TimerSnapshot
+
+
+class TestIdlePolicy(unittest.TestCase):
+    def setUp(self):
+        self.policy = IdlePolicy(1000, 5000, 6000, 60000)
+
+    def test_level_deepens_with_idle_time(self):
+        levels = [self.policy.level(ms) for ms in (0, 1000, 5000, 6000, 60000)]
+
+        assert levels == [
+            IdlePolicy.AWAKE,
+            IdlePolicy.DIMMED,
+            IdlePolicy.BLANKED,
+            IdlePolicy.LIGHT_SLEEP,
+            IdlePolicy.DEEP_SLEEP,
+        ]
+
+    def test_level_does_not_sleep_while_busy(self):
+        assert self.policy.level(60000, busy=True) == IdlePolicy.BLANKED
+
+    def test_level_without_deep_sleep(self):
+        policy = IdlePolicy(1000, 5000, 6000)
+
+        assert policy.level(10**9) == IdlePolicy.LIGHT_SLEEP
+
+
+class TestDutyCycle(unittest.TestCase):
+    def test_awake_percent_subtracts_the_time_asleep(self):
+        duty_cycle = DutyCycle()
+        duty_cycle.add_sleep(900)
+        duty_cycle.add_sleep(600)
+
+        assert duty_cycle.awake_percent(2000) == 25
+
+    def test_awake_percent_is_full_before_any_time_passed(self):
+        assert DutyCycle().awake_percent(0) == 100
+
+
+class TestTimerSnapshot(unittest.TestCase):
+    def test_unpack_restores_a_packed_timer(self):
+        data = TimerSnapshot.pack(780000000, 2000, None, 77)
+
+        assert TimerSnapshot.unpack(data) == (780000000, 2000, None, 77)
+
+    def test_unpack_ignores_foreign_or_empty_memory(self):
+        assert TimerSnapshot.unpack(b"") is None
+        assert TimerSnapshot.unpack(b"x" * 20) is None
+
+
+if __name__ == "__main__":
+    unittest.main()
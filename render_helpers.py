@@ -1,3 +1,7 @@
+from collections import OrderedDict
+from time import gmtime, mktime
+
+
 class TextFormatting:
     @staticmethod
     def split_for_wrapping(text, width):
@@ -27,24 +31,69 @@ class TextFormatting:
 
         return "{:02d}:{:02d}:{:02d}".format(hours, minutes, seconds)
 
+    @staticmethod
+    def format_timestamp(seconds):
+        year, month, day, hour, minute, second = gmtime(seconds)[0:6]
+        return "{:04d}-{:02d}-{:02d}T{:02d}:{:02d}:{:02d}Z".format(
+            year, month, day, hour, minute, second
+        )
+
+    @staticmethod
+    def parse_timestamp(text):
+        # "YYYY-MM-DDTHH:MM:SS" with any timezone suffix, which is always UTC
+        # in Clockodo responses
+        try:
+            t = (
+                int(text[0:4]),
+                int(text[5:7]),
+                int(text[8:10]),
+                int(text[11:13]),
+                int(text[14:16]),
+                int(text[17:19]),
+                0,
+                0,
+                0,
+            )
+        except (TypeError, ValueError):
+            return None
+
+        return mktime(t)
+
 
 
 class TextScrolling:
     text = None
 
+    @classmethod
+    def start(cls, text, width):
+        cls.text = text
+        cls.width = width
+        cls.forwards = True
+        cls.current_index = 0
+        cls.freeze_counter = 0
+
     @classmethod
     def maybe_scroll(cls, text, width):
         if len(text) <= width:
             cls.text = None
             return text, False
         elif text != cls.text:
-            cls.text = text
-            cls.width = width
-            cls.current_segment = text[0:width]
-            cls.forwards = True
-            cls.current_index = 0
-            cls.freeze_counter = 0
-        return cls.current_segment, True
+            cls.start(text, width)
+        return cls.segment(), True
+
+    @classmethod
+    def scroll_index(cls, text, width):
+        # like maybe_scroll without slicing the segment, None when the text fits
+        if len(text) <= width:
+            cls.text = None
+            return None
+        elif text != cls.text:
+            cls.start(text, width)
+        return cls.current_index
+
+    @classmethod
+    def segment(cls):
+        return cls.text[cls.current_index : cls.current_index + cls.width]
 
     @classmethod
     def modify_index(cls):
@@ -68,7 +117,7 @@ class TextScrolling:
             return len(cls.text) - cls.width
 
     @classmethod
-    def scroll(cls):
+    def advance(cls):
         if cls.text is None:
             return
 
@@ -83,8 +132,50 @@ class TextScrolling:
         else:
             cls.modify_index()
 
-        cls.current_segment = cls.text[cls.current_index:cls.current_index + cls.width]
-        return cls.current_segment
+    @classmethod
+    def scroll(cls):
+        if cls.text is None:
+            return None
+
+        cls.advance()
+        return cls.segment()
+
+
+class LruCache:
+    """Keeps the most recently used values whose sizes add up to at most `budget`."""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.used = 0
+        self.entries = OrderedDict()
+        self.newest_key = None
+
+    def get(self, key):
+        if key == self.newest_key:
+            # already in place, reordering would allocate on every redraw
+            return self.entries[key][0]
+
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return None
+
+        self.entries[key] = entry
+        self.newest_key = key
+        return entry[0]
+
+    def put(self, key, value, size):
+        if size > self.budget:
+            return False
 
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.used -= previous[1]
 
+        while self.used + size > self.budget:
+            oldest_key = next(iter(self.entries))
+            self.used -= self.entries.pop(oldest_key)[1]
 
+        self.entries[key] = (value, size)
+        self.newest_key = key
+        self.used += size
+        return True
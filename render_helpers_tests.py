@@ -1,5 +1,6 @@
 import unittest
-from render_helpers import TextFormatting, TextScrolling
+from time import gmtime, mktime
+from render_helpers import LruCache, TextFormatting, TextScrolling
 
 class TestTextFormatting(unittest.TestCase):
     def test_split_for_wrapping_splits_long_text_into_segments(self):
@@ -8,6 +9,20 @@ class TestTextFormatting(unittest.TestCase):
 
         assert result == ["This is very", "long text which", "is probably", "split"]
 
+    def test_parse_timestamp_reads_clockodo_timestamps(self):
+        result = TextFormatting.parse_timestamp("2026-10-16T09:30:05+00:00")
+
+        assert result == mktime((2026, 10, 16, 9, 30, 5, 0, 0, 0))
+
+    def test_parse_timestamp_returns_none_for_invalid_text(self):
+        assert TextFormatting.parse_timestamp("not a time") is None
+
+    def test_format_timestamp_formats_as_utc(self):
+        seconds = mktime((2026, 10, 16, 9, 30, 5, 0, 0, 0))
+        expected = "{:04d}-{:02d}-{:02d}T{:02d}:{:02d}:{:02d}Z".format(*gmtime(seconds)[0:6])
+
+        assert TextFormatting.format_timestamp(seconds) == expected
+
 class TestTextScrolling(unittest.TestCase):
     def test_scroll_shows_the_next_segment_when_direction_is_forward(self):
         TextScrolling.maybe_scroll("This text should scroll", 16)
@@ -39,5 +54,43 @@ class TestTextScrolling(unittest.TestCase):
         assert TextScrolling.scroll() == "xt should scroll"
         assert TextScrolling.scroll() == "ext should scrol"
 
+    def test_scroll_index_follows_advance_without_slicing(self):
+        assert TextScrolling.scroll_index("Fits", 16) is None
+        assert TextScrolling.scroll_index("This text should scroll", 16) == 0
+
+        TextScrolling.freeze_counter = 2
+        TextScrolling.advance()
+
+        assert TextScrolling.scroll_index("This text should scroll", 16) == 1
+        assert TextScrolling.segment() == "his text should "
+
+class TestLruCache(unittest.TestCase):
+    def test_put_evicts_the_least_recently_used_values_to_stay_within_budget(self):
+        cache = LruCache(10)
+        cache.put("a", 1, 4)
+        cache.put("b", 2, 4)
+        cache.get("a")
+        cache.put("c", 3, 4)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.used == 8
+
+    def test_put_rejects_values_larger_than_the_budget(self):
+        cache = LruCache(10)
+
+        assert not cache.put("a", 1, 11)
+        assert cache.get("a") is None
+        assert cache.used == 0
+
+    def test_put_replaces_an_existing_value(self):
+        cache = LruCache(10)
+        cache.put("a", 1, 4)
+        cache.put("a", 2, 6)
+
+        assert cache.get("a") == 2
+        assert cache.used == 6
+
 if __name__ == '__main__':
     unittest.main()
@@ -23,6 +23,10 @@ SET_DISP_CLK_DIV = const(0xD5)
 SET_PRECHARGE = const(0xD9)
 SET_VCOM_DESEL = const(0xDB)
 SET_CHARGE_PUMP = const(0x8D)
+SET_HWSCROLL_RIGHT = const(0x26)
+SET_HWSCROLL_LEFT = const(0x27)
+SET_HWSCROLL_OFF = const(0x2E)
+SET_HWSCROLL_ON = const(0x2F)
 
 # Subclassing FrameBuffer provides support for graphics primitives
 # http://docs.micropython.org/en/latest/pyboard/library/framebuf.html
@@ -33,6 +37,29 @@ class SSD1306(framebuf.FrameBuffer):
         self.external_vcc = external_vcc
         self.pages = self.height // 8
         self.buffer = bytearray(self.pages * self.width)
+        # copy of what the panel's GDDRAM currently holds, used by show()
+        # to send only the columns that changed since the last flush
+        self.panel = bytearray(self.pages * self.width)
+        self.panel_synced = False
+        # a view per page of both, so show() indexes columns within a page
+        buffer_view = memoryview(self.buffer)
+        panel_view = memoryview(self.panel)
+        self.buffer_pages = []
+        self.panel_pages = []
+        for page in range(self.pages):
+            start = page * self.width
+            self.buffer_pages.append(buffer_view[start : start + self.width])
+            self.panel_pages.append(panel_view[start : start + self.width])
+        # the changed columns of a page are copied here to be sent, through a
+        # view of each size in use so that show() allocates nothing
+        self.window_buffer = memoryview(bytearray(self.width))
+        self.window_views = [None] * (self.width + 1)
+        # display data sent by the last show() and since power on
+        self.flushed_bytes = 0
+        self.flushed_bytes_total = 0
+        # pages of the running scroll engine, -1 while it is stopped
+        self.hw_scroll_start = -1
+        self.hw_scroll_end = -1
         super().__init__(self.buffer, self.width, self.height, framebuf.MONO_VLSB)
         self.init_display()
 
@@ -92,6 +119,39 @@ class SSD1306(framebuf.FrameBuffer):
         self.write_cmd(SET_COM_OUT_DIR | ((rotate & 1) << 3))
         self.write_cmd(SET_SEG_REMAP | (rotate & 1))
 
+    def hw_scroll(self, start_page, end_page, left=True, interval=0):
+        # Rotate the given pages of the panel's RAM continuously by one column
+        # every `interval` (0-7, see datasheet: 5, 64, 128, 256, 3, 4, 25, 2
+        # frames). Columns leaving one edge come back in at the other, so only
+        # content which fits into the 128 columns of RAM can be scrolled.
+        # Until hw_scroll_stop() show() leaves these pages alone.
+        self.write_cmd(SET_HWSCROLL_OFF)
+        self.write_cmd(SET_HWSCROLL_LEFT if left else SET_HWSCROLL_RIGHT)
+        self.write_cmd(0x00)  # dummy byte
+        self.write_cmd(start_page)
+        self.write_cmd(interval & 0x07)
+        self.write_cmd(end_page)
+        self.write_cmd(0x00)  # dummy byte
+        self.write_cmd(0xFF)  # dummy byte
+        self.write_cmd(SET_HWSCROLL_ON)
+        self.hw_scroll_start = start_page
+        self.hw_scroll_end = end_page
+
+    def hw_scroll_stop(self):
+        if self.hw_scroll_start < 0:
+            return
+
+        self.write_cmd(SET_HWSCROLL_OFF)
+        # the engine has moved the RAM contents, the datasheet requires
+        # rewriting them after deactivating the scroll: make the copy differ
+        # from the buffer so the next show() sends these pages in full
+        start = self.hw_scroll_start * self.width
+        end = (self.hw_scroll_end + 1) * self.width
+        for i in range(start, end):
+            self.panel[i] = ~self.buffer[i] & 0xFF
+        self.hw_scroll_start = -1
+        self.hw_scroll_end = -1
+
     def show(self):
         x0 = 0
         x1 = self.width - 1
@@ -100,13 +160,79 @@ class SSD1306(framebuf.FrameBuffer):
             col_offset = (128 - self.width) // 2
             x0 += col_offset
             x1 += col_offset
+
+        if not self.panel_synced and self.hw_scroll_start < 0:
+            self.write_window(x0, x1, 0, self.pages - 1, self.buffer)
+            self.panel[:] = self.buffer
+            self.panel_synced = True
+            self.flushed_bytes = len(self.buffer)
+        else:
+            self.flushed_bytes = self.show_changes(x0)
+            self.panel_synced = True
+
+        self.flushed_bytes_total += self.flushed_bytes
+
+    def window(self, size):
+        # the first `size` bytes of the window buffer, the view is created on
+        # first use only
+        view = self.window_views[size]
+        if view is None:
+            view = self.window_buffer[:size]
+            self.window_views[size] = view
+        return view
+
+    def show_changes(self, col_offset):
+        # send only the changed column range of every changed page, skipping
+        # the pages owned by the scroll engine. Plain while loops over columns
+        # within a page, so that not even CPython allocates range objects or
+        # large ints here.
+        width = self.width
+        synced = self.panel_synced
+        scroll_start = self.hw_scroll_start
+        scroll_end = self.hw_scroll_end
+        flushed = 0
+
+        page = -1
+        while page < self.pages - 1:
+            page += 1
+            if scroll_start <= page <= scroll_end:
+                continue
+
+            buffer = self.buffer_pages[page]
+            panel = self.panel_pages[page]
+            c0 = 0
+            c1 = width - 1
+            if synced:
+                while c0 < width and buffer[c0] == panel[c0]:
+                    c0 += 1
+                if c0 == width:
+                    continue
+                while buffer[c1] == panel[c1]:
+                    c1 -= 1
+
+            size = c1 + 1 - c0
+            window = self.window(size)
+            i = 0
+            while i < size:
+                value = buffer[c0 + i]
+                window[i] = value
+                panel[c0 + i] = value
+                i += 1
+
+            x0 = col_offset + c0
+            self.write_window(x0, x0 + size - 1, page, page, window)
+            flushed += size
+
+        return flushed
+
+    def write_window(self, x0, x1, page0, page1, buf):
         self.write_cmd(SET_COL_ADDR)
         self.write_cmd(x0)
         self.write_cmd(x1)
         self.write_cmd(SET_PAGE_ADDR)
-        self.write_cmd(0)
-        self.write_cmd(self.pages - 1)
-        self.write_data(self.buffer)
+        self.write_cmd(page0)
+        self.write_cmd(page1)
+        self.write_data(buf)
 
 
 class SSD1306_I2C(SSD1306):
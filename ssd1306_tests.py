@@ -0,0 +1,143 @@
+import sys
+import unittest
+
+# framebuf and micropython are faked in host/ off the device
+sys.path.append("host")
+
+import ssd1306  # noqa: E402
+from widgets_tests import allocated_bytes  # noqa: E402
+
+
+class I2C:
+    """Keeps the commands and display data written, like the panel sees them."""
+
+    def __init__(self):
+        self.commands = []
+        self.data = []
+
+    def writeto(self, addr, buf):
+        self.commands.append(buf[1])
+
+    def writevto(self, addr, bufs):
+        self.data.append(bytes(bufs[1]))
+
+    def clear(self):
+        self.commands = []
+        self.data = []
+
+
+class NullI2C:
+    def writeto(self, addr, buf):
+        pass
+
+    def writevto(self, addr, bufs):
+        pass
+
+
+def window(x0, x1, page0, page1):
+    return [ssd1306.SET_COL_ADDR, x0, x1, ssd1306.SET_PAGE_ADDR, page0, page1]
+
+
+class TestShow(unittest.TestCase):
+    def setUp(self):
+        self.i2c = I2C()
+        self.oled = ssd1306.SSD1306_I2C(128, 64, self.i2c)
+        self.i2c.clear()
+
+    def test_the_first_show_sends_the_whole_buffer(self):
+        oled = ssd1306.SSD1306_I2C(128, 64, self.i2c)
+
+        assert self.i2c.data[-1] == bytes(1024)
+        assert oled.flushed_bytes == 1024
+
+    def test_an_unchanged_buffer_sends_nothing(self):
+        self.oled.show()
+
+        assert self.i2c.commands == []
+        assert self.i2c.data == []
+        assert self.oled.flushed_bytes == 0
+
+    def test_a_changed_column_is_sent_as_one_narrow_window(self):
+        total = self.oled.flushed_bytes_total
+        self.oled.pixel(10, 20, 1)
+        self.oled.show()
+
+        assert self.i2c.commands == window(10, 10, 2, 2)
+        assert self.i2c.data == [b"\x10"]
+        assert self.oled.flushed_bytes == 1
+        assert self.oled.flushed_bytes_total == total + 1
+
+    def test_changes_are_narrowed_per_page(self):
+        self.oled.pixel(10, 0, 1)
+        self.oled.pixel(12, 0, 1)
+        self.oled.pixel(100, 63, 1)
+        self.oled.show()
+
+        assert self.i2c.commands == window(10, 12, 0, 0) + window(100, 100, 7, 7)
+        assert self.i2c.data == [b"\x01\x00\x01", b"\x80"]
+
+    def test_show_does_not_allocate(self):
+        oled = ssd1306.SSD1306_I2C(128, 64, NullI2C())
+
+        def frame(color):
+            # the fake framebuf allocates, only show() is measured
+            oled.fill_rect(100, 40, 8, 8, color)
+            # a large total is a boxed int on CPython, a small int on the device
+            oled.flushed_bytes_total = 0
+            return allocated_bytes(oled.show)
+
+        # the window view of the size used is created on the first change
+        frame(1)
+        frames = [frame(color) for color in (0, 1, 0)]
+
+        assert frames == [0, 0, 0]
+        assert oled.flushed_bytes == 8
+
+
+class TestHardwareScroll(unittest.TestCase):
+    def setUp(self):
+        self.i2c = I2C()
+        self.oled = ssd1306.SSD1306_I2C(128, 64, self.i2c)
+        self.i2c.clear()
+
+    def test_starts_the_scroll_engine_on_the_given_pages(self):
+        self.oled.hw_scroll(2, 3, left=True, interval=7)
+        self.oled.hw_scroll(0, 1, left=False, interval=9)
+
+        assert self.i2c.commands == [
+            0x2E, 0x27, 0x00, 2, 7, 3, 0x00, 0xFF, 0x2F,
+            0x2E, 0x26, 0x00, 0, 1, 1, 0x00, 0xFF, 0x2F,
+        ]  # fmt: skip
+
+    def test_show_leaves_the_scrolled_pages_alone(self):
+        self.oled.hw_scroll(2, 3)
+        self.i2c.clear()
+        self.oled.fill_rect(0, 16, 128, 16, 1)
+        self.oled.pixel(5, 40, 1)
+        self.oled.show()
+
+        assert self.i2c.commands == window(5, 5, 5, 5)
+        assert self.i2c.data == [b"\x01"]
+
+    def test_stopping_resends_the_scrolled_pages_in_full(self):
+        self.oled.hw_scroll(2, 3)
+        self.oled.fill_rect(0, 16, 128, 8, 1)
+        self.oled.show()
+        self.i2c.clear()
+
+        self.oled.hw_scroll_stop()
+        self.oled.show()
+
+        assert self.i2c.commands == [0x2E] + window(0, 127, 2, 2) + window(
+            0, 127, 3, 3
+        )
+        assert self.i2c.data == [b"\xff" * 128, bytes(128)]
+
+        self.i2c.clear()
+        self.oled.hw_scroll_stop()
+        self.oled.show()
+        assert self.i2c.commands == []
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,294 @@
+import struct
+from atomic_file import AtomicFile
+from models import ClockodoTask, TaskIndex
+from render_helpers import LruCache
+
+
+def clean_name(name):
+    # names are shown on a single line
+    return name.replace("\t", " ").replace("\n", " ")
+
+
+class TaskTable:
+    """
+    The tasks synced from the API, packed into a file on flash so booting does
+    not wait for the network and the tasks take up no RAM. A task is read when
+    it is shown, the last few shown ones are kept in an LRU.
+
+    The header is followed by a record per task in list order, a key per task
+    sorted by ids to look tasks up, and the names.
+    """
+
+    MAGIC = b"TSK1"
+    # magic, file size, synced_at, count, marker
+    HEADER_FORMAT = "<4sIII32s"
+    HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+    # customer_id, project_id or 0, name offset, name length
+    RECORD_FORMAT = "<IIIH"
+    RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+    # customer_id, project_id or 0, record index
+    KEY_FORMAT = "<III"
+    KEY_SIZE = struct.calcsize(KEY_FORMAT)
+
+    def __init__(self, filename, cached_tasks=8):
+        self.filename = filename
+        self.cached_tasks = cached_tasks
+        self.cache = LruCache(cached_tasks)
+        self.file = None
+        self.size = 0
+        self.count = 0
+        self.synced_at = None
+        self.marker = None
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+
+        task = self.cache.get(index)
+        if task is None:
+            task = self.read_task(index)
+            self.cache.put(index, task, 1)
+        return task
+
+    def keys_at(self):
+        return self.HEADER_SIZE + self.count * self.RECORD_SIZE
+
+    def read(self, offset, size):
+        self.file.seek(offset)
+        return self.file.read(size)
+
+    def read_task(self, index):
+        record_at = self.HEADER_SIZE + index * self.RECORD_SIZE
+        record = self.read(record_at, self.RECORD_SIZE)
+        customer_id, project_id, name_at, name_size = struct.unpack(
+            self.RECORD_FORMAT, record
+        )
+        name = self.read(name_at, name_size).decode()
+        project_id = project_id or None
+        return ClockodoTask(name, customer_id=customer_id, project_id=project_id)
+
+    def find_index(self, customer_id, project_id):
+        # a binary search over the keys on flash, a pinned task may lack either id
+        ids = (customer_id or 0, project_id or 0)
+        keys_at = self.keys_at()
+        low = 0
+        high = self.count
+        while low < high:
+            middle = (low + high) // 2
+            key = self.read(keys_at + middle * self.KEY_SIZE, self.KEY_SIZE)
+            key_customer_id, key_project_id, index = struct.unpack(self.KEY_FORMAT, key)
+            key_ids = (key_customer_id, key_project_id)
+            if key_ids < ids:
+                low = middle + 1
+            elif key_ids > ids:
+                high = middle
+            else:
+                return index
+        return None
+
+    def find(self, customer_id, project_id):
+        index = self.find_index(customer_id, project_id)
+        return None if index is None else self[index]
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def load(self):
+        self.close()
+        self.cache = LruCache(self.cached_tasks)
+        self.count = 0
+        self.synced_at = None
+        self.marker = None
+
+        try:
+            file = open(self.filename, "rb")
+        except OSError:
+            return
+
+        header = file.read(self.HEADER_SIZE)
+        if len(header) == self.HEADER_SIZE:
+            magic, size, synced_at, count, marker = struct.unpack(
+                self.HEADER_FORMAT, header
+            )
+            if magic == self.MAGIC and file.seek(0, 2) == size:
+                self.file = file
+                self.size = size
+                self.count = count
+                self.synced_at = synced_at
+                self.marker = marker.rstrip(b"\0").decode()
+                return
+        file.close()
+
+    def pack_header(self, size, synced_at, count, marker):
+        return struct.pack(
+            self.HEADER_FORMAT, self.MAGIC, size, synced_at, count, marker.encode()
+        )
+
+    def save(self, tasks, synced_at, marker):
+        count = len(tasks)
+        names_at = self.HEADER_SIZE + count * (self.RECORD_SIZE + self.KEY_SIZE)
+        names = [task.name.encode() for task in tasks]
+        size = names_at + sum(len(name) for name in names)
+        keys = sorted(
+            (task.customer_id, task.project_id or 0, index)
+            for index, task in enumerate(tasks)
+        )
+
+        with AtomicFile(self.filename) as file:
+            file.write(self.pack_header(size, synced_at, count, marker))
+            name_at = names_at
+            for task, name in zip(tasks, names):
+                file.write(
+                    struct.pack(
+                        self.RECORD_FORMAT,
+                        task.customer_id,
+                        task.project_id or 0,
+                        name_at,
+                        len(name),
+                    )
+                )
+                name_at += len(name)
+            for key in keys:
+                file.write(struct.pack(self.KEY_FORMAT, *key))
+            for name in names:
+                file.write(name)
+            # the open table is closed before the new one is swapped in
+            self.close()
+        self.load()
+
+    def touch(self, synced_at):
+        # rewrites only the header, the tasks did not change
+        with open(self.filename, "r+b") as file:
+            file.write(self.pack_header(self.size, synced_at, self.count, self.marker))
+        self.synced_at = synced_at
+
+
+class MergedTasks:
+    """
+    The pinned tasks in front, followed by the tasks of the table which are not
+    pinned already. Both stay where they are, nothing is copied.
+    """
+
+    def __init__(self, pinned_tasks, table=None):
+        self.pinned_tasks = pinned_tasks
+        self.pinned_index = TaskIndex(pinned_tasks)
+        self.table = table
+
+        hidden = set()
+        if table is not None:
+            for task in pinned_tasks:
+                index = table.find_index(task.customer_id, task.project_id)
+                if index is not None:
+                    hidden.add(index)
+        # indexes of the table skipped in the sequence, ascending
+        self.hidden = sorted(hidden)
+
+        table_count = 0 if table is None else len(table)
+        self.count = len(pinned_tasks) + table_count - len(self.hidden)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+
+        pinned_count = len(self.pinned_tasks)
+        if index < pinned_count:
+            return self.pinned_tasks[index]
+
+        table_index = index - pinned_count
+        for hidden_index in self.hidden:
+            if hidden_index > table_index:
+                break
+            table_index += 1
+        return self.table[table_index]
+
+    def find(self, customer_id, project_id):
+        task = self.pinned_index.find(customer_id, project_id)
+        if task is None and self.table is not None:
+            task = self.table.find(customer_id, project_id)
+        return task
+
+
+class TaskSync:
+    """
+    Pulls the active customers and projects from the API page by page and turns
+    them into one task per customer and one per project.
+
+    The table is refetched once it is older than `max_age_seconds`. A marker
+    hashed from the fetched ids and names tells whether anything changed, so an
+    unchanged task list is not rewritten and the shown list is left alone.
+    """
+
+    def __init__(self, table, max_age_seconds):
+        self.table = table
+        self.max_age_seconds = max_age_seconds
+
+    def stale(self, now):
+        synced_at = self.table.synced_at
+        if synced_at is None:
+            return True
+        # a clock which went backwards is not trusted either
+        return not 0 <= now - synced_at < self.max_age_seconds
+
+    @staticmethod
+    async def fetch_all(fetch_page, kind):
+        # `fetch_page(kind, page)` returns the decoded response of one page
+        items = []
+        page = 1
+        while True:
+            response = await fetch_page(kind, page)
+            items.extend(response[kind])
+            if page >= response["paging"]["count_pages"]:
+                return items
+            page += 1
+
+    @staticmethod
+    def marker(customers, projects):
+        # 32 bit FNV-1a over the ids and names
+        marker = 0x811C9DC5
+        for item in customers + projects:
+            for character in f"{item['id']}:{item['name']};":
+                marker = ((marker ^ ord(character)) * 0x01000193) & 0xFFFFFFFF
+        return f"{len(customers)}-{len(projects)}-{marker:08x}"
+
+    @staticmethod
+    def build_tasks(customers, projects):
+        projects_by_customer = {}
+        for project in projects:
+            customer_projects = projects_by_customer.setdefault(
+                project["customers_id"], []
+            )
+            customer_projects.append(project)
+
+        tasks = []
+        for customer in customers:
+            customer_id = customer["id"]
+            customer_name = clean_name(customer["name"])
+            tasks.append(ClockodoTask(customer_name, customer_id=customer_id))
+            for project in projects_by_customer.get(customer_id, ()):
+                name = f"{customer_name}: {clean_name(project['name'])}"
+                project_id = project["id"]
+                tasks.append(
+                    ClockodoTask(name, customer_id=customer_id, project_id=project_id)
+                )
+        return tasks
+
+    async def sync(self, fetch_page, now):
+        """Refetches the table, returns whether the tasks changed."""
+        customers = await self.fetch_all(fetch_page, "customers")
+        projects = await self.fetch_all(fetch_page, "projects")
+
+        marker = self.marker(customers, projects)
+        if marker == self.table.marker:
+            self.table.touch(now)
+            return False
+
+        self.table.save(self.build_tasks(customers, projects), now, marker)
+        return True
@@ -0,0 +1,191 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from models import ClockodoTask
+from task_sync import MergedTasks, TaskSync, TaskTable
+
+
+def ids(tasks):
+    return [(task.customer_id, task.project_id) for task in tasks]
+
+
+class Api:
+    def __init__(self, customers, projects, per_page=2):
+        self.items = {"customers": customers, "projects": projects}
+        self.per_page = per_page
+        self.calls = []
+
+    async def fetch_page(self, kind, page):
+        self.calls.append((kind, page))
+        items = self.items[kind]
+        count_pages = max(1, -(-len(items) // self.per_page))
+        start = (page - 1) * self.per_page
+        return {
+            "paging": {"current_page": page, "count_pages": count_pages},
+            kind: items[start : start + self.per_page],
+        }
+
+
+CUSTOMERS = [
+    {"id": 1, "name": "ACME"},
+    {"id": 2, "name": "Initech"},
+    {"id": 3, "name": "Umbrella"},
+]
+PROJECTS = [
+    {"id": 10, "customers_id": 1, "name": "Website"},
+    {"id": 11, "customers_id": 2, "name": "TPS\treports"},
+]
+
+
+class TableTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "tasks.bin")
+        self.tables = []
+
+    def tearDown(self):
+        for table in self.tables:
+            table.close()
+        self.directory.cleanup()
+
+    def table(self, tasks=None):
+        table = TaskTable(self.filename)
+        self.tables.append(table)
+        if tasks is not None:
+            table.save(tasks, 1000, "marker")
+        table.load()
+        return table
+
+
+class TestTaskTable(TableTestCase):
+    def test_saved_tasks_survive_a_reload(self):
+        self.table(
+            [
+                ClockodoTask("ACME: Website", customer_id=1, project_id=10),
+                ClockodoTask("Ümlaut", customer_id=2),
+            ]
+        )
+
+        table = self.table()
+        assert len(table) == 2
+        assert [task.name for task in table] == ["ACME: Website", "Ümlaut"]
+        assert ids(table) == [(1, 10), (2, None)]
+        assert (table.synced_at, table.marker) == (1000, "marker")
+
+    def test_finds_tasks_by_their_ids(self):
+        tasks = [
+            ClockodoTask(f"Task {i}", customer_id=i % 7, project_id=i)
+            for i in range(50)
+        ]
+        table = self.table(tasks)
+
+        for task in tasks:
+            assert table.find(task.customer_id, task.project_id).name == task.name
+        assert table.find(3, None) is None
+
+    def test_keeps_the_last_shown_tasks(self):
+        tasks = [ClockodoTask(f"Task {i}", customer_id=i) for i in range(20)]
+        table = self.table(tasks)
+
+        assert table[5] is table[5]
+        for i in range(10):
+            table[i]
+        assert table[5] is table[5]
+
+    def test_a_missing_or_broken_table_loads_as_never_synced(self):
+        table = self.table()
+        assert len(table) == 0
+
+        self.table([ClockodoTask("ACME", customer_id=1)])
+        with open(self.filename, "r+b") as file:
+            file.truncate(os.path.getsize(self.filename) - 1)
+        table = self.table()
+        assert len(table) == 0
+        assert table.synced_at is None
+
+
+class TestTaskSync(TableTestCase):
+    def setUp(self):
+        super().setUp()
+        self.task_sync = TaskSync(self.table(), 3600)
+
+    def sync(self, api, now=1000):
+        return asyncio.run(self.task_sync.sync(api.fetch_page, now))
+
+    def test_fetches_every_page_into_a_task_per_customer_and_project(self):
+        api = Api(CUSTOMERS, PROJECTS)
+        assert self.sync(api)
+
+        tasks = self.task_sync.table
+        assert api.calls == [("customers", 1), ("customers", 2), ("projects", 1)]
+        assert [task.name for task in tasks] == [
+            "ACME",
+            "ACME: Website",
+            "Initech",
+            "Initech: TPS reports",
+            "Umbrella",
+        ]
+        assert ids(tasks) == [(1, None), (1, 10), (2, None), (2, 11), (3, None)]
+
+    def test_is_stale_without_a_table_and_after_the_max_age(self):
+        assert self.task_sync.stale(1000)
+
+        self.sync(Api(CUSTOMERS, PROJECTS), now=1000)
+        assert not self.task_sync.stale(4599)
+        assert self.task_sync.stale(4600)
+        assert self.task_sync.stale(999)
+
+    def test_an_unchanged_task_list_only_renews_the_sync_time(self):
+        self.sync(Api(CUSTOMERS, PROJECTS), now=1000)
+        table = self.task_sync.table
+        task = table[0]
+
+        assert not self.sync(Api(CUSTOMERS, PROJECTS), now=5000)
+        assert table[0] is task
+        assert (table.synced_at, self.table().synced_at) == (5000, 5000)
+
+        renamed = [dict(CUSTOMERS[0], name="ACME Corp")] + CUSTOMERS[1:]
+        assert self.sync(Api(renamed, PROJECTS), now=9000)
+        assert table[0].name == "ACME Corp"
+
+
+class TestMergedTasks(TableTestCase):
+    def test_puts_pinned_tasks_first_without_duplicates(self):
+        pinned = [
+            ClockodoTask("Website", customer_id=1, project_id=10),
+            ClockodoTask("Initech", customer_id=2),
+        ]
+        table = self.table(
+            [
+                ClockodoTask("ACME", customer_id=1),
+                ClockodoTask("ACME: Website", customer_id=1, project_id=10),
+                ClockodoTask("Initech", customer_id=2),
+                ClockodoTask("Umbrella", customer_id=3),
+            ]
+        )
+
+        merged = MergedTasks(pinned, table)
+
+        assert len(merged) == 4
+        assert [task.name for task in merged] == [
+            "Website",
+            "Initech",
+            "ACME",
+            "Umbrella",
+        ]
+        assert merged.find(1, 10) is pinned[0]
+        assert merged.find(3, None).name == "Umbrella"
+
+    def test_a_pinned_task_without_a_customer_is_kept(self):
+        pinned = [ClockodoTask("Project", project_id=2)]
+        table = self.table([ClockodoTask("ACME", customer_id=1)])
+
+        merged = MergedTasks(pinned, table)
+
+        assert [task.name for task in merged] == ["Project", "ACME"]
+        assert table.find_index(None, 2) is None
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import framebuf
+from render_helpers import LruCache
+
+
+class TextCache:
+    """
+    Text rasterized once into 8 pixel high strips, so drawing it again is a
+    blit. Strips are kept in an LRU cache limited to `budget` bytes.
+    """
+
+    def __init__(self, budget, char_width=8):
+        self.char_width = char_width
+        self.strips = LruCache(budget)
+
+    def strip(self, text):
+        strip = self.strips.get(text)
+        if strip is not None:
+            return strip
+
+        # one byte per column for a single MONO_VLSB page
+        width = len(text) * self.char_width
+        if width == 0 or width > self.strips.budget:
+            return None
+
+        strip = framebuf.FrameBuffer(bytearray(width), width, 8, framebuf.MONO_VLSB)
+        strip.text(text, 0, 0)
+        self.strips.put(text, strip, width)
+        return strip
+
+    def draw(self, canvas, text, x, y):
+        strip = self.strip(text)
+        if strip is None:
+            canvas.text(text, x, y)
+        else:
+            canvas.blit(strip, x, y)
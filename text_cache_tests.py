@@ -0,0 +1,70 @@
+import sys
+import unittest
+
+# framebuf is faked in host/ off the device
+sys.path.append("host")
+
+import framebuf  # noqa: E402
+from text_cache import TextCache  # noqa: E402
+
+
+class Canvas:
+    def __init__(self):
+        self.calls = []
+
+    def text(self, text, x, y):
+        self.calls.append(("text", text, x, y))
+
+    def blit(self, strip, x, y):
+        self.calls.append(("blit", strip, x, y))
+
+
+def screen():
+    return framebuf.FrameBuffer(bytearray(128 * 8), 128, 64, framebuf.MONO_VLSB)
+
+
+class TestTextCache(unittest.TestCase):
+    def test_a_cached_text_is_blitted_from_the_same_strip(self):
+        cache = TextCache(budget=256)
+        canvas = Canvas()
+
+        cache.draw(canvas, "Timer", 44, 30)
+        cache.draw(canvas, "Timer", 44, 30)
+
+        first, second = canvas.calls
+        assert first[0] == "blit" and first[2:] == (44, 30)
+        assert second[1] is first[1]
+        assert cache.strips.used == 5 * 8
+
+    def test_a_blitted_strip_looks_like_the_text(self):
+        cache = TextCache(budget=256)
+        blitted = screen()
+        drawn = screen()
+
+        cache.draw(blitted, "Timer", 44, 30)
+        drawn.text("Timer", 44, 30)
+
+        assert blitted.fb_buffer == drawn.fb_buffer
+
+    def test_a_text_wider_than_the_budget_is_drawn_directly(self):
+        cache = TextCache(budget=32)
+        canvas = Canvas()
+
+        cache.draw(canvas, "Development", 0, 0)
+
+        assert canvas.calls == [("text", "Development", 0, 0)]
+        assert cache.strips.used == 0
+
+    def test_the_least_recently_used_strip_is_evicted_over_the_budget(self):
+        cache = TextCache(budget=100)
+        canvas = Canvas()
+
+        for text in ("Timer", "Select", "Timer", "Meeting"):
+            cache.draw(canvas, text, 0, 0)
+
+        assert list(cache.strips.entries) == ["Timer", "Meeting"]
+        assert cache.strips.used == (5 + 7) * 8
+
+
+if __name__ == "__main__":
+    unittest.main()
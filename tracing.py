@@ -0,0 +1,124 @@
+import struct
+from array import array
+
+BEGIN = 0x00
+END = 0x80
+
+
+class Span:
+    """
+    A named section of code, entered as a context manager. The span objects
+    are created once up front, entering and leaving them allocates nothing.
+    """
+
+    def __init__(self, tracer, index, name, is_async):
+        self.tracer = tracer
+        self.index = index
+        self.name = name
+        # spans around awaits interleave with others, they get their own track
+        self.is_async = is_async
+
+    def __enter__(self):
+        self.tracer.add(self.index | BEGIN)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.tracer.add(self.index | END)
+
+    def record(self, began_at):
+        # for spans only worth keeping once they turned out to do something
+        self.tracer.add(self.index | BEGIN, began_at)
+        self.tracer.add(self.index | END)
+
+
+class Tracer:
+    """
+    Begin and end records of spans in a fixed size ring buffer, the oldest
+    ones are overwritten. A record is the span index with the END bit and a
+    `clock()` value, usually ticks_us.
+
+    Dumps start with a header and the span names, followed by the records
+    from the oldest to the newest.
+    """
+
+    MAGIC = b"TRC1"
+    # magic, span count, record count
+    HEADER_FORMAT = "<4sHH"
+    # index and END bit, time
+    RECORD_FORMAT = "<BI"
+    RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+    MAX_SPANS = END
+
+    def __init__(self, clock, capacity=512):
+        self.clock = clock
+        self.capacity = capacity
+        self.kinds = bytearray(capacity)
+        self.times = array("I", (0 for _ in range(capacity)))
+        self.next = 0
+        self.count = 0
+        self.enabled = False
+        self.spans = []
+
+    def span(self, name, is_async=False):
+        if len(self.spans) >= self.MAX_SPANS:
+            raise ValueError("too many spans")
+        span = Span(self, len(self.spans), name, is_async)
+        self.spans.append(span)
+        return span
+
+    def add(self, kind, at=None):
+        if not self.enabled:
+            return
+
+        i = self.next
+        self.kinds[i] = kind
+        self.times[i] = self.clock() if at is None else at
+        self.next = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def clear(self):
+        self.next = 0
+        self.count = 0
+
+    def records(self):
+        # (span index, is_end, time) from the oldest to the newest
+        first = (self.next - self.count) % self.capacity
+        for offset in range(self.count):
+            i = (first + offset) % self.capacity
+            kind = self.kinds[i]
+            yield kind & ~END, bool(kind & END), self.times[i]
+
+    def dump(self, filename):
+        with open(filename, "wb") as file:
+            file.write(
+                struct.pack(self.HEADER_FORMAT, self.MAGIC, len(self.spans), self.count)
+            )
+            for span in self.spans:
+                name = span.name.encode()
+                file.write(struct.pack("<BB", span.is_async, len(name)))
+                file.write(name)
+            for index, is_end, at in self.records():
+                file.write(struct.pack(self.RECORD_FORMAT, index | is_end * END, at))
+
+
+def load_dump(data):
+    """Returns ([(name, is_async)], [(span index, is_end, time)]) of a dump."""
+    magic, span_count, record_count = struct.unpack_from(Tracer.HEADER_FORMAT, data)
+    if magic != Tracer.MAGIC:
+        raise ValueError("not a trace dump")
+
+    offset = struct.calcsize(Tracer.HEADER_FORMAT)
+    spans = []
+    for _ in range(span_count):
+        is_async, size = struct.unpack_from("<BB", data, offset)
+        offset += 2
+        spans.append((str(data[offset : offset + size], "utf-8"), bool(is_async)))
+        offset += size
+
+    records = []
+    for _ in range(record_count):
+        kind, at = struct.unpack_from(Tracer.RECORD_FORMAT, data, offset)
+        offset += Tracer.RECORD_SIZE
+        records.append((kind & ~END, bool(kind & END), at))
+    return spans, records
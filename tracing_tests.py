@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+from tracing import Tracer, load_dump
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        self.now += 10
+        return self.now
+
+
+class TestTracer(unittest.TestCase):
+    def setUp(self):
+        self.tracer = Tracer(Clock(), capacity=4)
+        self.tracer.enabled = True
+        self.render = self.tracer.span("render")
+        self.request = self.tracer.span("request", is_async=True)
+
+    def test_spans_record_their_begin_and_end(self):
+        with self.request:
+            with self.render:
+                pass
+
+        assert list(self.tracer.records()) == [
+            (1, False, 10),
+            (0, False, 20),
+            (0, True, 30),
+            (1, True, 40),
+        ]
+
+    def test_the_oldest_records_are_overwritten(self):
+        for _ in range(3):
+            with self.render:
+                pass
+
+        records = list(self.tracer.records())
+        assert [at for _, _, at in records] == [30, 40, 50, 60]
+
+    def test_records_a_span_after_the_fact(self):
+        self.render.record(5)
+
+        assert list(self.tracer.records()) == [(0, False, 5), (0, True, 10)]
+
+    def test_nothing_is_recorded_while_disabled(self):
+        self.tracer.enabled = False
+        with self.render:
+            pass
+
+        assert list(self.tracer.records()) == []
+
+    def test_a_dump_loads_back(self):
+        with self.request:
+            pass
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "trace.bin")
+            self.tracer.dump(filename)
+            with open(filename, "rb") as file:
+                spans, records = load_dump(file.read())
+
+        assert spans == [("render", False), ("request", True)]
+        assert records == [(1, False, 10), (1, True, 20)]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,251 @@
+from render_helpers import TextFormatting, TextScrolling
+
+
+class Layout:
+    WIDTH = 128
+    HEIGHT = 64
+    CHAR_WIDTH = 8
+    CHAR_HEIGHT = 8
+    LINE_HEIGHT = 10
+    CHARS_PER_LINE = round(WIDTH / CHAR_WIDTH)
+
+    # a TextCache drawing text as pre-rendered strips, set up by the display
+    text_cache = None
+
+    @classmethod
+    def draw_text(cls, canvas, text, x, y):
+        if cls.text_cache is None:
+            canvas.text(text, x, y)
+        else:
+            cls.text_cache.draw(canvas, text, x, y)
+
+    @classmethod
+    def line_y(cls, line):
+        return line * cls.LINE_HEIGHT
+
+    @classmethod
+    def centered_x(cls, text):
+        text_length = len(text)
+        if text_length < cls.CHARS_PER_LINE:
+            return (cls.WIDTH - text_length * cls.CHAR_WIDTH) // 2
+        return 0
+
+
+class Widget:
+    """
+    A rectangular area of the screen which redraws only when its inputs change.
+
+    The inputs are a value and an optional detail kept in fixed attributes, so
+    updating and rendering a widget allocates nothing on the heap.
+    """
+
+    def __init__(self, x, y, width, height):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.value = None
+        self.detail = None
+        self.updated = False
+        self.dirty = True
+
+    def invalidate(self):
+        self.dirty = True
+
+    def update(self, value, detail=None):
+        if not self.updated or value != self.value or detail != self.detail:
+            self.value = value
+            self.detail = detail
+            self.updated = True
+            self.dirty = True
+
+    def render(self, canvas):
+        if not self.dirty or not self.updated:
+            return False
+
+        canvas.fill_rect(self.x, self.y, self.width, self.height, 0)
+        self.draw(canvas, self.value, self.detail)
+        self.dirty = False
+        return True
+
+    def draw(self, canvas, value, detail):
+        raise NotImplementedError
+
+
+class Label(Widget):
+    def __init__(self, line, lines=1):
+        height = (lines - 1) * Layout.LINE_HEIGHT + Layout.CHAR_HEIGHT
+        super().__init__(0, Layout.line_y(line), Layout.WIDTH, height)
+        self.lines = lines
+        self.text = None
+        self.segments = None
+
+    def update(self, text):
+        if text != self.text:
+            # wrap once per text instead of on every draw
+            self.text = text
+            self.segments = TextFormatting.split_for_wrapping(
+                text, Layout.CHARS_PER_LINE
+            )[: self.lines]
+        super().update(text)
+
+    def draw(self, canvas, text, _):
+        if self.lines == 1:
+            Layout.draw_text(canvas, text, 0, self.y)
+            return
+
+        for i in range(len(self.segments)):
+            y = self.y + i * Layout.LINE_HEIGHT
+            Layout.draw_text(canvas, self.segments[i], 0, y)
+
+
+class CenteredLabel(Widget):
+    def __init__(self, line):
+        super().__init__(0, Layout.line_y(line), Layout.WIDTH, Layout.CHAR_HEIGHT)
+
+    def draw(self, canvas, text, _):
+        Layout.draw_text(canvas, text, Layout.centered_x(text), self.y)
+
+
+def scroll_offset(text):
+    # the scrolled window is drawn by shifting the whole text to the left, the
+    # display clips everything outside of it
+    index = TextScrolling.scroll_index(text, Layout.CHARS_PER_LINE)
+    if index is None:
+        return None
+    return index * Layout.CHAR_WIDTH
+
+
+class ScrollingLabel(Widget):
+    """Centered when the text fits the line, scrolled by TextScrolling otherwise."""
+
+    def __init__(self, line):
+        super().__init__(0, Layout.line_y(line), Layout.WIDTH, Layout.CHAR_HEIGHT)
+
+    def update(self, text):
+        super().update(text, scroll_offset(text))
+
+    def draw(self, canvas, text, offset):
+        x = Layout.centered_x(text) if offset is None else -offset
+        Layout.draw_text(canvas, text, x, self.y)
+
+
+class TaskList(Widget):
+    """The selected task underlined on `line`, with its neighbours above and below."""
+
+    def __init__(self, line):
+        y = Layout.line_y(line - 1)
+        super().__init__(0, y, Layout.WIDTH, Layout.HEIGHT - y)
+        self.line = line
+        # the selected row and the rows below it, the one above comes on top
+        self.rows = -(-(Layout.HEIGHT - Layout.line_y(line)) // Layout.LINE_HEIGHT)
+        self.tasks = []
+
+    def set_tasks(self, tasks):
+        self.tasks = tasks
+        self.invalidate()
+
+    def update(self, selected_index):
+        if len(self.tasks) == 0:
+            super().update(None, None)
+            return
+
+        task_name = self.tasks[selected_index].name
+        super().update(selected_index, scroll_offset(task_name))
+
+    def draw(self, canvas, selected_index, selected_offset):
+        if selected_index is None:
+            segments = TextFormatting.split_for_wrapping(
+                "No tasks configured", Layout.CHARS_PER_LINE
+            )
+            for i, segment in enumerate(segments):
+                Layout.draw_text(canvas, segment, 0, Layout.line_y(self.line + i))
+            return
+
+        underline_width = len(self.tasks[selected_index].name) * Layout.CHAR_WIDTH
+        underline_y = Layout.line_y(self.line) + Layout.CHAR_HEIGHT
+        canvas.hline(0, underline_y, underline_width, 1)
+
+        # only the visible rows are looked at, however many tasks there are
+        first_index = max(selected_index - 1, 0)
+        last_index = min(selected_index + self.rows, len(self.tasks))
+        for i in range(first_index, last_index):
+            y = Layout.line_y(self.line + i - selected_index)
+            x = 0
+            if i == selected_index and selected_offset is not None:
+                x = -selected_offset
+            Layout.draw_text(canvas, self.tasks[i].name, x, y)
+
+
+# the characters of the timer, indexed by the values in TimerLabel.digits
+TIMER_CHARACTERS = ("0", "1", "2", "3", "4", "5", "6", "7", "8", "9", ":")
+COLON = 10
+
+
+class TimerLabel(CenteredLabel):
+    """
+    The elapsed time as "HH:MM:SS", drawn character by character from digits
+    updated in place, so the tick every second allocates nothing. After the
+    first draw only the digits which changed are cleared and drawn again.
+    """
+
+    def __init__(self, line):
+        super().__init__(line)
+        self.digits = bytearray(8)
+        self.digits[2] = COLON
+        self.digits[5] = COLON
+        # the digits on screen, valid while `partial` is set
+        self.drawn = bytearray(8)
+        self.partial = False
+        self.digits_x = (Layout.WIDTH - len(self.digits) * Layout.CHAR_WIDTH) // 2
+
+    def invalidate(self):
+        super().invalidate()
+        self.partial = False
+
+    def render(self, canvas):
+        if not self.partial:
+            return super().render(canvas)
+        if not self.dirty or not self.updated:
+            return False
+
+        self.draw(canvas, self.value, self.detail)
+        self.dirty = False
+        return True
+
+    def draw(self, canvas, seconds_elapsed, _):
+        if seconds_elapsed < 0:
+            seconds_elapsed = 0
+        hours = seconds_elapsed // 3600
+        if hours > 99:
+            # too long for the digits, rare enough to allocate the text
+            if self.partial:
+                canvas.fill_rect(self.x, self.y, self.width, self.height, 0)
+            text = TextFormatting.format_time(seconds_elapsed)
+            canvas.text(text, Layout.centered_x(text), self.y)
+            self.partial = False
+            return
+
+        minutes = seconds_elapsed // 60 % 60
+        seconds = seconds_elapsed % 60
+        digits = self.digits
+        digits[0] = hours // 10
+        digits[1] = hours % 10
+        digits[3] = minutes // 10
+        digits[4] = minutes % 10
+        digits[6] = seconds // 10
+        digits[7] = seconds % 10
+
+        # changes every second, caching it would only evict the other strips
+        drawn = self.drawn
+        partial = self.partial
+        i = 0
+        while i < 8:
+            if not partial or digits[i] != drawn[i]:
+                x = self.digits_x + i * Layout.CHAR_WIDTH
+                if partial:
+                    canvas.fill_rect(x, self.y, Layout.CHAR_WIDTH, self.height, 0)
+                canvas.text(TIMER_CHARACTERS[digits[i]], x, self.y)
+                drawn[i] = digits[i]
+            i += 1
+        self.partial = True
@@ -0,0 +1,277 @@
+import gc
+import sys
+import unittest
+from models import ClockodoTask
+from render_helpers import TextScrolling
+from widgets import Layout, CenteredLabel, Label, ScrollingLabel, TaskList, TimerLabel
+
+
+class Canvas:
+    def __init__(self):
+        self.calls = []
+
+    def fill_rect(self, x, y, width, height, color):
+        self.calls.append(("fill_rect", x, y, width, height))
+
+    def text(self, text, x, y):
+        self.calls.append(("text", text, x, y))
+
+    def hline(self, x, y, width, color):
+        self.calls.append(("hline", x, y, width))
+
+
+class TextCache:
+    def draw(self, canvas, text, x, y):
+        canvas.calls.append(("blit", text, x, y))
+
+
+class NullCanvas:
+    def fill_rect(self, x, y, width, height, color):
+        pass
+
+    def text(self, text, x, y):
+        pass
+
+    def hline(self, x, y, width, color):
+        pass
+
+
+MICROPYTHON = sys.implementation.name == "micropython"
+
+
+def allocated_bytes(function):
+    """Heap bytes allocated while calling `function`."""
+    if MICROPYTHON:
+        gc.collect()
+        gc.disable()
+        before = gc.mem_alloc()
+        function()
+        allocated = gc.mem_alloc() - before
+        gc.enable()
+        return allocated
+
+    # CPython also allocates for things MicroPython does on the stack, like
+    # bound class methods, so only code avoiding those measures zero here
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        function()
+        return tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+
+
+class TestWidget(unittest.TestCase):
+    def test_render_clears_the_bounding_box_and_draws_the_inputs(self):
+        canvas = Canvas()
+        label = Label(2)
+        label.update("Hello")
+
+        assert label.render(canvas)
+        assert canvas.calls == [("fill_rect", 0, 20, 128, 8), ("text", "Hello", 0, 20)]
+
+    def test_render_does_nothing_when_the_inputs_did_not_change(self):
+        canvas = Canvas()
+        label = CenteredLabel(0)
+        label.update("Timer")
+        label.render(canvas)
+
+        canvas.calls = []
+        label.update("Timer")
+        assert not label.render(canvas)
+        assert canvas.calls == []
+
+    def test_invalidate_redraws_with_the_same_inputs(self):
+        canvas = Canvas()
+        label = CenteredLabel(3)
+        label.update("Timer")
+        label.render(canvas)
+
+        canvas.calls = []
+        label.invalidate()
+        assert label.render(canvas)
+        assert ("text", "Timer", 44, 30) in canvas.calls
+
+    def test_wrapping_label_draws_one_segment_per_line(self):
+        canvas = Canvas()
+        label = Label(2, lines=5)
+        label.update("Please configure WIFI credentials!")
+        label.render(canvas)
+
+        assert canvas.calls[1:] == [
+            ("text", "Please configure", 0, 20),
+            ("text", "WIFI", 0, 30),
+            ("text", "credentials!", 0, 40),
+        ]
+
+
+class TestScrollingLabel(unittest.TestCase):
+    def setUp(self):
+        # the scroll position is kept on the class, other tests move it
+        TextScrolling.text = None
+
+    def test_redraws_only_when_the_scroll_position_changes(self):
+        canvas = Canvas()
+        label = ScrollingLabel(0)
+        label.update("This text should scroll")
+        label.render(canvas)
+
+        label.update("This text should scroll")
+        assert not label.render(canvas)
+
+        TextScrolling.freeze_counter = 2
+        TextScrolling.scroll()
+        label.update("This text should scroll")
+        assert label.render(canvas)
+        assert canvas.calls[-1] == ("text", "This text should scroll", -8, 0)
+
+    def test_draws_from_the_text_cache_when_there_is_one(self):
+        canvas = Canvas()
+        Layout.text_cache = TextCache()
+        try:
+            label = ScrollingLabel(0)
+            label.update("Short")
+            label.render(canvas)
+        finally:
+            Layout.text_cache = None
+
+        assert canvas.calls[-1] == ("blit", "Short", 44, 0)
+
+
+class TestTaskList(unittest.TestCase):
+    def setUp(self):
+        self.tasks = [ClockodoTask(f"Task {i}", customer_id=i) for i in range(6)]
+
+    def test_draws_the_selected_task_underlined_with_its_neighbours(self):
+        canvas = Canvas()
+        task_list = TaskList(3)
+        task_list.set_tasks(self.tasks)
+        task_list.update(2)
+        task_list.render(canvas)
+
+        assert canvas.calls == [
+            ("fill_rect", 0, 20, 128, 44),
+            ("hline", 0, 38, 48),
+            ("text", "Task 1", 0, 20),
+            ("text", "Task 2", 0, 30),
+            ("text", "Task 3", 0, 40),
+            ("text", "Task 4", 0, 50),
+            ("text", "Task 5", 0, 60),
+        ]
+
+    def test_looks_only_at_the_visible_tasks(self):
+        class Tasks(list):
+            looked_at = set()
+
+            def __getitem__(self, index):
+                self.looked_at.add(index)
+                return super().__getitem__(index)
+
+        tasks = Tasks(ClockodoTask(f"Task {i}", customer_id=i) for i in range(5000))
+        task_list = TaskList(3)
+        task_list.set_tasks(tasks)
+        task_list.update(2500)
+        task_list.render(Canvas())
+
+        assert tasks.looked_at == set(range(2499, 2504))
+
+    def test_shows_a_hint_without_tasks(self):
+        canvas = Canvas()
+        task_list = TaskList(3)
+        task_list.update(0)
+        task_list.render(canvas)
+
+        assert canvas.calls[1:] == [
+            ("text", "No tasks", 0, 30),
+            ("text", "configured", 0, 40),
+        ]
+
+
+class TestTimerLabel(unittest.TestCase):
+    def draw(self, seconds_elapsed):
+        canvas = Canvas()
+        timer = TimerLabel(5)
+        timer.update(seconds_elapsed)
+        timer.render(canvas)
+        return canvas.calls[1:]
+
+    def test_draws_the_formatted_time_centered(self):
+        calls = self.draw(3725)
+
+        assert "".join(text for _, text, _, _ in calls) == "01:02:05"
+        assert [(x, y) for _, _, x, y in calls] == [(32 + i * 8, 50) for i in range(8)]
+
+    def test_draws_more_than_99_hours_as_a_whole(self):
+        assert self.draw(360000) == [("text", "100:00:00", 28, 50)]
+
+    def test_a_tick_redraws_only_the_changed_digits(self):
+        canvas = Canvas()
+        timer = TimerLabel(5)
+        timer.update(3659)
+        timer.render(canvas)
+
+        canvas.calls = []
+        timer.update(3660)
+        timer.render(canvas)
+
+        # 01:00:59 to 01:01:00
+        assert canvas.calls == [
+            ("fill_rect", 64, 50, 8, 8),
+            ("text", "1", 64, 50),
+            ("fill_rect", 80, 50, 8, 8),
+            ("text", "0", 80, 50),
+            ("fill_rect", 88, 50, 8, 8),
+            ("text", "0", 88, 50),
+        ]
+
+        canvas.calls = []
+        timer.invalidate()
+        timer.render(canvas)
+        assert len(canvas.calls) == 9
+
+    def test_tick_does_not_allocate(self):
+        canvas = NullCanvas()
+        timer = TimerLabel(5)
+        timer.update(3724)
+        timer.render(canvas)
+
+        def tick(seconds_elapsed):
+            timer.update(seconds_elapsed)
+            timer.render(canvas)
+
+        ticks = [
+            allocated_bytes(lambda: tick(seconds_elapsed))
+            for seconds_elapsed in (3725, 3726, 3727)
+        ]
+
+        assert ticks == [0, 0, 0]
+
+    @unittest.skipUnless(MICROPYTHON, "measured with gc.mem_alloc()")
+    def test_steady_state_frame_does_not_allocate(self):
+        canvas = NullCanvas()
+        task_label = ScrollingLabel(0)
+        caption = CenteredLabel(3)
+        timer = TimerLabel(5)
+
+        def render_frame(seconds_elapsed):
+            task_label.update("Development")
+            caption.update("Timer")
+            timer.update(seconds_elapsed)
+            task_label.render(canvas)
+            caption.render(canvas)
+            timer.render(canvas)
+
+        render_frame(3724)
+        frames = [
+            allocated_bytes(lambda: render_frame(seconds_elapsed))
+            for seconds_elapsed in (3725, 3726, 3727)
+        ]
+
+        assert frames == [0, 0, 0]
+
+
+if __name__ == "__main__":
+    unittest.main()
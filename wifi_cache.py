@@ -0,0 +1,59 @@
+import json
+import os
+from binascii import hexlify, unhexlify
+
+
+def strongest_access_point(scan_results, essid):
+    """(bssid, channel) of the strongest access point of `essid`, or None."""
+    strongest = None
+    strongest_rssi = None
+    encoded_essid = essid.encode()
+    for result in scan_results:
+        ssid, bssid, channel, rssi = result[:4]
+        if ssid == encoded_essid and (strongest is None or rssi > strongest_rssi):
+            strongest = (bssid, channel)
+            strongest_rssi = rssi
+    return strongest
+
+
+def parse_ifconfig(text):
+    """The (ip, netmask, gateway, dns) tuple of "ip,netmask,gateway,dns"."""
+    parts = tuple(part.strip() for part in text.split(","))
+    if len(parts) != 4:
+        raise ValueError("expected ip, netmask, gateway and dns")
+    return parts
+
+
+class WifiCache:
+    """
+    The access point and IP lease of the last good connection, kept on flash
+    so the next connect can skip scanning and DHCP.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    def load(self):
+        """Returns (bssid, channel, ifconfig), or None without a usable cache."""
+        try:
+            with open(self.filename) as file:
+                cached = json.load(file)
+            bssid = unhexlify(cached["bssid"])
+            return bssid, cached["channel"], tuple(cached["ifconfig"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, bssid, channel, ifconfig):
+        cached = {
+            "bssid": hexlify(bssid).decode(),
+            "channel": channel,
+            "ifconfig": list(ifconfig),
+        }
+        with open(self.filename, "w") as file:
+            json.dump(cached, file)
+
+    def clear(self):
+        try:
+            os.remove(self.filename)
+        except OSError:
+            pass
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+from wifi_cache import WifiCache, parse_ifconfig, strongest_access_point
+
+IFCONFIG = ("192.168.0.2", "255.255.255.0", "192.168.0.1", "192.168.0.1")
+
+
+class TestWifiCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "wifi.json")
+        self.cache = WifiCache(self.filename)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_loads_the_saved_access_point_and_lease(self):
+        self.cache.save(b"\x02\x00\x00\x00\x00\x01", 6, IFCONFIG)
+
+        assert self.cache.load() == (b"\x02\x00\x00\x00\x00\x01", 6, IFCONFIG)
+
+        self.cache.clear()
+        assert self.cache.load() is None
+
+    def test_a_missing_or_broken_cache_loads_as_none(self):
+        assert self.cache.load() is None
+
+        with open(self.filename, "w") as file:
+            file.write('{"bssid": "not hex"')
+        assert self.cache.load() is None
+
+
+class TestAccessPoints(unittest.TestCase):
+    def test_picks_the_strongest_access_point_of_the_network(self):
+        scan_results = [
+            (b"essid", b"\x01", 1, -70, 3, False),
+            (b"other", b"\x02", 6, -30, 3, False),
+            (b"essid", b"\x03", 11, -50, 3, False),
+        ]
+
+        assert strongest_access_point(scan_results, "essid") == (b"\x03", 11)
+        assert strongest_access_point(scan_results, "missing") is None
+
+    def test_parses_a_static_ifconfig(self):
+        text = " 192.168.0.2, 255.255.255.0,192.168.0.1,192.168.0.1"
+        assert parse_ifconfig(text) == IFCONFIG
+        with self.assertRaises(ValueError):
+            parse_ifconfig("192.168.0.2")
+
+
+if __name__ == "__main__":
+    unittest.main()